@@ -8,6 +8,9 @@ from datetime import datetime
 from config.config import config
 from .extensions import db, login_manager, migrate, mail, jwt, csrf
 from .utils.logging import configure_logging
+from .utils.jobs import job_runner
+from .utils.identity_cache import identity_cache
+from .utils.password_hashing import PasswordHasherBusy, password_hasher
 
 def create_app(config_name=None):
     """Create Flask application."""
@@ -20,20 +23,19 @@ def create_app(config_name=None):
     # Load configuration
     app.config.from_object(config[config_name])
     
-    # Ensure the logs directory exists
-    logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
-    
     # Configure logging
-    log_file = os.path.join(logs_dir, 'app.log')
-    file_handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=10)
-    file_handler.setFormatter(logging.Formatter(
-        '%(asctime)s [%(levelname)s] %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    ))
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
+    if app.config['LOG_TO_FILE']:
+        logs_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
+        if not os.path.exists(logs_dir):
+            os.makedirs(logs_dir)
+        log_file = os.path.join(logs_dir, 'app.log')
+        file_handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=10)
+        file_handler.setFormatter(logging.Formatter(
+            '%(asctime)s [%(levelname)s] %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        ))
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
     app.logger.setLevel(logging.INFO)
     app.logger.info('Application startup')
     
@@ -44,6 +46,8 @@ def create_app(config_name=None):
     mail.init_app(app)
     jwt.init_app(app)
     csrf.init_app(app)
+    job_runner.init_app(app)
+    password_hasher.init_app(app)
     
     # Configure login manager
     login_manager.login_view = 'auth.login'
@@ -52,14 +56,20 @@ def create_app(config_name=None):
     
     @login_manager.user_loader
     def load_user(user_id):
-        from .models.user import User
-        return User.query.get(int(user_id))
+        # Inactive users are treated as logged out, so deactivation ends live sessions
+        return identity_cache.load(int(user_id))
     
     # Register error handlers
     @app.errorhandler(CSRFError)
     def handle_csrf_error(e):
         return render_template('errors/csrf_error.html', reason=e.description), 400
     
+    @app.errorhandler(PasswordHasherBusy)
+    def handle_password_hasher_busy(e):
+        return render_template('errors/service_busy.html', retry_after=e.retry_after), 503, {
+            'Retry-After': str(e.retry_after)
+        }
+    
     # Register context processors
     @app.context_processor
     def utility_processor():
@@ -69,9 +79,11 @@ def create_app(config_name=None):
     from .views.main import main_bp
     from .views.auth import auth_bp
     from .views.admin import admin_bp
+    from .views.api import api_bp
     
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
+    app.register_blueprint(api_bp, url_prefix='/api')
     
     return app 
\ No newline at end of file
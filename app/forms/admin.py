@@ -39,8 +39,30 @@ class MasterDataImportForm(FlaskForm):
         DataRequired(),
         FileAllowed(['csv'], 'CSV files only!')
     ])
+    mode = SelectField('Existing Records', choices=[
+        ('skip', 'Skip existing records'),
+        ('upsert', 'Update changed records')
+    ], default='skip')
     submit = SubmitField('Import')
 
+class MasterDataBulkDeleteForm(FlaskForm):
+    """Form for deleting master data in bulk"""
+    category = StringField('Category', validators=[
+        Optional(),
+        Length(max=50)
+    ])
+    mode = SelectField('Method', choices=[
+        ('chunked', 'Chunked delete (keeps the table available)'),
+        ('truncate', 'Truncate table (fastest, whole table only)')
+    ], default='chunked')
+    confirm = StringField('Confirmation', validators=[DataRequired()])
+    submit = SubmitField('Delete')
+    
+    def validate_confirm(self, field):
+        """Require the word DELETE to be typed"""
+        if field.data != 'DELETE':
+            raise ValidationError('Type DELETE to confirm.')
+
 class SystemSettingsForm(FlaskForm):
     """Form for managing system settings"""
     app_name = StringField('Application Name', validators=[
@@ -5,6 +5,11 @@ from ..extensions import db
 from .user import User
 from .user_preferences import UserPreferences
 from .master_data import MasterData
+from .master_data_version import MasterDataVersion
+from .master_data_tombstone import MasterDataTombstone
+from .tag import Tag
 from .people import People
+from .people_duplicate import PeopleDuplicateCluster
+from .data_job import DataJob, DataJobLock
 
-__all__ = ['db', 'User', 'UserPreferences', 'MasterData', 'People'] 
\ No newline at end of file
+__all__ = ['db', 'User', 'UserPreferences', 'MasterData', 'MasterDataVersion', 'MasterDataTombstone', 'Tag', 'People', 'PeopleDuplicateCluster', 'DataJob', 'DataJobLock'] 
\ No newline at end of file
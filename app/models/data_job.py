@@ -0,0 +1,135 @@
+import json
+from datetime import datetime
+from ..extensions import db
+
+class DataJob(db.Model):
+    """Background data job model (imports and other bulk operations)"""
+    __tablename__ = 'data_jobs'
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    MAX_ERROR_MESSAGES = 20
+    
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    filename = db.Column(db.String(200))
+    mode = db.Column(db.String(20))
+    file_fingerprint = db.Column(db.String(64))
+    master_data_stamp = db.Column(db.String(64))
+    note = db.Column(db.String(200))
+    categories = db.Column(db.String(500))
+    total_rows = db.Column(db.Integer)
+    processed_rows = db.Column(db.Integer, default=0)
+    added_rows = db.Column(db.Integer, default=0)
+    updated_rows = db.Column(db.Integer, default=0)
+    skipped_rows = db.Column(db.Integer, default=0)
+    error_count = db.Column(db.Integer, default=0)
+    error_messages = db.Column(db.Text)
+    rows_per_second = db.Column(db.Float)
+    worker_id = db.Column(db.String(100))
+    heartbeat_at = db.Column(db.DateTime)
+    created_by_id = db.Column(db.Integer, db.ForeignKey('users.id', name='fk_data_jobs_created_by'), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    # Relationships
+    created_by = db.relationship('User', foreign_keys=[created_by_id])
+    
+    # Index for the reaper's scan of unfinished jobs
+    __table_args__ = (
+        db.Index('ix_data_jobs_status', 'status'),
+    )
+    
+    def __init__(self, kind, created_by_id, filename=None, mode=None):
+        self.kind = kind
+        self.created_by_id = created_by_id
+        self.filename = filename
+        self.mode = mode
+        self.status = self.STATUS_QUEUED
+        self.processed_rows = 0
+        self.added_rows = 0
+        self.updated_rows = 0
+        self.skipped_rows = 0
+        self.error_count = 0
+    
+    @property
+    def is_finished(self):
+        """Return True once the job has completed or failed"""
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+    
+    @property
+    def progress(self):
+        """Return completion as a percentage, if the row total is known"""
+        if self.is_finished:
+            return 100
+        if not self.total_rows:
+            return 0
+        return min(100, int(self.processed_rows * 100 / self.total_rows))
+    
+    def record_progress(self, result):
+        """Copy importer counters onto the job"""
+        self.processed_rows = result.total
+        self.added_rows = result.added
+        self.updated_rows = result.updated
+        self.skipped_rows = result.skipped
+        self.error_count = result.errors
+        self.rows_per_second = round(result.rows_per_second, 1)
+        self.error_messages = json.dumps(result.error_messages[:self.MAX_ERROR_MESSAGES])
+    
+    def get_error_messages(self):
+        """Return the stored error messages as a list"""
+        return json.loads(self.error_messages) if self.error_messages else []
+    
+    def to_dict(self):
+        """Convert object to dictionary"""
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'filename': self.filename,
+            'mode': self.mode,
+            'file_fingerprint': self.file_fingerprint,
+            'note': self.note,
+            'categories': self.categories.split(',') if self.categories else [],
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'added_rows': self.added_rows,
+            'updated_rows': self.updated_rows,
+            'skipped_rows': self.skipped_rows,
+            'error_count': self.error_count,
+            'error_messages': self.get_error_messages(),
+            'rows_per_second': self.rows_per_second,
+            'progress': self.progress,
+            'created_by_id': self.created_by_id,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+    
+    def __repr__(self):
+        return f'<DataJob {self.id} {self.kind}:{self.status}>'
+
+class DataJobLock(db.Model):
+    """Named lock held by a data job, visible to every worker process
+
+    A job holds either an exclusive lock or a shared one on each name;
+    the rows are taken and released by JobRunner.
+    """
+    __tablename__ = 'data_job_locks'
+    
+    job_id = db.Column(db.Integer, db.ForeignKey('data_jobs.id', name='fk_data_job_locks_job', ondelete='CASCADE'),
+                       primary_key=True)
+    name = db.Column(db.String(100), primary_key=True)
+    exclusive = db.Column(db.Boolean, nullable=False, default=True)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_data_job_locks_name', 'name'),
+    )
+    
+    def __repr__(self):
+        return f'<DataJobLock {self.name} job {self.job_id}>'
@@ -1,10 +1,15 @@
+import hashlib
 from datetime import datetime
+from sqlalchemy import DDL, event
 from ..extensions import db
 
 class MasterData(db.Model):
     """Master data model"""
     __tablename__ = 'master_data'
     
+    # Importable content covered by content_hash
+    CONTENT_FIELDS = ('name', 'description', 'icon', 'tags', 'is_active')
+    
     id = db.Column(db.Integer, primary_key=True)
     category = db.Column(db.String(50), nullable=False)
     code = db.Column(db.String(50), nullable=False)
@@ -12,8 +17,9 @@ class MasterData(db.Model):
     description = db.Column(db.String(500))
     icon = db.Column(db.String(50))
     tags = db.Column(db.String(100))
-    sort_order = db.Column(db.Integer, default=0)
+    sort_order = db.Column(db.Integer, nullable=False, default=0)
     is_active = db.Column(db.Boolean, default=True)
+    content_hash = db.Column(db.String(32))
     created_by_id = db.Column(db.Integer, db.ForeignKey('users.id', name='fk_master_data_created_by'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -21,9 +27,15 @@ class MasterData(db.Model):
     # Relationships
     created_by = db.relationship('User', foreign_keys=[created_by_id])
     
-    # Unique constraint for category and code combination
+    # Unique constraint for category and code combination, plus indexes for
+    # the admin list order, the cached active entries of a category and the
+    # change feed read by sync clients
     __table_args__ = (
         db.UniqueConstraint('category', 'code', name='uq_master_data_category_code'),
+        db.Index('ix_master_data_category_sort_order', 'category', 'sort_order', 'id'),
+        db.Index('ix_master_data_active_category_sort_order', 'category', 'sort_order', 'code',
+                 sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+        db.Index('ix_master_data_updated_at', 'updated_at', 'id'),
     )
     
     def __init__(self, category, code, name, description=None, icon=None, tags=None, sort_order=0, is_active=True, created_by_id=None):
@@ -37,6 +49,17 @@ class MasterData(db.Model):
         self.is_active = is_active
         self.created_by_id = created_by_id
     
+    @staticmethod
+    def compute_content_hash(values):
+        """Hash the importable content fields of a row mapping"""
+        digest = hashlib.blake2b(digest_size=16)
+        for field in MasterData.CONTENT_FIELDS:
+            value = values.get(field)
+            # Keep None distinct from an empty string, as the database does
+            digest.update(b'\x00' if value is None else str(value).encode('utf-8'))
+            digest.update(b'\x1f')
+        return digest.hexdigest()
+    
     def to_dict(self):
         """Convert object to dictionary"""
         return {
@@ -55,4 +78,48 @@ class MasterData(db.Model):
         }
     
     def __repr__(self):
-        return f'<MasterData {self.category}:{self.code}>' 
\ No newline at end of file
+        return f'<MasterData {self.category}:{self.code}>'
+
+@event.listens_for(MasterData, 'before_insert')
+@event.listens_for(MasterData, 'before_update')
+def set_content_hash(mapper, connection, target):
+    """Keep content_hash current for ORM writes; bulk imports set it themselves"""
+    target.content_hash = MasterData.compute_content_hash(
+        {field: getattr(target, field) for field in MasterData.CONTENT_FIELDS}
+    )
+
+# Full-text index over name, description and tags, kept in sync by the
+# database itself so Core bulk writes are covered: an FTS5 external-content
+# table maintained by triggers on SQLite, and a stored generated tsvector
+# column with a GIN index on PostgreSQL.
+SEARCH_DDL = {
+    'sqlite': [
+        "CREATE VIRTUAL TABLE master_data_fts USING fts5("
+        "name, description, tags, content='master_data', content_rowid='id', "
+        "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        "CREATE TRIGGER master_data_fts_insert AFTER INSERT ON master_data BEGIN "
+        "INSERT INTO master_data_fts (rowid, name, description, tags) "
+        "VALUES (new.id, new.name, new.description, new.tags); END",
+        "CREATE TRIGGER master_data_fts_delete AFTER DELETE ON master_data BEGIN "
+        "INSERT INTO master_data_fts (master_data_fts, rowid, name, description, tags) "
+        "VALUES ('delete', old.id, old.name, old.description, old.tags); END",
+        "CREATE TRIGGER master_data_fts_update AFTER UPDATE OF name, description, tags ON master_data BEGIN "
+        "INSERT INTO master_data_fts (master_data_fts, rowid, name, description, tags) "
+        "VALUES ('delete', old.id, old.name, old.description, old.tags); "
+        "INSERT INTO master_data_fts (rowid, name, description, tags) "
+        "VALUES (new.id, new.name, new.description, new.tags); END",
+    ],
+    'postgresql': [
+        "ALTER TABLE master_data ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(tags, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED",
+        "CREATE INDEX ix_master_data_search_vector ON master_data USING gin (search_vector)",
+    ],
+}
+
+for dialect_name, statements in SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(MasterData.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect_name))
+event.listen(MasterData.__table__, 'before_drop',
+             DDL('DROP TABLE IF EXISTS master_data_fts').execute_if(dialect='sqlite'))
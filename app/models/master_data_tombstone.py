@@ -0,0 +1,50 @@
+from datetime import datetime
+from sqlalchemy import delete, event, insert, literal, select
+from ..extensions import db
+from .master_data import MasterData
+
+class MasterDataTombstone(db.Model):
+    """Record of a deleted master data row, so sync clients learn about deletions
+
+    A tombstone without a master_data_id marks the whole table being
+    emptied at once; clients drop everything they hold when they reach it.
+    """
+    __tablename__ = 'master_data_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    master_data_id = db.Column(db.Integer)
+    category = db.Column(db.String(50))
+    code = db.Column(db.String(50))
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_master_data_tombstones_deleted_at', 'deleted_at', 'id'),
+    )
+
+    @classmethod
+    def record_rows(cls, connection, conditions):
+        """Tombstone the master data rows matching conditions, before they are deleted"""
+        rows = select(MasterData.id, MasterData.category, MasterData.code,
+                      literal(datetime.utcnow(), db.DateTime)).where(*conditions)
+        connection.execute(insert(cls.__table__).from_select(
+            ['master_data_id', 'category', 'code', 'deleted_at'], rows))
+
+    @classmethod
+    def record_wipe(cls, connection):
+        """Replace every tombstone with a single marker for an emptied table"""
+        connection.execute(delete(cls.__table__))
+        connection.execute(insert(cls.__table__).values(deleted_at=datetime.utcnow()))
+
+    @classmethod
+    def prune(cls, connection, before):
+        """Drop tombstones older than before; clients behind them must resync"""
+        return connection.execute(delete(cls.__table__).where(cls.deleted_at < before)).rowcount
+
+    def __repr__(self):
+        return f'<MasterDataTombstone {self.category}:{self.code}>'
+
+@event.listens_for(MasterData, 'after_delete')
+def record_tombstone(mapper, connection, target):
+    """Tombstone rows deleted through the ORM; bulk deletes record their own"""
+    connection.execute(insert(MasterDataTombstone.__table__).values(
+        master_data_id=target.id, category=target.category, code=target.code, deleted_at=datetime.utcnow()))
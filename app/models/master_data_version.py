@@ -0,0 +1,87 @@
+from datetime import datetime
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from ..extensions import db
+from .master_data import MasterData
+
+class MasterDataVersion(db.Model):
+    """Per-category change counter and row counts for master data
+
+    The version invalidates cached master data; row_count and active_count
+    summarize the category for the admin filter without scanning the table.
+    """
+    __tablename__ = 'master_data_versions'
+
+    category = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+    active_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @classmethod
+    def bump(cls, changes):
+        """Increment category versions in the current transaction
+
+        changes is either an iterable of categories or a mapping of
+        category -> (row count delta, active count delta).
+        """
+        if not isinstance(changes, dict):
+            changes = {category: (0, 0) for category in changes}
+        rows = [{'category': category, 'version': 1, 'row_count': rows, 'active_count': active}
+                for category, (rows, active) in sorted(changes.items()) if category]
+        if not rows:
+            return
+
+        table = cls.__table__
+        now = datetime.utcnow()
+        for row in rows:
+            row['updated_at'] = now
+        dialect_name = db.session.get_bind().dialect.name
+        if dialect_name in ('postgresql', 'sqlite'):
+            stmt = (postgresql if dialect_name == 'postgresql' else sqlite).insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['category'],
+                set_={
+                    'version': table.c.version + 1,
+                    'row_count': table.c.row_count + stmt.excluded.row_count,
+                    'active_count': table.c.active_count + stmt.excluded.active_count,
+                    'updated_at': now
+                }
+            )
+            db.session.execute(stmt, rows)
+            return
+
+        for row in rows:
+            updated = db.session.execute(
+                table.update().where(table.c.category == row['category']).values(
+                    version=table.c.version + 1,
+                    row_count=table.c.row_count + row['row_count'],
+                    active_count=table.c.active_count + row['active_count'],
+                    updated_at=now)
+            ).rowcount
+            if not updated:
+                db.session.execute(table.insert().values(**row))
+
+    @classmethod
+    def refresh_counts(cls, categories):
+        """Recount the rows of the given categories from master_data"""
+        categories = sorted({category for category in categories if category})
+        if not categories:
+            return
+        table = cls.__table__
+        in_category = MasterData.category == table.c.category
+        db.session.execute(
+            table.update().where(table.c.category.in_(categories)).values(
+                row_count=select(func.count(MasterData.id)).where(in_category).scalar_subquery(),
+                active_count=select(func.count(MasterData.id)).where(
+                    and_(in_category, MasterData.is_active.is_(True))).scalar_subquery()
+            )
+        )
+
+    @classmethod
+    def load_summaries(cls):
+        """Return every category's (category, version, row_count, active_count) in a single query"""
+        return db.session.query(cls.category, cls.version, cls.row_count, cls.active_count).all()
+
+    def __repr__(self):
+        return f'<MasterDataVersion {self.category}:{self.version}>'
@@ -1,4 +1,5 @@
 from datetime import datetime
+from sqlalchemy import DDL, event
 from ..extensions import db
 
 class People(db.Model):
@@ -66,4 +67,20 @@ class People(db.Model):
         }
     
     def __repr__(self):
-        return f'<People {self.full_name}>' 
\ No newline at end of file
+        return f'<People {self.full_name}>'
+
+# Fields the directory search matches by case-insensitive prefix
+SEARCH_FIELDS = ('first_name', 'last_name', 'email')
+
+# One (lower(field), id) index per search field; prefix searches are range
+# scans over it in index order. PostgreSQL compares the key byte-wise
+# (COLLATE "C") so the range matches exactly the strings with the prefix.
+SEARCH_INDEX_DDL = {
+    'sqlite': [f"CREATE INDEX ix_people_{field}_lower ON people (lower({field}), id)" for field in SEARCH_FIELDS],
+    'postgresql': [f'CREATE INDEX ix_people_{field}_lower ON people ((lower({field}) COLLATE "C"), id)'
+                   for field in SEARCH_FIELDS],
+}
+
+for dialect_name, statements in SEARCH_INDEX_DDL.items():
+    for statement in statements:
+        event.listen(People.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect_name))
@@ -0,0 +1,44 @@
+from datetime import datetime
+from ..extensions import db
+
+# People that belong to a candidate duplicate cluster
+people_duplicate_members = db.Table(
+    'people_duplicate_members',
+    db.Column('cluster_id', db.Integer, db.ForeignKey('people_duplicate_clusters.id',
+                                                      name='fk_people_duplicate_members_cluster',
+                                                      ondelete='CASCADE'), primary_key=True),
+    db.Column('people_id', db.Integer, db.ForeignKey('people.id', name='fk_people_duplicate_members_people',
+                                                     ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_people_duplicate_members_people_id', 'people_id'),
+)
+
+class PeopleDuplicateCluster(db.Model):
+    """A group of people records that are likely the same person, awaiting review"""
+    __tablename__ = 'people_duplicate_clusters'
+
+    STATUS_OPEN = 'open'
+    STATUS_DISMISSED = 'dismissed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.Integer, db.ForeignKey('data_jobs.id', name='fk_people_duplicate_clusters_job',
+                                                 ondelete='SET NULL'))
+    status = db.Column(db.String(20), nullable=False, default=STATUS_OPEN)
+    size = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+    reasons = db.Column(db.String(200))
+    # Hash of the sorted member ids, so a dismissed cluster is not suggested again
+    signature = db.Column(db.String(32), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    reviewed_by_id = db.Column(db.Integer, db.ForeignKey('users.id', name='fk_people_duplicate_clusters_reviewed_by'))
+    reviewed_at = db.Column(db.DateTime)
+
+    # Relationships
+    members = db.relationship('People', secondary=people_duplicate_members, order_by='People.id')
+    reviewed_by = db.relationship('User', foreign_keys=[reviewed_by_id])
+
+    __table_args__ = (
+        db.Index('ix_people_duplicate_clusters_status_score', 'status', 'score', 'id'),
+    )
+
+    def __repr__(self):
+        return f'<PeopleDuplicateCluster {self.id} ({self.size})>'
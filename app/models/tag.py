@@ -0,0 +1,114 @@
+import re
+from sqlalchemy import delete, event, func, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import attributes
+from ..extensions import db
+from .master_data import MasterData
+
+TAG_SEPARATOR = ','
+MAX_TAG_LENGTH = 50
+
+TAG_MODE_ANY = 'any'
+TAG_MODE_ALL = 'all'
+TAG_MODES = (TAG_MODE_ANY, TAG_MODE_ALL)
+
+# Association between master data rows and their parsed tags
+master_data_tags = db.Table(
+    'master_data_tags',
+    db.Column('master_data_id', db.Integer, db.ForeignKey('master_data.id', name='fk_master_data_tags_master_data',
+                                                          ondelete='CASCADE'), primary_key=True),
+    db.Column('tag_id', db.Integer, db.ForeignKey('tags.id', name='fk_master_data_tags_tag',
+                                                  ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_master_data_tags_tag_id', 'tag_id', 'master_data_id'),
+)
+
+def parse_tags(value):
+    """Split a comma-separated tags string into sorted, normalized tag names"""
+    names = set()
+    for part in (value or '').split(TAG_SEPARATOR):
+        name = re.sub(r'\s+', ' ', part).strip().lower()[:MAX_TAG_LENGTH]
+        if name:
+            names.add(name)
+    return sorted(names)
+
+class Tag(db.Model):
+    """Normalized tag parsed from MasterData.tags"""
+    __tablename__ = 'tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(MAX_TAG_LENGTH), unique=True, nullable=False)
+
+    @staticmethod
+    def ensure(connection, names):
+        """Create any missing tags and return the name -> id map for names"""
+        names = sorted(set(names))
+        if not names:
+            return {}
+        table = Tag.__table__
+        dialect_name = connection.dialect.name
+        if dialect_name in ('postgresql', 'sqlite'):
+            stmt = (postgresql if dialect_name == 'postgresql' else sqlite).insert(table)
+            connection.execute(stmt.on_conflict_do_nothing(index_elements=['name']),
+                               [{'name': name} for name in names])
+        else:
+            existing = set(connection.execute(select(table.c.name).where(table.c.name.in_(names))).scalars())
+            missing = [{'name': name} for name in names if name not in existing]
+            if missing:
+                connection.execute(insert(table), missing)
+        return dict(connection.execute(select(table.c.name, table.c.id).where(table.c.name.in_(names))).all())
+
+    @staticmethod
+    def sync_master_data(connection, rows):
+        """Replace the tag associations of (master_data_id, tags string) rows"""
+        parsed = {master_data_id: parse_tags(tags) for master_data_id, tags in rows}
+        if not parsed:
+            return
+        connection.execute(
+            delete(master_data_tags).where(master_data_tags.c.master_data_id.in_(list(parsed)))
+        )
+        tag_ids = Tag.ensure(connection, [name for names in parsed.values() for name in names])
+        links = [{'master_data_id': master_data_id, 'tag_id': tag_ids[name]}
+                 for master_data_id, names in parsed.items() for name in names]
+        if links:
+            connection.execute(insert(master_data_tags), links)
+
+    @staticmethod
+    def sync_master_data_keys(connection, keys):
+        """Re-sync the tags of master data rows identified by (category, code)"""
+        keys = list(keys)
+        if not keys:
+            return
+        rows = connection.execute(
+            select(MasterData.id, MasterData.tags).where(
+                tuple_(MasterData.category, MasterData.code).in_(keys))
+        ).all()
+        Tag.sync_master_data(connection, rows)
+
+    @staticmethod
+    def master_data_filter(names, mode=TAG_MODE_ANY):
+        """Return a MasterData.id IN (...) clause for rows tagged with any or all of names"""
+        names = sorted({name for value in names for name in parse_tags(value)})
+        subquery = select(master_data_tags.c.master_data_id).join(
+            Tag, Tag.id == master_data_tags.c.tag_id
+        ).where(Tag.name.in_(names))
+        if mode == TAG_MODE_ALL:
+            subquery = subquery.group_by(master_data_tags.c.master_data_id).having(
+                func.count(master_data_tags.c.tag_id) == len(names))
+        return MasterData.id.in_(subquery)
+
+    def __repr__(self):
+        return f'<Tag {self.name}>'
+
+MasterData.tag_set = db.relationship(Tag, secondary=master_data_tags, viewonly=True, order_by=Tag.name)
+
+@event.listens_for(MasterData, 'after_insert')
+@event.listens_for(MasterData, 'after_update')
+def sync_tags(mapper, connection, target):
+    """Keep the tag index current for ORM writes; bulk imports sync it themselves"""
+    if attributes.get_history(target, 'tags').has_changes():
+        Tag.sync_master_data(connection, [(target.id, target.tags)])
+
+@event.listens_for(MasterData, 'after_delete')
+def delete_tags(mapper, connection, target):
+    """Remove the tag associations of a deleted row"""
+    connection.execute(delete(master_data_tags).where(master_data_tags.c.master_data_id == target.id))
@@ -1,7 +1,7 @@
 from datetime import datetime
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from ..extensions import db
+from ..utils.password_hashing import password_hasher
 import jwt
 from flask import current_app
 from time import time
@@ -13,19 +13,28 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128))
+    password_hash = db.Column(db.String(256))
     full_name = db.Column(db.String(100))
     profile_picture = db.Column(db.String(200))
     is_active = db.Column(db.Boolean, default=True)
     is_admin = db.Column(db.Boolean, default=False)
     last_login = db.Column(db.DateTime)
     last_password_change = db.Column(db.DateTime)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped whenever the user or their preferences change, to invalidate cached identities
+    identity_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     preferences = db.relationship('UserPreferences', backref='user', uselist=False, cascade='all, delete-orphan')
     
+    # Indexes for the user list order and the dashboard counts
+    __table_args__ = (
+        db.Index('ix_users_created_at', 'created_at', 'id'),
+        db.Index('ix_users_last_login', 'last_login'),
+        db.Index('ix_users_active', 'id', sqlite_where=db.text('is_active = 1'), postgresql_where=db.text('is_active')),
+    )
+    
     def __init__(self, username, email, password, full_name=None, is_admin=False):
         self.username = username
         self.email = email
@@ -35,13 +44,21 @@ class User(UserMixin, db.Model):
         self.last_password_change = datetime.utcnow()
     
     def set_password(self, password):
-        """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        """Set password hash, computed in the password hashing pool"""
+        self.password_hash = password_hasher.generate(password)
         self.last_password_change = datetime.utcnow()
     
     def check_password(self, password):
-        """Check password hash"""
-        return check_password_hash(self.password_hash, password)
+        """Check password hash, verified in the password hashing pool"""
+        return password_hasher.check(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Check whether the stored hash uses an outdated scheme or cost"""
+        return password_hasher.needs_rehash(self.password_hash)
+    
+    def rehash_password(self, password):
+        """Re-hash a verified password with the current scheme, keeping last_password_change"""
+        self.password_hash = password_hasher.generate(password)
     
     def get_reset_token(self, expires_in=3600):
         """Generate password reset token"""
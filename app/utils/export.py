@@ -0,0 +1,152 @@
+import csv
+import io
+import os
+import tempfile
+from datetime import date
+
+import xlsxwriter
+from flask import Response, stream_with_context
+from sqlalchemy import select
+from werkzeug.utils import secure_filename
+
+from ..extensions import db
+from ..models.master_data import MasterData
+from ..models.people import People
+from ..models.user import User
+
+DEFAULT_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 1048576  # Rows per worksheet, including the header
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+# Dataset name -> (model, exported columns); password hashes are never exported
+EXPORT_DATASETS = {
+    'master-data': (MasterData, [
+        'id', 'category', 'code', 'name', 'description', 'icon', 'tags', 'sort_order',
+        'is_active', 'created_by_id', 'created_at', 'updated_at'
+    ]),
+    'users': (User, [
+        'id', 'username', 'email', 'full_name', 'is_active', 'is_admin',
+        'last_login', 'last_password_change', 'created_at', 'updated_at'
+    ]),
+    'people': (People, [
+        'id', 'first_name', 'last_name', 'email', 'phone', 'address', 'birth_date', 'gender',
+        'notes', 'is_active', 'created_by_id', 'created_at', 'updated_at'
+    ]),
+}
+
+
+def build_export_query(dataset, category=None):
+    """Return (column names, column-only SELECT) for a dataset
+
+    Master data is filtered and ordered the same way as the admin list.
+    """
+    model, names = EXPORT_DATASETS[dataset]
+    stmt = select(*[getattr(model, name) for name in names])
+    if model is MasterData:
+        if category:
+            stmt = stmt.where(MasterData.category == category)
+        stmt = stmt.order_by(MasterData.category, MasterData.sort_order, MasterData.id)
+    else:
+        stmt = stmt.order_by(model.id)
+    return names, stmt
+
+
+def iter_export_rows(stmt, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield row tuples in batches through a server-side cursor"""
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        yield partition
+
+
+def format_csv_value(value):
+    """Render dates as ISO 8601, like the models' to_dict()"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def generate_csv(names, stmt, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield CSV text one batch of rows at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for partition in iter_export_rows(stmt, batch_size):
+        writer.writerows([format_csv_value(value) for value in row] for row in partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx(path, names, stmt, batch_size=DEFAULT_BATCH_SIZE):
+    """Write rows to an XLSX file using XlsxWriter's constant-memory mode
+
+    Each row is flushed to disk as soon as the next one starts, and a new
+    worksheet is started whenever Excel's row limit is reached.
+    """
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'yyyy-mm-dd hh:mm:ss',
+        'remove_timezone': True
+    })
+    header_format = workbook.add_format({'bold': True})
+    worksheet = None
+    row_index = XLSX_MAX_ROWS
+
+    def start_worksheet():
+        sheet = workbook.add_worksheet()
+        sheet.write_row(0, 0, names, header_format)
+        return sheet
+
+    try:
+        for partition in iter_export_rows(stmt, batch_size):
+            for row in partition:
+                if row_index >= XLSX_MAX_ROWS:
+                    worksheet = start_worksheet()
+                    row_index = 1
+                worksheet.write_row(row_index, 0, row)
+                row_index += 1
+        if worksheet is None:
+            start_worksheet()
+    finally:
+        workbook.close()
+
+
+def stream_file(path, chunk_size=FILE_CHUNK_SIZE):
+    """Yield a file in chunks"""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            yield chunk
+
+
+def export_response(dataset, export_format, category=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Build a streaming download response for a dataset"""
+    names, stmt = build_export_query(dataset, category)
+    filename = secure_filename(f"{dataset}{'-' + category if category else ''}.{export_format}")
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+
+    if export_format == 'csv':
+        return Response(
+            stream_with_context(generate_csv(names, stmt, batch_size)),
+            mimetype='text/csv',
+            headers=headers
+        )
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_xlsx(path, names, stmt, batch_size)
+    except Exception:
+        os.remove(path)
+        raise
+    headers['Content-Length'] = str(os.path.getsize(path))
+    response = Response(
+        stream_file(path),
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers=headers
+    )
+    # Runs when the response is closed, even if it was never iterated (HEAD, early disconnect)
+    response.call_on_close(lambda: os.remove(path))
+    return response
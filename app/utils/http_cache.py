@@ -0,0 +1,37 @@
+import hashlib
+
+from flask import Response, request
+
+from .serialization import json_response
+
+# Clients may keep responses but must revalidate them with If-None-Match
+CACHE_CONTROL = 'private, no-cache'
+
+
+def make_etag(*parts):
+    """Return a strong ETag value derived from the given parts"""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def conditional_json(etag, build):
+    """Return a JSON response tagged with etag, or a 304 if the client already has it
+
+    build is only called when the client's copy is stale, so the rows
+    behind an unchanged response are never read or serialized. It may
+    return an error response instead of a payload, which is sent untagged.
+    """
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        payload = build()
+        if isinstance(payload, Response):
+            return payload
+        response = json_response(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = CACHE_CONTROL
+    response.vary.add('Cookie')
+    return response
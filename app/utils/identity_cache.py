@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict, namedtuple
+from itertools import chain
+
+from flask import current_app
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session, joinedload
+
+from ..extensions import db
+from ..models.user import User
+from ..models.user_preferences import UserPreferences
+
+CachedIdentity = namedtuple('CachedIdentity', ['version', 'user'])
+
+
+class UserIdentityCache:
+    """Process-local cache of logged-in users and their preferences
+
+    Each entry holds a detached User, with preferences eagerly loaded,
+    and the identity_version it was read at. Every flush that writes a
+    user or their preferences bumps users.identity_version in the same
+    transaction, so each request checks the cached entry against the
+    stored version with one primary key lookup and reloads it when
+    another request, worker process or script has changed the user.
+
+    That lookup is the price of seeing a deactivation in every worker at
+    once: a request costs one identity query, the same round trip as
+    loading the user, but never the row, its preferences or a reload.
+    Requests get a session-bound copy through merge(load=False), which
+    issues no SQL, so views can still change and commit current_user as
+    before.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def fetch(self, user_id):
+        """Read a user and their preferences in one joined query, detached from any session"""
+        with Session(db.engine) as session:
+            return session.execute(
+                select(User).options(joinedload(User.preferences)).where(User.id == user_id)
+            ).unique().scalar_one_or_none()
+
+    def get(self, user_id):
+        """Return the cached detached user, reloading it if its stored version has moved"""
+        version = db.session.execute(select(User.identity_version).where(User.id == user_id)).scalar()
+        if version is None:
+            self.discard(user_id)
+            return None
+
+        entry = self._entries.get(user_id)
+        if entry is not None and entry.version == version:
+            with self._lock:
+                if user_id in self._entries:
+                    self._entries.move_to_end(user_id)
+            return entry.user
+
+        user = self.fetch(user_id)
+        if user is None:
+            self.discard(user_id)
+            return None
+        # Keyed on the version read with the row, so a concurrent bump makes this entry stale at once
+        entry = CachedIdentity(user.identity_version, user)
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > current_app.config['IDENTITY_CACHE_SIZE']:
+                self._entries.popitem(last=False)
+        return entry.user
+
+    def load(self, user_id):
+        """Return the active user for user_id bound to the current session, or None"""
+        user = self.get(user_id)
+        if user is None or not user.is_active:
+            return None
+        return db.session.merge(user, load=False)
+
+    def discard(self, user_id):
+        """Drop one user's entry"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        """Drop every entry held by this process"""
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = UserIdentityCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_identity_versions(session, flush_context):
+    """Bump identity_version for the users whose rows or preferences a flush wrote
+
+    The UPDATE runs inside the flush's transaction, so the bump commits
+    or rolls back with the change itself and every process sees both.
+    """
+    changed = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, User):
+            changed.add(obj.id)
+        elif isinstance(obj, UserPreferences):
+            changed.add(obj.user_id)
+    changed.discard(None)
+    if not changed:
+        return
+
+    users = User.__table__
+    session.connection().execute(
+        update(users).where(users.c.id.in_(changed)).values(
+            identity_version=users.c.identity_version + 1,
+            # Keep the row's own timestamp; only its identity changed
+            updated_at=users.c.updated_at
+        )
+    )
@@ -0,0 +1,285 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+from ..models.data_job import DataJob, DataJobLock
+
+UNFINISHED_STATUSES = (DataJob.STATUS_QUEUED, DataJob.STATUS_RUNNING)
+ABANDONED_NOTE = 'Abandoned: its worker process stopped'
+
+# Held shared by every job working on some master data categories, and
+# exclusively by a job working on the whole table
+MASTER_DATA_TABLE_LOCK = 'master_data'
+
+# Key of the PostgreSQL advisory lock that makes lock claims run one at a time
+CLAIM_ADVISORY_KEY = 0x6A0B10C5
+
+
+class JobQueueFull(Exception):
+    """Raised when no more background jobs can be queued"""
+
+
+def category_lock_name(category):
+    """Return the lock name guarding one master data category"""
+    name = f'category:{category}'
+    if len(name) > DataJobLock.name.type.length:
+        # Over-long categories are rejected row by row later; their lock must still fit
+        name = f"category#{hashlib.md5(category.encode('utf-8')).hexdigest()}"
+    return name
+
+
+def worker_is_gone(worker_id, own_worker_id):
+    """Return True if the process named by worker_id is known to have stopped
+
+    Only processes on this host can be checked; elsewhere the heartbeat
+    is the only evidence.
+    """
+    host, pid, _ = worker_id.rsplit(':', 2)
+    if host != socket.gethostname():
+        return False
+    if int(pid) == os.getpid():
+        # Our pid, but a previous process's token: it was reused
+        return worker_id != own_worker_id
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+class JobRunner:
+    """Bounded executor for long-running background data jobs
+
+    Jobs run on a fixed-size thread pool, each inside its own application
+    context. A semaphore caps how many jobs may be queued or running at
+    once in this process. Jobs that touch the same category take named
+    locks stored in data_job_locks, so they run one after another even
+    when queued on different worker processes; a job on the whole table
+    waits for, and holds off, every category job.
+
+    Every job records the worker that owns it, which marks its queued and
+    running jobs alive every JOB_HEARTBEAT_SECONDS. Jobs whose worker has
+    stopped, shown by a stale heartbeat or a dead pid on this host, are
+    failed and their locks released at startup and whenever a job waits
+    for a lock.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._executor = None
+        self._slots = None
+        self._owned = set()
+        self._owned_guard = threading.Lock()
+        self._heartbeat = None
+        self._identity = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Create the worker pool from the application config and fail abandoned jobs"""
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config['JOB_WORKERS'],
+            thread_name_prefix='data-job'
+        )
+        self._slots = threading.BoundedSemaphore(app.config['JOB_QUEUE_LIMIT'])
+        app.extensions['job_runner'] = self
+
+        with app.app_context():
+            try:
+                self.reap_orphaned_jobs()
+            except SQLAlchemyError:
+                # The tables are not there, or not migrated, yet
+                db.session.rollback()
+
+    @property
+    def worker_id(self):
+        """Identify this process as host:pid:token, renewed after a fork"""
+        pid = os.getpid()
+        if self._identity is None or self._identity[0] != pid:
+            self._identity = (pid, f'{socket.gethostname()}:{pid}:{uuid.uuid4().hex[:8]}')
+        return self._identity[1]
+
+    def submit(self, job, fn, *args, **kwargs):
+        """Queue fn to run in the background on behalf of job, or raise JobQueueFull"""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull('Too many background jobs are queued. Please try again later.')
+
+        try:
+            job_id = self.own(job)
+        except Exception:
+            self._slots.release()
+            raise
+
+        app = self.app
+
+        def task():
+            try:
+                with app.app_context():
+                    fn(*args, **kwargs)
+            except Exception:
+                app.logger.exception('Background job failed')
+            finally:
+                self.disown(job_id)
+                self._slots.release()
+
+        return self._executor.submit(task)
+
+    def own(self, job):
+        """Record this process as the worker of a job and keep it marked alive; returns its id"""
+        job.worker_id = self.worker_id
+        job.heartbeat_at = datetime.utcnow()
+        db.session.commit()
+        with self._owned_guard:
+            self._owned.add(job.id)
+        self.start_heartbeat()
+        return job.id
+
+    def disown(self, job_id):
+        """Stop marking a job alive"""
+        with self._owned_guard:
+            self._owned.discard(job_id)
+
+    @contextmanager
+    def running_here(self, job):
+        """Own a job this process runs itself, outside the pool, such as a command line import"""
+        job_id = self.own(job)
+        try:
+            yield
+        finally:
+            self.disown(job_id)
+
+    def start_heartbeat(self):
+        """Start the thread marking this process's jobs alive, if it is not running"""
+        with self._owned_guard:
+            if self._heartbeat is not None and self._heartbeat.is_alive():
+                return
+            self._heartbeat = threading.Thread(target=self.beat, name='data-job-heartbeat', daemon=True)
+            self._heartbeat.start()
+
+    def beat(self):
+        """Refresh heartbeat_at on the jobs this process owns, forever"""
+        while True:
+            time.sleep(self.app.config['JOB_HEARTBEAT_SECONDS'])
+            with self._owned_guard:
+                owned = list(self._owned)
+            if not owned:
+                continue
+            with self.app.app_context():
+                try:
+                    db.session.execute(update(DataJob).where(DataJob.id.in_(owned)).values(
+                        heartbeat_at=datetime.utcnow()))
+                    db.session.commit()
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    self.app.logger.exception('Could not record background job heartbeat')
+
+    def reap_orphaned_jobs(self):
+        """Fail unfinished jobs whose worker has stopped and release their locks
+
+        Returns the number of jobs failed.
+        """
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])
+        unfinished = db.session.execute(select(DataJob.worker_id).where(
+            DataJob.status.in_(UNFINISHED_STATUSES), DataJob.worker_id.isnot(None)).distinct()).scalars().all()
+        gone = [worker_id for worker_id in unfinished if worker_is_gone(worker_id, self.worker_id)]
+
+        # Re-checked in the UPDATE, so a job that finished or beat meanwhile is left alone
+        orphans = db.session.execute(
+            update(DataJob).where(
+                DataJob.status.in_(UNFINISHED_STATUSES),
+                DataJob.worker_id.isnot(None),
+                or_(DataJob.heartbeat_at < stale_before, DataJob.worker_id.in_(gone))
+            ).values(
+                status=DataJob.STATUS_FAILED,
+                note=ABANDONED_NOTE,
+                finished_at=now,
+                error_count=1,
+                error_messages=json.dumps([ABANDONED_NOTE])
+            ).returning(DataJob.id)
+        ).scalars().all()
+        if orphans:
+            db.session.execute(delete(DataJobLock).where(DataJobLock.job_id.in_(orphans)))
+            current_app.logger.warning(f'Failed abandoned background jobs: {orphans}')
+        db.session.commit()
+        return len(orphans)
+
+    def try_claim(self, job_id, exclusive=(), shared=()):
+        """Take every named lock for a job in one transaction, or none of them
+
+        Claims run one at a time across processes: on PostgreSQL behind a
+        transaction-level advisory lock, on SQLite because the first
+        statement is a write and takes the database write lock. A shared
+        lock only conflicts with an exclusive one on the same name.
+        """
+        wanted = dict.fromkeys(shared, False)
+        wanted.update(dict.fromkeys(exclusive, True))
+        if db.session.get_bind().dialect.name == 'postgresql':
+            db.session.execute(select(func.pg_advisory_xact_lock(CLAIM_ADVISORY_KEY)))
+        db.session.execute(delete(DataJobLock).where(DataJobLock.job_id == job_id))
+
+        held = db.session.execute(select(DataJobLock.name, DataJobLock.exclusive).where(
+            DataJobLock.name.in_(list(wanted)))).all()
+        if any(held_exclusive or wanted[name] for name, held_exclusive in held):
+            db.session.rollback()
+            return False
+
+        now = datetime.utcnow()
+        if wanted:
+            db.session.execute(insert(DataJobLock), [
+                {'job_id': job_id, 'name': name, 'exclusive': is_exclusive, 'acquired_at': now}
+                for name, is_exclusive in wanted.items()
+            ])
+        db.session.commit()
+        return True
+
+    def release(self, job_id):
+        """Drop every lock a job holds"""
+        db.session.execute(delete(DataJobLock).where(DataJobLock.job_id == job_id))
+        db.session.commit()
+
+    @contextmanager
+    def locks(self, job_id, exclusive=(), shared=()):
+        """Hold named locks for a job, waiting while another job holds a conflicting one"""
+        while not self.try_claim(job_id, exclusive, shared):
+            self.reap_orphaned_jobs()
+            time.sleep(current_app.config['JOB_LOCK_POLL_SECONDS'])
+        try:
+            yield
+        except BaseException:
+            # Release on a clean session; the caller records the failure itself
+            db.session.rollback()
+            raise
+        finally:
+            self.release(job_id)
+
+    def category_locks(self, job_id, categories):
+        """Hold the locks of every given master data category, and the table lock shared, for a job"""
+        return self.locks(job_id, exclusive=[category_lock_name(category) for category in categories],
+                          shared=[MASTER_DATA_TABLE_LOCK])
+
+    def table_lock(self, job_id):
+        """Hold the master data table lock exclusively, which shuts out every category job
+
+        Unlike locking the categories that exist, this also covers jobs
+        creating categories while the whole table is being emptied.
+        """
+        return self.locks(job_id, exclusive=[MASTER_DATA_TABLE_LOCK])
+
+
+job_runner = JobRunner()
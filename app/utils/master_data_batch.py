@@ -0,0 +1,172 @@
+from datetime import datetime
+
+from sqlalchemy import bindparam, case, select, update
+
+from ..extensions import db
+from ..models.master_data import MasterData
+from .master_data_cache import bump_master_data_versions
+
+MAX_BATCH_ITEMS = 1000  # Rows one batch request may change
+STATEMENT_BATCH_SIZE = 500  # Rows per UPDATE statement
+
+ACTION_REORDER = 'reorder'
+ACTION_MOVE = 'move'
+ACTION_ACTIVATE = 'activate'
+ACTION_DEACTIVATE = 'deactivate'
+BATCH_ACTIONS = (ACTION_REORDER, ACTION_MOVE, ACTION_ACTIVATE, ACTION_DEACTIVATE)
+
+
+class BatchRequestError(ValueError):
+    """Raised for a malformed batch update request"""
+
+
+def _integer(value, name):
+    """Return value as an int, rejecting booleans, floats and strings"""
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise BatchRequestError(f'{name} must be an integer')
+    return value
+
+
+def _check_size(items):
+    """Reject anything but a non-empty list of at most MAX_BATCH_ITEMS items"""
+    if not isinstance(items, list) or not items:
+        raise BatchRequestError('Expected a non-empty list')
+    if len(items) > MAX_BATCH_ITEMS:
+        raise BatchRequestError(f'At most {MAX_BATCH_ITEMS} rows per batch')
+
+
+def parse_sort_orders(items):
+    """Validate a list of [id, sort_order] pairs into an id -> sort_order map"""
+    _check_size(items)
+    sort_orders = {}
+    for item in items:
+        if isinstance(item, dict):
+            item = [item.get('id'), item.get('sort_order')]
+        if not isinstance(item, (list, tuple)) or len(item) != 2:
+            raise BatchRequestError('Each item must be an [id, sort_order] pair')
+        sort_orders[_integer(item[0], 'id')] = _integer(item[1], 'sort_order')
+    return sort_orders
+
+
+def parse_ids(items):
+    """Validate a list of ids into a sorted list without duplicates"""
+    _check_size(items)
+    return sorted({_integer(item, 'id') for item in items})
+
+
+def parse_move(payload):
+    """Validate a move request into (id, previous_id, next_id)
+
+    previous_id and next_id are the rows the moved row now sits between;
+    either may be null at the start or end of the category, not both.
+    """
+    data_id = _integer(payload.get('id'), 'id')
+    neighbours = []
+    for name in ('previous_id', 'next_id'):
+        value = payload.get(name)
+        neighbours.append(None if value is None else _integer(value, name))
+    if neighbours == [None, None]:
+        raise BatchRequestError('previous_id or next_id is required')
+    if data_id in neighbours:
+        raise BatchRequestError('A row cannot be moved next to itself')
+    return data_id, *neighbours
+
+
+def _chunks(values):
+    """Split values into lists of at most STATEMENT_BATCH_SIZE"""
+    values = list(values)
+    for start in range(0, len(values), STATEMENT_BATCH_SIZE):
+        yield values[start:start + STATEMENT_BATCH_SIZE]
+
+
+def reorder_master_data(sort_orders):
+    """Set the sort_order of many rows with one UPDATE ... CASE per batch
+
+    Rows already in place are left alone, so their updated_at does not
+    move and sync clients are not sent them again. Returns the number of
+    rows changed; the caller commits.
+    """
+    now = datetime.utcnow()
+    categories = set()
+    updated = 0
+    for ids in _chunks(sorted(sort_orders)):
+        new_order = case({data_id: sort_orders[data_id] for data_id in ids}, value=MasterData.id)
+        stmt = update(MasterData).where(
+            MasterData.id.in_(ids),
+            MasterData.sort_order.is_distinct_from(new_order)
+        ).values(sort_order=new_order, updated_at=now).returning(MasterData.category)
+        changed = db.session.execute(stmt.execution_options(synchronize_session=False)).scalars().all()
+        categories.update(changed)
+        updated += len(changed)
+    bump_master_data_versions(categories)
+    return updated
+
+
+def move_master_data(data_id, previous_id=None, next_id=None):
+    """Move one row between two neighbours and renumber its whole category
+
+    The new order is worked out over every row of the category, ordered
+    as the admin list shows it, so moves are correct however many pages
+    the category spans. The category's existing sort orders are reused
+    as slots, kept strictly increasing, and only rows whose slot changed
+    are written. Returns the number of rows changed; the caller commits.
+    """
+    category = db.session.execute(select(MasterData.category).where(MasterData.id == data_id)).scalar()
+    if category is None:
+        raise BatchRequestError(f'Master data {data_id} does not exist')
+
+    rows = db.session.execute(
+        select(MasterData.id, MasterData.sort_order)
+        .where(MasterData.category == category)
+        .order_by(MasterData.sort_order, MasterData.id)
+    ).all()
+    order = [row.id for row in rows if row.id != data_id]
+    if previous_id is not None:
+        if previous_id not in order:
+            raise BatchRequestError(f'Master data {previous_id} is not in category {category}')
+        order.insert(order.index(previous_id) + 1, data_id)
+    else:
+        if next_id not in order:
+            raise BatchRequestError(f'Master data {next_id} is not in category {category}')
+        order.insert(order.index(next_id), data_id)
+
+    slots = sorted(row.sort_order for row in rows)
+    for index in range(1, len(slots)):
+        slots[index] = max(slots[index], slots[index - 1] + 1)
+    return reorder_master_data(dict(zip(order, slots)))
+
+
+def set_master_data_active(ids, is_active):
+    """Activate or deactivate many rows with one UPDATE per batch
+
+    content_hash covers is_active, so the hashes of the changed rows are
+    rewritten from the values the UPDATE returns. Returns the number of
+    rows changed; the caller commits.
+    """
+    now = datetime.utcnow()
+    table = MasterData.__table__
+    rehash = update(table).where(table.c.id == bindparam('row_id')).values(
+        content_hash=bindparam('row_hash'), updated_at=now)
+    changes = {}
+    updated = 0
+    for chunk in _chunks(ids):
+        stmt = update(MasterData).where(
+            MasterData.id.in_(chunk),
+            MasterData.is_active.is_distinct_from(is_active)
+        ).values(is_active=is_active, updated_at=now).returning(
+            MasterData.id, MasterData.category, *[getattr(MasterData, field) for field in MasterData.CONTENT_FIELDS]
+        )
+        rows = db.session.execute(stmt.execution_options(synchronize_session=False)).all()
+        if not rows:
+            continue
+        db.session.execute(rehash, [
+            {'row_id': row.id,
+             'row_hash': MasterData.compute_content_hash({field: getattr(row, field) for field in MasterData.CONTENT_FIELDS})}
+            for row in rows
+        ])
+        for row in rows:
+            total, active = changes.get(row.category, (0, 0))
+            changes[row.category] = (total, active + (1 if is_active else -1))
+        updated += len(rows)
+    bump_master_data_versions(changes)
+    return updated
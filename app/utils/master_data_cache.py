@@ -0,0 +1,119 @@
+import threading
+from collections import namedtuple
+
+from flask import g
+
+from ..extensions import db
+from ..models.master_data import MasterData
+from ..models.master_data_version import MasterDataVersion
+
+MasterDataEntry = namedtuple('MasterDataEntry', ['id', 'code', 'name', 'description', 'icon', 'tags', 'sort_order'])
+
+# A category's entries in sort order, plus a code -> entry index
+CategorySnapshot = namedtuple('CategorySnapshot', ['version', 'entries', 'by_code'])
+
+CategorySummary = namedtuple('CategorySummary', ['category', 'version', 'row_count', 'active_count'])
+
+
+def bump_master_data_versions(changes):
+    """Invalidate cached categories; call inside the transaction that changes them
+
+    changes is an iterable of categories, or a mapping of category ->
+    (row count delta, active count delta) for writes with known effects.
+    """
+    MasterDataVersion.bump(changes)
+    g.pop('master_data_summaries', None)
+
+
+def refresh_master_data_counts(categories):
+    """Recount categories whose count deltas are not known, such as after a bulk write"""
+    MasterDataVersion.refresh_counts(categories)
+    g.pop('master_data_summaries', None)
+
+
+def count_delta(changes, category, rows, is_active):
+    """Add a row count change for one row to a category -> (rows, active) mapping"""
+    total, active = changes.get(category, (0, 0))
+    changes[category] = (total + rows, active + (rows if is_active else 0))
+    return changes
+
+
+class MasterDataCache:
+    """Process-local cache of active master data, one snapshot per category
+
+    Each snapshot remembers the category version it was built from. The
+    version table is read at most once per application context, and a
+    category is reloaded only when its version has moved on, so every
+    worker process sees changes made by any other without a TTL. The same
+    read provides per-category row and active counts.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def summaries(self):
+        """Return category -> CategorySummary, read once per application context"""
+        if 'master_data_summaries' not in g:
+            g.master_data_summaries = {
+                row[0]: CategorySummary(*row) for row in MasterDataVersion.load_summaries()
+            }
+        return g.master_data_summaries
+
+    def current_versions(self):
+        """Return the category -> version map"""
+        return {category: summary.version for category, summary in self.summaries().items()}
+
+    def categories(self):
+        """Return the summaries of categories that have rows, by name"""
+        return [summary for category, summary in sorted(self.summaries().items()) if summary.row_count]
+
+    def load(self, category, version):
+        """Build a snapshot of the active entries of a category
+
+        Versions are read before the rows, so a snapshot is never older
+        than the version it is stored under.
+        """
+        rows = db.session.query(
+            MasterData.id, MasterData.code, MasterData.name, MasterData.description,
+            MasterData.icon, MasterData.tags, MasterData.sort_order
+        ).filter(
+            MasterData.category == category,
+            MasterData.is_active
+        ).order_by(MasterData.sort_order, MasterData.code).all()
+        entries = tuple(MasterDataEntry(*row) for row in rows)
+        return CategorySnapshot(version, entries, {entry.code: entry for entry in entries})
+
+    def snapshot(self, category):
+        """Return an up-to-date snapshot of a category"""
+        summary = self.summaries().get(category)
+        version = summary.version if summary else 0
+        snapshot = self._snapshots.get(category)
+        if snapshot is None or snapshot.version != version:
+            snapshot = self.load(category, version)
+            with self._lock:
+                self._snapshots[category] = snapshot
+        return snapshot
+
+    def entries(self, category):
+        """Return the active entries of a category in sort order"""
+        return self.snapshot(category).entries
+
+    def get(self, category, code):
+        """Return the active entry for (category, code), or None"""
+        return self.snapshot(category).by_code.get(code)
+
+    def choices(self, category, blank=None):
+        """Return (code, name) pairs for a SelectField, optionally led by a blank choice"""
+        choices = [(entry.code, entry.name) for entry in self.entries(category)]
+        if blank is not None:
+            choices.insert(0, ('', blank))
+        return choices
+
+    def clear(self):
+        """Drop every snapshot held by this process"""
+        with self._lock:
+            self._snapshots.clear()
+
+
+master_data_cache = MasterDataCache()
@@ -0,0 +1,229 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import delete, func, select, text
+
+from ..extensions import db
+from ..models.data_job import DataJob
+from ..models.master_data import MasterData
+from ..models.master_data_tombstone import MasterDataTombstone
+from ..models.tag import master_data_tags
+from .jobs import JobQueueFull, job_runner
+from .logging import log_operation
+from .master_data_cache import bump_master_data_versions, refresh_master_data_counts
+
+DELETE_JOB_KIND = 'master_data_delete'
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_BATCH_PAUSE = 0.05  # Seconds between batches, to let other writers in
+
+MODE_CHUNKED = 'chunked'
+MODE_TRUNCATE = 'truncate'
+DELETE_MODES = (MODE_CHUNKED, MODE_TRUNCATE)
+
+
+class MasterDataDeleter:
+    """Bulk deletion of master data without one long-running transaction
+
+    Chunked mode walks the primary key and deletes one id range per
+    transaction, pausing between batches so the write lock is released
+    regularly, and tombstones each deleted row for sync clients. Truncate
+    mode empties the whole table with TRUNCATE on PostgreSQL, or DELETE
+    followed by VACUUM on SQLite to give the freed pages back, leaving a
+    single wipe tombstone; it cannot be limited to a category.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_BATCH_PAUSE, logger=None, progress=None):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.logger = logger
+        self.progress = progress
+        self.deleted = 0
+        self.categories = set()
+
+    def count(self, category=None):
+        """Count the rows a deletion would remove"""
+        query = select(func.count(MasterData.id))
+        if category:
+            query = query.where(MasterData.category == category)
+        return db.session.execute(query).scalar()
+
+    def load_categories(self, category=None):
+        """Collect the categories a deletion touches, for version bumps"""
+        if category:
+            self.categories = {category}
+        else:
+            self.categories = {row[0] for row in db.session.query(MasterData.category).distinct()}
+        return self.categories
+
+    def next_upper_bound(self, lower, category=None):
+        """Return the id closing the next batch above lower, or None for the last one"""
+        query = select(MasterData.id).where(MasterData.id > lower)
+        if category:
+            query = query.where(MasterData.category == category)
+        query = query.order_by(MasterData.id).offset(self.batch_size - 1).limit(1)
+        return db.session.execute(query).scalar()
+
+    def batch_deltas(self, conditions):
+        """Return category -> (row delta, active delta) for the rows a batch will delete"""
+        query = select(
+            MasterData.category,
+            func.count(MasterData.id),
+            func.count(MasterData.id).filter(MasterData.is_active.is_(True))
+        ).where(*conditions).group_by(MasterData.category)
+        return {category: (-rows, -active) for category, rows, active in db.session.execute(query)}
+
+    def delete_chunked(self, category=None):
+        """Delete rows one primary-key range per transaction"""
+        lower = 0
+        while True:
+            upper = self.next_upper_bound(lower, category)
+            conditions = [MasterData.id > lower]
+            if upper is not None:
+                conditions.append(MasterData.id <= upper)
+            if category:
+                conditions.append(MasterData.category == category)
+
+            changes = self.batch_deltas(conditions)
+            MasterDataTombstone.record_rows(db.session.connection(), conditions)
+            db.session.execute(delete(master_data_tags).where(
+                master_data_tags.c.master_data_id.in_(select(MasterData.id).where(*conditions))))
+            stmt = delete(MasterData).where(*conditions).execution_options(synchronize_session=False)
+            self.deleted += db.session.execute(stmt).rowcount
+            bump_master_data_versions(changes)
+            db.session.commit()
+            if self.progress:
+                self.progress(self.deleted)
+
+            if upper is None:
+                return self.deleted
+            lower = upper
+            if self.pause:
+                time.sleep(self.pause)
+
+    def truncate(self):
+        """Empty the whole table in one statement and reclaim its space"""
+        dialect_name = db.engine.dialect.name
+        if dialect_name == 'postgresql':
+            count = self.count()
+            db.session.execute(text(f'TRUNCATE TABLE {master_data_tags.name}, {MasterData.__tablename__}'))
+            MasterDataTombstone.record_wipe(db.session.connection())
+            bump_master_data_versions(self.categories)
+            refresh_master_data_counts(self.categories)
+            db.session.commit()
+        else:
+            db.session.execute(delete(master_data_tags))
+            count = db.session.execute(delete(MasterData)).rowcount
+            MasterDataTombstone.record_wipe(db.session.connection())
+            bump_master_data_versions(self.categories)
+            refresh_master_data_counts(self.categories)
+            db.session.commit()
+            if dialect_name == 'sqlite':
+                # VACUUM cannot run inside a transaction
+                with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                    connection.execute(text('VACUUM'))
+
+        self.deleted += count
+        if self.progress:
+            self.progress(self.deleted)
+        return self.deleted
+
+    def run(self, mode=MODE_CHUNKED, category=None):
+        """Delete the whole table or one category and return the row count"""
+        started = time.perf_counter()
+        self.load_categories(category)
+        if mode == MODE_TRUNCATE and not category:
+            self.truncate()
+        else:
+            self.delete_chunked(category)
+
+        if self.logger:
+            self.logger.info(
+                f"Master data delete ({mode}, category {category or 'all'}): "
+                f"{self.deleted} rows in {time.perf_counter() - started:.2f}s"
+            )
+        return self.deleted
+
+
+def queue_master_data_delete(user_id, mode=MODE_CHUNKED, category=None):
+    """Queue a bulk master data deletion as a background job"""
+    if category:
+        # Truncating cannot be limited to a category
+        mode = MODE_CHUNKED
+    job = DataJob(kind=DELETE_JOB_KIND, created_by_id=user_id, mode=mode)
+    job.categories = category or None
+    db.session.add(job)
+    db.session.commit()
+
+    try:
+        job_runner.submit(job, run_master_data_delete_job, job.id)
+    except JobQueueFull:
+        db.session.delete(job)
+        db.session.commit()
+        raise
+    return job
+
+
+def run_master_data_delete_job(job_id):
+    """Run a queued deletion job, recording progress on its DataJob row"""
+    job = db.session.get(DataJob, job_id)
+    category = job.categories
+    try:
+        deleter = MasterDataDeleter(
+            batch_size=current_app.config['DELETE_BATCH_SIZE'],
+            pause=current_app.config['DELETE_BATCH_PAUSE'],
+            logger=current_app.logger
+        )
+
+        # Wait for any import touching the same category, or any job at all for the whole table
+        locks = job_runner.category_locks(job_id, [category]) if category else job_runner.table_lock(job_id)
+        with locks:
+            job.total_rows = deleter.count(category)
+            job.status = DataJob.STATUS_RUNNING
+            job.started_at = datetime.utcnow()
+            retention = timedelta(days=current_app.config['SYNC_TOMBSTONE_RETENTION_DAYS'])
+            MasterDataTombstone.prune(db.session.connection(), datetime.utcnow() - retention)
+            db.session.commit()
+            started = time.perf_counter()
+
+            def record_progress(deleted):
+                job.processed_rows = deleted
+                elapsed = time.perf_counter() - started
+                job.rows_per_second = round(deleted / elapsed, 1) if elapsed > 0 else None
+                db.session.commit()
+
+            deleter.progress = record_progress
+            deleted = deleter.run(job.mode, category)
+
+            job.status = DataJob.STATUS_COMPLETED
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+
+        log_operation(
+            current_app.logger,
+            'Master Data Bulk Deletion',
+            'success',
+            {
+                'job_id': job_id,
+                'user_id': job.created_by_id,
+                'mode': job.mode,
+                'category': category,
+                'deleted_count': deleted
+            }
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        job.status = DataJob.STATUS_FAILED
+        job.finished_at = datetime.utcnow()
+        job.error_count = 1
+        job.error_messages = json.dumps([str(e)])
+        db.session.commit()
+        log_operation(
+            current_app.logger,
+            'Master Data Bulk Deletion',
+            'error',
+            {'job_id': job_id, 'error': str(e)}
+        )
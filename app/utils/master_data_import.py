@@ -0,0 +1,580 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import desc, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from werkzeug.utils import secure_filename
+
+from ..extensions import db
+from ..models.data_job import DataJob
+from ..models.master_data import MasterData
+from ..models.tag import Tag
+from ..models.user import User
+from .jobs import JobQueueFull, job_runner
+from .logging import log_operation
+from .master_data_cache import bump_master_data_versions, count_delta, refresh_master_data_counts
+
+IMPORT_JOB_KIND = 'master_data_import'
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_ERROR_MESSAGES = 20
+
+LOCK_RETRIES = 6  # Times a batch is retried while another transaction holds a lock it needs
+LOCK_RETRY_PAUSE = 0.1  # Seconds before the first retry, doubled for each one after
+# SQLSTATEs PostgreSQL reports for deadlocks, lock timeouts and serialization failures
+LOCK_SQLSTATES = ('40001', '40P01', '55P03')
+
+MODE_SKIP = 'skip'
+MODE_UPSERT = 'upsert'
+IMPORT_MODES = (MODE_SKIP, MODE_UPSERT)
+
+# Columns an import may change on an existing (category, code) row
+UPDATABLE_COLUMNS = list(MasterData.CONTENT_FIELDS)
+
+
+def iter_csv_rows(binary_stream, encoding='utf-8-sig'):
+    """Lazily decode and parse a binary CSV stream into dict rows
+
+    The stream is wrapped rather than read, so an uploaded file is decoded
+    a buffer at a time straight from its spooled temporary file.
+    """
+    text_stream = io.TextIOWrapper(binary_stream, encoding=encoding, newline='')
+    try:
+        yield from csv.DictReader(text_stream)
+    finally:
+        # Leave the underlying stream open for its owner to close
+        text_stream.detach()
+
+
+def load_existing_hashes():
+    """Load the (category, code) -> content_hash map in a single query"""
+    return {(category, code): content_hash for category, code, content_hash in
+            db.session.query(MasterData.category, MasterData.code, MasterData.content_hash)}
+
+
+def load_user_ids_by_email():
+    """Load the email -> user id map in a single query"""
+    return {email: user_id for email, user_id in db.session.query(User.email, User.id)}
+
+
+def build_upsert_statement(dialect_name):
+    """Build INSERT ... ON CONFLICT (category, code) DO UPDATE for a dialect
+
+    The conflict target is uq_master_data_category_code. Only rows whose
+    content hash differs are updated, so unchanged rows are neither
+    rewritten nor returned; created_at and created_by_id are never touched.
+    """
+    table = MasterData.__table__
+    if dialect_name == 'postgresql':
+        stmt = postgresql.insert(table)
+        conflict_target = {'constraint': 'uq_master_data_category_code'}
+    elif dialect_name == 'sqlite':
+        stmt = sqlite.insert(table)
+        conflict_target = {'index_elements': ['category', 'code']}
+    else:
+        raise ValueError(f'Upsert import is not supported on {dialect_name}')
+
+    excluded = stmt.excluded
+    values = {column: excluded[column] for column in UPDATABLE_COLUMNS}
+    values['content_hash'] = excluded.content_hash
+    values['updated_at'] = excluded.updated_at
+    changed = table.c.content_hash.is_distinct_from(excluded.content_hash)
+    return stmt.on_conflict_do_update(set_=values, where=changed, **conflict_target).returning(table.c.id)
+
+
+def is_lock_error(error):
+    """Return True if a database error means another transaction held a lock, not that the data was bad"""
+    if not isinstance(error, OperationalError):
+        return False
+    orig = getattr(error, 'orig', None)
+    if getattr(orig, 'pgcode', None) in LOCK_SQLSTATES:
+        return True
+    # SQLite: a transaction that has already read cannot wait for the write lock
+    return 'locked' in str(orig)
+
+
+def retry_on_lock(write):
+    """Call write, rolling back and calling it again with backoff while it fails on a lock
+
+    Rolling back the whole transaction, not just a savepoint, drops the
+    read lock SQLite holds, which the other writer may be waiting on.
+    Returns what write returns.
+    """
+    for attempt in range(LOCK_RETRIES + 1):
+        try:
+            return write()
+        except OperationalError as e:
+            db.session.rollback()
+            if not is_lock_error(e) or attempt == LOCK_RETRIES:
+                raise
+            time.sleep(LOCK_RETRY_PAUSE * 2 ** attempt)
+
+
+def parse_created_on(value):
+    """Parse an ISO 8601 timestamp, falling back to the current time"""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+def normalize_key(value):
+    """Return a category or code as it is stored and locked: without surrounding whitespace
+
+    MasterDataCsvValidator strips the same columns, so every import path
+    and the preview agree on a row's key.
+    """
+    return value.strip() if value else value
+
+
+def parse_csv_row(row):
+    """Map a raw CSV row to a record of typed MasterData values"""
+    return {
+        'category': normalize_key(row['category']),
+        'code': normalize_key(row['code']),
+        'name': row['description'],  # Using description as name
+        'description': row['description'],
+        'icon': row['icon'],
+        'tags': row['tags'],
+        'is_active': row['is_active'].upper() == 'TRUE',
+        'created_at': parse_created_on(row.get('created_on')),
+        'created_by': row.get('created_by')
+    }
+
+
+class ImportResult:
+    """Counters collected while importing master data"""
+
+    def __init__(self):
+        self.total = 0
+        self.added = 0
+        self.updated = 0
+        self.skipped = 0
+        self.errors = 0
+        self.error_messages = []
+        self.elapsed = 0.0
+
+    def merge(self, other):
+        """Add the row counters and error messages of another result to this one"""
+        self.total += other.total
+        self.added += other.added
+        self.updated += other.updated
+        self.skipped += other.skipped
+        for message in other.error_messages[:MAX_ERROR_MESSAGES - len(self.error_messages)]:
+            self.error_messages.append(message)
+        self.errors += other.errors
+
+    def add_error(self, message):
+        """Count an error, keeping the first few messages for reporting"""
+        self.errors += 1
+        if len(self.error_messages) < MAX_ERROR_MESSAGES:
+            self.error_messages.append(message)
+
+    @property
+    def rows_per_second(self):
+        """Throughput over every row read from the source"""
+        if not self.elapsed:
+            return float(self.total)
+        return self.total / self.elapsed
+
+    def to_dict(self):
+        """Convert result to dictionary"""
+        return {
+            'total': self.total,
+            'added': self.added,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'error_messages': self.error_messages,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1)
+        }
+
+
+class MasterDataImporter:
+    """Set-based master data importer
+
+    Existing (category, code) keys with their content hashes and the
+    created_by email map are loaded once up front, so rows are classified
+    in memory and written with chunked bulk INSERTs instead of per-row
+    queries and ORM adds. Rows are consumed lazily and each batch is
+    committed on its own, so memory and transaction size stay bounded by
+    the batch size, not the file.
+
+    In skip mode existing keys are left alone; in upsert mode rows whose
+    content hash matches the stored one are skipped in memory and the rest
+    are written with a native INSERT ... ON CONFLICT DO UPDATE.
+    """
+
+    def __init__(self, default_user_id, batch_size=DEFAULT_BATCH_SIZE, logger=None, progress=None,
+                 mode=MODE_SKIP):
+        if mode not in IMPORT_MODES:
+            raise ValueError(f'Unknown import mode: {mode}')
+        self.default_user_id = default_user_id
+        self.batch_size = batch_size
+        self.logger = logger
+        self.progress = progress
+        self.mode = mode
+        self.existing_hashes = None
+        self.user_ids = None
+        self.statement = None
+        self.recount_categories = set()
+
+    def preload(self):
+        """Load the lookup sets used to classify rows"""
+        self.existing_hashes = load_existing_hashes()
+        self.user_ids = load_user_ids_by_email()
+        if self.mode == MODE_UPSERT:
+            self.statement = build_upsert_statement(db.session.get_bind().dialect.name)
+        else:
+            self.statement = insert(MasterData.__table__)
+
+    def build_values(self, row):
+        """Map a CSV row to MasterData column values"""
+        return self.resolve_values(parse_csv_row(row))
+
+    def resolve_values(self, record):
+        """Map an already validated record to MasterData column values"""
+        values = dict(record)
+        values['created_by_id'] = self.user_ids.get(values.pop('created_by', None), self.default_user_id)
+        values['content_hash'] = MasterData.compute_content_hash(values)
+        return values
+
+    def execute(self, batch):
+        """Run the write statement for a batch and return the rows it changed
+
+        The tag index of the written rows is synced in the same savepoint.
+        """
+        if self.mode == MODE_UPSERT:
+            changed = len(db.session.execute(self.statement, batch).all())
+        else:
+            db.session.execute(self.statement, batch)
+            changed = len(batch)
+        Tag.sync_master_data_keys(db.session.connection(), [(values['category'], values['code']) for values in batch])
+        return changed
+
+    def record_written(self, written, changed, result, changes):
+        """Split written rows into added, updated and unchanged counts
+
+        Category count deltas for added rows are collected in changes;
+        categories with updates, which may flip is_active, are recounted
+        once the import has finished.
+        """
+        added = 0
+        for values in written:
+            key = (values['category'], values['code'])
+            if key in self.existing_hashes:
+                changes.setdefault(values['category'], (0, 0))
+            else:
+                added += 1
+                count_delta(changes, values['category'], 1, values['is_active'])
+        updated = changed - added
+        if updated:
+            self.recount_categories.update(
+                values['category'] for values in written
+                if (values['category'], values['code']) in self.existing_hashes
+            )
+        result.added += added
+        result.updated += updated
+        result.skipped += len(written) - added - updated
+
+    def write_batch(self, batch, result):
+        """Write a batch and commit it, retrying it whole while another writer holds a lock
+
+        Counters and the stored hashes are only updated once the batch has
+        committed, so a retried batch is not counted twice.
+        """
+        if not batch:
+            return
+        batch_result, written = retry_on_lock(lambda: self.try_write_batch(batch))
+        result.merge(batch_result)
+        self.existing_hashes.update(
+            ((values['category'], values['code']), values['content_hash']) for values in written
+        )
+
+    def try_write_batch(self, batch):
+        """Write a batch inside its own savepoint and commit it
+
+        If the bulk statement fails on the data, the savepoint is rolled
+        back and the batch is replayed row by row so a single bad row only
+        costs itself; lock errors are raised for the whole batch to be
+        retried. The versions and counts of the categories written are
+        updated in the same commit. Returns the batch's counters and the
+        rows written.
+        """
+        result = ImportResult()
+        written = []
+        changes = {}
+        try:
+            with db.session.begin_nested():
+                changed = self.execute(batch)
+            self.record_written(batch, changed, result, changes)
+            written = batch
+        except SQLAlchemyError as e:
+            if is_lock_error(e):
+                raise
+            for values in batch:
+                try:
+                    with db.session.begin_nested():
+                        changed = self.execute([values])
+                    self.record_written([values], changed, result, changes)
+                    written.append(values)
+                except SQLAlchemyError as e:
+                    if is_lock_error(e):
+                        raise
+                    message = f"Error writing {values['category']}:{values['code']}: {str(getattr(e, 'orig', None) or e)}"
+                    result.add_error(message)
+                    if self.logger:
+                        self.logger.error(message)
+        bump_master_data_versions(changes)
+        db.session.commit()
+        return result, written
+
+    def report_progress(self, result, started):
+        """Update elapsed time and notify the progress callback, if any"""
+        result.elapsed = time.perf_counter() - started
+        if self.progress:
+            self.progress(result)
+
+    def run(self, rows, validated=False):
+        """Import an iterable of rows, committing once per batch
+
+        Rows are raw CSV dict rows, or records produced by
+        MasterDataCsvValidator when validated is True.
+        """
+        result = ImportResult()
+        started = time.perf_counter()
+        if self.existing_hashes is None:
+            self.preload()
+        build_values = self.resolve_values if validated else self.build_values
+
+        seen_keys = set()
+        batch = []
+        for row in rows:
+            result.total += 1
+            try:
+                values = build_values(row)
+            except Exception as e:
+                message = f"Error processing row {result.total}: {str(e)}"
+                result.add_error(message)
+                if self.logger:
+                    self.logger.error(message)
+                continue
+
+            key = (values['category'], values['code'])
+            stored_hash = self.existing_hashes.get(key)
+            if key in seen_keys or (key in self.existing_hashes and (
+                    self.mode == MODE_SKIP or stored_hash == values['content_hash'])):
+                # Repeated within the file, or stored and not being changed
+                result.skipped += 1
+            else:
+                seen_keys.add(key)
+                batch.append(values)
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch, result)
+                    batch = []
+
+            if result.total % self.batch_size == 0:
+                self.report_progress(result, started)
+
+        self.write_batch(batch, result)
+        if self.recount_categories:
+            refresh_master_data_counts(self.recount_categories)
+            db.session.commit()
+        self.report_progress(result, started)
+
+        if self.logger:
+            self.logger.info(
+                f"Master data import ({self.mode}): {result.total} rows in {result.elapsed:.2f}s "
+                f"({result.rows_per_second:.0f} rows/s), added {result.added}, updated {result.updated}, "
+                f"skipped {result.skipped}, errors {result.errors}"
+            )
+        return result
+
+
+def scan_csv_file(path):
+    """Count the rows of a CSV file and collect the categories it touches"""
+    categories = set()
+    total = 0
+    with open(path, 'rb') as f:
+        for row in iter_csv_rows(f):
+            total += 1
+            category = normalize_key(row.get('category'))
+            if category:
+                categories.add(category)
+    return categories, total
+
+
+def queue_master_data_import(file_storage, user_id, mode=MODE_SKIP):
+    """Save an uploaded CSV and queue it as a background import job"""
+    upload_dir = os.path.join(current_app.instance_path, 'imports')
+    os.makedirs(upload_dir, exist_ok=True)
+    path = os.path.join(upload_dir, f'{uuid.uuid4().hex}.csv')
+    file_storage.save(path)
+
+    job = DataJob(
+        kind=IMPORT_JOB_KIND,
+        created_by_id=user_id,
+        filename=secure_filename(file_storage.filename or '') or 'import.csv',
+        mode=mode
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    try:
+        job_runner.submit(job, run_master_data_import_job, job.id, path)
+    except JobQueueFull:
+        db.session.delete(job)
+        db.session.commit()
+        os.remove(path)
+        raise
+    return job
+
+
+def file_fingerprint(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 of a file, read in fixed-size chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def master_data_stamp():
+    """Summarize the state of master_data as 'row count:max(updated_at)'"""
+    count, last_updated = db.session.query(func.count(MasterData.id), func.max(MasterData.updated_at)).one()
+    return f"{count}:{last_updated.isoformat() if last_updated else ''}"
+
+
+def find_identical_import(fingerprint, mode):
+    """Return an earlier import of this file if re-running it would change nothing
+
+    That holds when the latest completed import of the same file wrote
+    every one of its rows without an error, master_data has not been
+    written since it finished, and it applied at least as much as this
+    run would (an upsert covers a later skip run). Imports of other files
+    in between that changed nothing do not matter.
+    """
+    last = DataJob.query.filter_by(
+        kind=IMPORT_JOB_KIND, status=DataJob.STATUS_COMPLETED, file_fingerprint=fingerprint
+    ).order_by(desc(DataJob.finished_at)).first()
+    if last is None or last.master_data_stamp != master_data_stamp():
+        return None
+    if last.error_count or last.added_rows + last.updated_rows + last.skipped_rows != last.processed_rows:
+        # Rows it lost may be written this time
+        return None
+    if last.mode != MODE_UPSERT and mode == MODE_UPSERT:
+        return None
+    return last
+
+
+def start_import_job(job, fingerprint):
+    """Mark a job as running, or complete it at once if the file is unchanged
+
+    Returns False when an identical earlier import makes running it
+    pointless; every row of the file is then counted as skipped.
+    """
+    job.file_fingerprint = fingerprint
+    job.started_at = datetime.utcnow()
+    previous = find_identical_import(fingerprint, job.mode)
+    if previous is not None:
+        job.total_rows = previous.total_rows
+        job.processed_rows = previous.processed_rows
+        job.added_rows = job.updated_rows = job.error_count = 0
+        job.skipped_rows = previous.processed_rows
+        job.note = f'Identical to import job #{previous.id}; nothing to do'
+        job.master_data_stamp = previous.master_data_stamp
+        job.status = DataJob.STATUS_COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        return False
+
+    job.status = DataJob.STATUS_RUNNING
+    db.session.commit()
+    return True
+
+
+def finish_import_job(job, result):
+    """Record the final counters and the master_data stamp on a job"""
+    job.record_progress(result)
+    job.status = DataJob.STATUS_COMPLETED
+    job.finished_at = datetime.utcnow()
+    job.master_data_stamp = master_data_stamp()
+    db.session.commit()
+
+
+def run_master_data_import_job(job_id, path):
+    """Run a queued import job, recording progress on its DataJob row"""
+    job = db.session.get(DataJob, job_id)
+    try:
+        categories, total_rows = scan_csv_file(path)
+        job.categories = ','.join(sorted(categories))[:500]
+        job.total_rows = total_rows
+        db.session.commit()
+
+        # Wait for any other import touching the same categories
+        with job_runner.category_locks(job_id, categories):
+            if not start_import_job(job, file_fingerprint(path)):
+                log_operation(
+                    current_app.logger,
+                    'Master Data Import',
+                    'success',
+                    {'job_id': job_id, 'note': job.note}
+                )
+                return
+
+            def record_progress(result):
+                job.record_progress(result)
+                db.session.commit()
+
+            importer = MasterDataImporter(
+                job.created_by_id,
+                batch_size=current_app.config['IMPORT_BATCH_SIZE'],
+                logger=current_app.logger,
+                progress=record_progress,
+                mode=job.mode
+            )
+            with open(path, 'rb') as f:
+                result = importer.run(iter_csv_rows(f))
+            finish_import_job(job, result)
+
+        log_operation(
+            current_app.logger,
+            'Master Data Import',
+            'success',
+            {
+                'job_id': job_id,
+                'user_id': job.created_by_id,
+                'mode': job.mode,
+                'success_count': result.added,
+                'updated_count': result.updated,
+                'skipped_count': result.skipped,
+                'error_count': result.errors,
+                'rows_per_second': round(result.rows_per_second, 1)
+            }
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        job.status = DataJob.STATUS_FAILED
+        job.finished_at = datetime.utcnow()
+        job.error_messages = json.dumps(job.get_error_messages() + [str(e)])
+        db.session.commit()
+        log_operation(
+            current_app.logger,
+            'Master Data Import',
+            'error',
+            {'job_id': job_id, 'error': str(e)}
+        )
+
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,77 @@
+import re
+
+from sqlalchemy import text
+
+from ..extensions import db
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+MAX_TERMS = 8
+MIN_PREFIX_LENGTH = 3  # Shorter prefixes expand to too many index terms to rank quickly
+
+# Column weights for bm25() on SQLite, in FTS column order (name, description, tags)
+SQLITE_WEIGHTS = (10.0, 2.0, 5.0)
+
+RESULT_COLUMNS = 'm.id, m.category, m.code, m.name, m.description, m.icon, m.tags, m.sort_order, m.is_active'
+
+
+def search_terms(query_text):
+    """Split free text into lowercase word terms, ignoring any search syntax"""
+    return re.findall(r'\w+', (query_text or '').lower())[:MAX_TERMS]
+
+
+def build_sqlite_query(terms, category):
+    """Build an FTS5 MATCH query ranked by bm25 (lower is better)"""
+    sql = (
+        f"SELECT {RESULT_COLUMNS}, bm25(master_data_fts, {', '.join(map(str, SQLITE_WEIGHTS))}) AS rank "
+        "FROM master_data_fts JOIN master_data m ON m.id = master_data_fts.rowid "
+        "WHERE master_data_fts MATCH :match"
+    )
+    if category:
+        sql += " AND m.category = :category"
+    sql += " ORDER BY rank LIMIT :limit"
+    *words, last = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        last += '*'
+    return sql, ' '.join(words + [last])
+
+
+def build_postgresql_query(terms, category):
+    """Build a tsvector query ranked by ts_rank_cd (higher is better)"""
+    sql = (
+        f"SELECT {RESULT_COLUMNS}, ts_rank_cd(m.search_vector, query) AS rank "
+        "FROM master_data m, to_tsquery('simple', :match) query "
+        "WHERE m.search_vector @@ query"
+    )
+    if category:
+        sql += " AND m.category = :category"
+    sql += " ORDER BY rank DESC, m.id LIMIT :limit"
+    *words, last = terms
+    if len(last) >= MIN_PREFIX_LENGTH:
+        last += ':*'
+    return sql, ' & '.join(words + [last])
+
+
+def search_master_data(query_text, category=None, limit=DEFAULT_SEARCH_LIMIT):
+    """Return master data rows matching every word of query_text, best first
+
+    Words are matched against name, description and tags through the
+    full-text index, the last one as a prefix so results follow typing;
+    name matches rank above tags, and tags above description.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return []
+
+    dialect_name = db.session.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        sql, match = build_sqlite_query(terms, category)
+    elif dialect_name == 'postgresql':
+        sql, match = build_postgresql_query(terms, category)
+    else:
+        raise ValueError(f'Full-text search is not supported on {dialect_name}')
+
+    params = {'match': match, 'limit': min(limit, MAX_SEARCH_LIMIT)}
+    if category:
+        params['category'] = category
+    return db.session.execute(text(sql), params).all()
@@ -0,0 +1,147 @@
+import heapq
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import tuple_
+
+from ..extensions import db
+from ..models.master_data import MasterData
+from ..models.master_data_tombstone import MasterDataTombstone
+from .serialization import master_data_serializer
+
+MAX_SYNC_PAGE_SIZE = 5000
+
+OP_UPSERT = 'upsert'
+OP_DELETE = 'delete'
+OP_RESET = 'reset'
+
+# Fields of an upserted item, in the order they are selected
+SYNC_FIELDS = ('id', 'category', 'code', 'name', 'description', 'icon', 'tags', 'sort_order', 'is_active',
+               'updated_at')
+SYNC_COLUMNS = master_data_serializer.columns(SYNC_FIELDS)
+
+SyncPage = namedtuple('SyncPage', ['changes', 'cursor', 'has_more'])
+
+
+class InvalidSyncCursor(ValueError):
+    """Raised for a sync cursor that was not issued by this application"""
+
+
+def _serializer():
+    """Return the signer used for sync cursors"""
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='master-data-sync')
+
+
+def _dump_key(key):
+    """Make a (timestamp, id) stream position JSON serializable"""
+    return None if key is None else [key[0].isoformat(), key[1]]
+
+
+def _load_key(value):
+    """Reverse _dump_key"""
+    return None if value is None else (datetime.fromisoformat(value[0]), int(value[1]))
+
+
+def encode_sync_cursor(changed_key, deleted_key):
+    """Encode the (timestamp, id) positions in both change streams as a signed token"""
+    return _serializer().dumps([_dump_key(changed_key), _dump_key(deleted_key)])
+
+
+def decode_sync_cursor(token):
+    """Decode a cursor into (changed key, deleted key); raise InvalidSyncCursor if it is bad"""
+    try:
+        changed, deleted = _serializer().loads(token)
+        return _load_key(changed), _load_key(deleted)
+    except (BadSignature, TypeError, ValueError, IndexError) as e:
+        raise InvalidSyncCursor('Invalid sync cursor') from e
+
+
+def changed_rows(after, horizon, limit):
+    """Return up to limit rows changed after the (updated_at, id) key, oldest first"""
+    query = db.session.query(*SYNC_COLUMNS).filter(MasterData.updated_at <= horizon)
+    if after is not None:
+        query = query.filter(tuple_(MasterData.updated_at, MasterData.id) > tuple_(*after))
+    return query.order_by(MasterData.updated_at, MasterData.id).limit(limit).all()
+
+
+def deleted_rows(after, horizon, limit):
+    """Return up to limit tombstones recorded after the (deleted_at, id) key, oldest first"""
+    tombstone = MasterDataTombstone
+    return db.session.query(
+        tombstone.id, tombstone.master_data_id, tombstone.category, tombstone.code, tombstone.deleted_at
+    ).filter(
+        tombstone.deleted_at <= horizon,
+        tuple_(tombstone.deleted_at, tombstone.id) > tuple_(*after)
+    ).order_by(tombstone.deleted_at, tombstone.id).limit(limit).all()
+
+
+def upsert_change(row):
+    """Serialize a changed row as an upsert"""
+    return {'op': OP_UPSERT, 'item': dict(zip(SYNC_FIELDS, row))}
+
+
+def delete_change(row):
+    """Serialize a tombstone as a deletion, or a reset for an emptied table"""
+    if row.master_data_id is None:
+        return {'op': OP_RESET}
+    return {'op': OP_DELETE, 'id': row.master_data_id, 'category': row.category, 'code': row.code,
+            'deleted_at': row.deleted_at}
+
+
+def master_data_changes(token=None, limit=None):
+    """Return the next page of master data changes after a sync cursor
+
+    Rows changed since the cursor come from the updated_at index and
+    deletions from the tombstone index, merged in time order, so a sync
+    costs O(changes) rather than O(table). A missing cursor starts a full
+    sync. Changes younger than SYNC_SETTLE_SECONDS are held back so that a
+    transaction committing late cannot slip in behind a cursor. A cursor
+    older than the tombstone retention gets a reset change first, after
+    which the client receives the whole table again.
+    """
+    config = current_app.config
+    limit = max(1, min(limit or config['SYNC_PAGE_SIZE'], MAX_SYNC_PAGE_SIZE))
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=config['SYNC_SETTLE_SECONDS'])
+
+    changes = []
+    changed_key = deleted_key = None
+    if token:
+        changed_key, deleted_key = decode_sync_cursor(token)
+        if deleted_key is None or deleted_key[0] < now - timedelta(days=config['SYNC_TOMBSTONE_RETENTION_DAYS']):
+            # Deletions this client has not seen may already be pruned
+            changes.append({'op': OP_RESET})
+            changed_key = deleted_key = None
+    if deleted_key is None:
+        # A full sync only needs deletions made while it is under way
+        deleted_key = (horizon, 0)
+
+    changed = changed_rows(changed_key, horizon, limit + 1)
+    deleted = deleted_rows(deleted_key, horizon, limit + 1)
+
+    # Within one timestamp an update sorts before a deletion
+    merged = heapq.merge(
+        ((row.updated_at, 0, row) for row in changed),
+        ((row.deleted_at, 1, row) for row in deleted),
+        key=lambda event: event[:2]
+    )
+    taken = taken_deleted = 0
+    for _, stream, row in merged:
+        if taken == limit:
+            break
+        taken += 1
+        if stream == 0:
+            changes.append(upsert_change(row))
+            changed_key = (row.updated_at, row.id)
+        else:
+            taken_deleted += 1
+            changes.append(delete_change(row))
+            deleted_key = (row.deleted_at, row.id)
+
+    if taken_deleted == len(deleted):
+        # Every deletion up to the horizon has been seen; keep a quiet cursor from aging out
+        deleted_key = max(deleted_key, (horizon, 0))
+    has_more = taken < len(changed) + len(deleted)
+    return SyncPage(changes, encode_sync_cursor(changed_key, deleted_key), has_more)
@@ -0,0 +1,139 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from ..models.master_data import MasterData
+
+DEFAULT_CHUNK_SIZE = 50000
+REQUIRED_COLUMNS = ['category', 'code', 'description', 'is_active', 'icon', 'tags']
+OPTIONAL_COLUMNS = ['created_on', 'created_by']
+TRUE_VALUES = ['TRUE', 'T', 'YES', 'Y', '1']
+FALSE_VALUES = ['FALSE', 'F', 'NO', 'N', '0', '']
+
+# CSV field -> MasterData columns it is stored in (description doubles as name)
+FIELD_COLUMNS = {
+    'category': ['category'],
+    'code': ['code'],
+    'description': ['name', 'description'],
+    'icon': ['icon'],
+    'tags': ['tags'],
+}
+
+
+def field_length_limits():
+    """Derive per-field length limits from the MasterData column sizes"""
+    columns = MasterData.__table__.columns
+    return {
+        field: min(columns[name].type.length for name in names)
+        for field, names in FIELD_COLUMNS.items()
+    }
+
+
+class MasterDataCsvValidator:
+    """Vectorized validation and normalization stage for master data CSVs
+
+    The file is read with pandas in chunks and every check (required
+    fields, length limits, boolean coercion, ISO 8601 date parsing and
+    duplicate (category, code) detection across the whole file) runs as a
+    column operation. Rejected rows are appended to a reject CSV together
+    with their row number and reason; only clean records are yielded.
+    """
+
+    def __init__(self, path, reject_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.reject_path = reject_path or f'{os.path.splitext(path)[0]}.rejects.csv'
+        self.chunk_size = chunk_size
+        self.limits = field_length_limits()
+        self.total = 0
+        self.rejected = 0
+        self._seen_keys = set()
+        self._reject_header_written = False
+
+    def read_chunks(self):
+        """Read the CSV as string columns, one chunk at a time"""
+        reader = pd.read_csv(
+            self.path,
+            chunksize=self.chunk_size,
+            dtype=str,
+            keep_default_na=False,
+            encoding='utf-8-sig'
+        )
+        for chunk in reader:
+            missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+            if missing:
+                raise ValueError(f"CSV file is missing required columns: {', '.join(missing)}")
+            for column in OPTIONAL_COLUMNS:
+                if column not in chunk.columns:
+                    chunk[column] = ''
+            yield chunk
+
+    def validate_chunk(self, chunk):
+        """Split a chunk into (clean, rejected) frames"""
+        reasons = pd.Series('', index=chunk.index)
+
+        def reject(mask, reason):
+            reasons[mask & (reasons == '')] = reason
+
+        # Vectorized normalize_key, so both import paths store the same keys
+        for column in ['category', 'code']:
+            chunk[column] = chunk[column].str.strip()
+        for column in ['category', 'code', 'description']:
+            reject(chunk[column] == '', f'{column} is required')
+        for column, limit in self.limits.items():
+            reject(chunk[column].str.len() > limit, f'{column} longer than {limit} characters')
+
+        flags = chunk['is_active'].str.strip().str.upper()
+        reject(~flags.isin(TRUE_VALUES + FALSE_VALUES), 'is_active is not a boolean')
+        chunk['active_flag'] = flags.isin(TRUE_VALUES)
+
+        created_on = chunk['created_on'].str.strip()
+        parsed = pd.to_datetime(created_on, format='ISO8601', utc=True, errors='coerce')
+        reject(parsed.isna() & (created_on != ''), 'created_on is not an ISO 8601 timestamp')
+        chunk['created_at'] = parsed.dt.tz_convert(None)
+
+        keys = chunk['category'] + '\x1f' + chunk['code']
+        reject(keys.duplicated() | keys.isin(self._seen_keys), 'duplicate category and code in file')
+
+        valid = reasons == ''
+        self._seen_keys.update(keys[valid])
+        rejected = chunk.loc[~valid].assign(reason=reasons[~valid])
+        return chunk.loc[valid], rejected
+
+    def write_rejects(self, rejected, columns):
+        """Append rejected rows, with their data row numbers, to the reject file"""
+        if rejected.empty:
+            return
+        output = rejected[columns + ['reason']].copy()
+        output.insert(0, 'row', rejected.index + 1)
+        output.to_csv(self.reject_path, mode='a', index=False, header=not self._reject_header_written)
+        self._reject_header_written = True
+
+    def iter_records(self):
+        """Yield clean, typed records ready for MasterDataImporter"""
+        if os.path.exists(self.reject_path):
+            os.remove(self.reject_path)
+
+        now = datetime.utcnow()
+        for chunk in self.read_chunks():
+            source_columns = list(chunk.columns)
+            self.total += len(chunk)
+            clean, rejected = self.validate_chunk(chunk)
+            self.rejected += len(rejected)
+            self.write_rejects(rejected, source_columns)
+
+            created_at = clean['created_at'].fillna(pd.Timestamp(now))
+            columns = {
+                'category': clean['category'].tolist(),
+                'code': clean['code'].tolist(),
+                'name': clean['description'].tolist(),  # Using description as name
+                'description': clean['description'].tolist(),
+                'icon': clean['icon'].tolist(),
+                'tags': clean['tags'].tolist(),
+                'is_active': clean['active_flag'].tolist(),
+                'created_at': created_at.to_numpy().astype('datetime64[us]').tolist(),
+                'created_by': clean['created_by'].tolist(),
+            }
+            names = list(columns)
+            for values in zip(*columns.values()):
+                yield dict(zip(names, values))
@@ -0,0 +1,135 @@
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import tuple_
+
+DIRECTION_NEXT = 'n'
+DIRECTION_PREV = 'p'
+
+
+def _dump_value(value):
+    """Make a sort key value JSON serializable"""
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _load_value(value):
+    """Reverse _dump_value"""
+    if isinstance(value, dict) and 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def _serializer():
+    """Return the signer used for page tokens"""
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt='keyset-pagination')
+
+
+def encode_cursor(direction, key):
+    """Encode a page direction and sort key as an opaque, signed token"""
+    return _serializer().dumps([direction, [_dump_value(value) for value in key]])
+
+
+def decode_cursor(token, key_length):
+    """Decode a token into (direction, key), or (None, None) if it is missing or invalid"""
+    if not token:
+        return None, None
+    try:
+        direction, key = _serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        return None, None
+    if direction not in (DIRECTION_NEXT, DIRECTION_PREV) or len(key) != key_length:
+        return None, None
+    return direction, tuple(_load_value(value) for value in key)
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query"""
+
+    def __init__(self, items, total, next_token=None, prev_token=None):
+        self.items = items
+        self.total = total
+        self.next_token = next_token
+        self.prev_token = prev_token
+
+    @property
+    def has_next(self):
+        """Return True if there is a later page"""
+        return self.next_token is not None
+
+    @property
+    def has_prev(self):
+        """Return True if there is an earlier page"""
+        return self.prev_token is not None
+
+
+def keyset_paginate(query, columns, per_page, token=None, descending=False, total=None):
+    """Fetch the page of query after (or before) the key in token
+
+    Rows are ordered on columns, which must be NOT NULL, as a row tuple
+    comparison with a NULL is never true, and end with a unique column. Each page is a single indexed range scan of per_page + 1
+    rows, however deep it is, instead of OFFSET over every earlier row.
+    """
+    direction, key = decode_cursor(token, len(columns))
+    row_key = tuple_(*columns)
+    backwards = direction == DIRECTION_PREV
+
+    if key is not None:
+        # Walking backwards flips both the comparison and the order
+        if descending != backwards:
+            query = query.filter(row_key < tuple_(*key))
+        else:
+            query = query.filter(row_key > tuple_(*key))
+    ordering = [column.desc() if descending != backwards else column.asc() for column in columns]
+    rows = query.order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    items = rows[:per_page]
+    if backwards:
+        items.reverse()
+
+    def item_key(item):
+        return [getattr(item, column.key) for column in columns]
+
+    next_token = prev_token = None
+    if items:
+        # A page reached by walking in one direction always has a neighbour in the other
+        if has_more or backwards:
+            next_token = encode_cursor(DIRECTION_NEXT, item_key(items[-1]))
+        if (has_more and backwards) or (key is not None and not backwards):
+            prev_token = encode_cursor(DIRECTION_PREV, item_key(items[0]))
+    return KeysetPage(items, total, next_token, prev_token)
+
+
+class CountCache:
+    """Process-local cache of COUNT(*) results
+
+    Each count is stored with a stamp describing the data it was computed
+    from; it is only recomputed once the caller passes a different stamp.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, stamp, compute):
+        """Return the cached count for key, recomputing it if stamp has changed"""
+        cached = self._counts.get(key)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        count = compute()
+        with self._lock:
+            self._counts[key] = (stamp, count)
+        return count
+
+
+def ttl_stamp(seconds):
+    """Return a stamp that changes every given number of seconds"""
+    return int(time.time() // seconds)
+
+
+count_cache = CountCache()
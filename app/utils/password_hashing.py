@@ -0,0 +1,228 @@
+import base64
+import hashlib
+import hmac
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+from werkzeug.security import check_password_hash, generate_password_hash
+
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+BCRYPT_DEFAULT_ROUNDS = 12
+# Marks bcrypt hashes of a pre-hashed password; bare bcrypt hashes predate it
+BCRYPT_SHA256_PREFIX = 'bcrypt-sha256$'
+# Length of the '$2b$<rounds>$<salt>' setting that starts a bcrypt hash
+BCRYPT_SETTING_LENGTH = 29
+
+# Per scheme: the method for a cost, the lowest cost calibration may pick,
+# the highest, and whether the work doubles with each step of cost
+CALIBRATION_COSTS = {
+    'bcrypt': (lambda cost: f'bcrypt:{cost}', 10, 16, True),
+    'scrypt': (lambda cost: f'scrypt:{2 ** cost}:8:1', 15, 20, True),
+    'pbkdf2': (lambda cost: f'pbkdf2:sha256:{cost}', 1000000, 10000000, False),
+}
+HASH_SCHEMES = tuple(CALIBRATION_COSTS)
+# Iterations pbkdf2 costs are rounded down to
+PBKDF2_ITERATION_STEP = 10000
+# Colons in a werkzeug method with every parameter spelled out
+WERKZEUG_METHOD_PARTS = {'scrypt': 3, 'pbkdf2': 2}
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when no more password hashes can be queued"""
+
+    def __init__(self, retry_after):
+        super().__init__('Too many sign-ins are being processed. Please try again shortly.')
+        self.retry_after = retry_after
+
+
+def bcrypt_rounds(method):
+    """Return the rounds of a 'bcrypt' or 'bcrypt:<rounds>' method, or None for other schemes"""
+    scheme, _, rounds = method.partition(':')
+    if scheme != 'bcrypt':
+        return None
+    return int(rounds) if rounds else BCRYPT_DEFAULT_ROUNDS
+
+
+def bcrypt_prehash(password, setting):
+    """Return the base64 HMAC-SHA256 of password, keyed with the bcrypt salt setting
+
+    bcrypt ignores everything past 72 bytes; the 44 byte digest keeps
+    every byte of a long password significant. Keying it with the salt
+    keeps a leaked hash from being attacked through unsalted SHA-256.
+    """
+    return base64.b64encode(hmac.new(setting, password.encode('utf-8'), hashlib.sha256).digest())
+
+
+def hash_password(password, method):
+    """Hash password with a method such as 'bcrypt:12' or 'scrypt:32768:8:1'"""
+    rounds = bcrypt_rounds(method)
+    if rounds is not None:
+        setting = bcrypt.gensalt(rounds)
+        return BCRYPT_SHA256_PREFIX + bcrypt.hashpw(bcrypt_prehash(password, setting), setting).decode('ascii')
+    return generate_password_hash(password, method=method)
+
+
+def verify_password(password_hash, password):
+    """Return True if password matches a bcrypt or werkzeug password_hash"""
+    if not password_hash:
+        return False
+    try:
+        if password_hash.startswith(BCRYPT_SHA256_PREFIX):
+            stored = password_hash[len(BCRYPT_SHA256_PREFIX):].encode('ascii')
+            return bcrypt.checkpw(bcrypt_prehash(password, stored[:BCRYPT_SETTING_LENGTH]), stored)
+        if password_hash.startswith(BCRYPT_PREFIXES):
+            return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('ascii'))
+    except ValueError:
+        return False
+    return check_password_hash(password_hash, password)
+
+
+def hash_method(password_hash):
+    """Return the method a stored hash was made with, in the form hash_password takes
+
+    Bare bcrypt hashes, which only compare the first 72 bytes of a
+    password, report 'bcrypt-plain:<rounds>' so that they are rehashed.
+    """
+    if not password_hash:
+        return None
+    if password_hash.startswith(BCRYPT_SHA256_PREFIX):
+        return f"bcrypt:{int(password_hash[len(BCRYPT_SHA256_PREFIX):].split('$')[2])}"
+    if password_hash.startswith(BCRYPT_PREFIXES):
+        return f"bcrypt-plain:{int(password_hash.split('$')[2])}"
+    return password_hash.split('$', 1)[0]
+
+
+def resolve_method(method):
+    """Spell out the cost werkzeug fills in for a bare 'scrypt' or 'pbkdf2'"""
+    rounds = bcrypt_rounds(method)
+    if rounds is not None:
+        return f'bcrypt:{rounds}'
+    if method.count(':') == WERKZEUG_METHOD_PARTS.get(method.partition(':')[0]):
+        return method
+    return hash_method(generate_password_hash('', method=method))
+
+
+def time_hash(method, samples=3):
+    """Return the fastest of a few timed hashes with method, in milliseconds"""
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hash_password('calibration password', method)
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+
+def calibrate(scheme, target_ms, samples=3):
+    """Pick the costliest method of a scheme that hashes within target_ms on this host
+
+    The cheapest allowed cost is timed and the cost scaled up to the
+    budget, then the chosen method is timed to confirm it. The floor is
+    never lowered to meet a budget: on a host too slow for it the floor is
+    returned and its time shows how far over budget it runs. Returns the
+    method and its measured milliseconds.
+    """
+    method_for, lowest, highest, doubling = CALIBRATION_COSTS[scheme]
+    base_ms = time_hash(method_for(lowest), samples)
+    if doubling:
+        cost = lowest + max(0, math.floor(math.log2(target_ms / base_ms)))
+    else:
+        cost = max(lowest, int(lowest * target_ms / base_ms) // PBKDF2_ITERATION_STEP * PBKDF2_ITERATION_STEP)
+    cost = min(cost, highest)
+
+    elapsed = time_hash(method_for(cost), samples) if cost != lowest else base_ms
+    while elapsed > target_ms and cost > lowest:
+        # The estimate overshot; step back towards the floor
+        cost = max(lowest, cost - 1 if doubling else cost - PBKDF2_ITERATION_STEP)
+        elapsed = time_hash(method_for(cost), samples)
+    return method_for(cost), elapsed
+
+
+class PasswordHasher:
+    """Bounded process pool for password hashing and verification
+
+    Key derivation is deliberately slow and CPU-bound, so it runs in
+    separate worker processes instead of on the request threads: a burst
+    of logins then occupies the pool, not the threads serving pages. A
+    semaphore caps the hashes queued or running at once; past it callers
+    get PasswordHasherBusy at once rather than waiting in line. Without
+    init_app, or with PASSWORD_HASH_WORKERS set to 0, hashing runs inline,
+    as scripts and the shell expect.
+
+    New hashes use PASSWORD_HASH_METHOD; stored hashes made with any
+    other scheme or cost still verify and are reported by needs_rehash.
+    """
+
+    def __init__(self, app=None):
+        self.workers = 0
+        self.method = 'scrypt'
+        self.compare_method = None
+        self.retry_after = 1
+        self._executor = None
+        self._slots = None
+        self._executor_guard = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        """Size the pool from the application config; workers start on first use"""
+        self.shutdown()
+        self.method = app.config['PASSWORD_HASH_METHOD']
+        self.compare_method = resolve_method(self.method)
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.retry_after = app.config['PASSWORD_HASH_RETRY_AFTER']
+        self._slots = threading.BoundedSemaphore(app.config['PASSWORD_HASH_QUEUE_LIMIT'])
+        app.extensions['password_hasher'] = self
+
+    def executor(self):
+        """Return the worker pool, starting it if needed"""
+        with self._executor_guard:
+            if self._executor is None:
+                # Workers come from a fork server, not a fork of this multi-threaded process
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('forkserver')
+                )
+            return self._executor
+
+    def shutdown(self):
+        """Stop the worker pool, if one is running"""
+        with self._executor_guard:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, fn, *args):
+        """Run fn in the pool and wait for its result, or raise PasswordHasherBusy"""
+        if not self.workers:
+            return fn(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy(self.retry_after)
+        try:
+            try:
+                return self.executor().submit(fn, *args).result()
+            except BrokenProcessPool:
+                # A worker died; replace the pool and try once more
+                self.shutdown()
+                return self.executor().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def generate(self, password):
+        """Return a salted hash of password"""
+        return self.run(hash_password, password, self.method)
+
+    def check(self, password_hash, password):
+        """Return True if password matches password_hash"""
+        return self.run(verify_password, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """Return True if password_hash was made with another scheme or cost than PASSWORD_HASH_METHOD"""
+        return self.compare_method is not None and hash_method(password_hash) != self.compare_method
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,137 @@
+import heapq
+
+from sqlalchemy import func, or_
+
+from ..extensions import db
+from ..models.people import SEARCH_FIELDS, People
+from .pagination import DIRECTION_NEXT, KeysetPage, decode_cursor, encode_cursor
+from .serialization import people_serializer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+MAX_QUERY_LENGTH = 100
+
+# The unfiltered directory is listed in first name order
+LIST_FIELD = 'first_name'
+
+
+def search_key(field):
+    """Return lower(field) exactly as the search indexes store it"""
+    key = func.lower(getattr(People, field))
+    if db.engine.dialect.name == 'postgresql':
+        key = key.collate('C')
+    return key
+
+
+def fold(text):
+    """Lower-case search text the way the database's lower() does
+
+    SQLite's lower() only folds ASCII letters, so other characters are
+    left alone there to keep the prefix comparable with the index.
+    """
+    if db.engine.dialect.name == 'sqlite':
+        return ''.join(char.lower() if char.isascii() else char for char in text)
+    return text.lower()
+
+
+def prefix_range(key, prefix):
+    """Return conditions matching keys that start with prefix, as an index range"""
+    return [key >= prefix, key < prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+
+
+def search_plan(text):
+    """Return the (indexed field, prefix, [(other field, prefix)]) streams for a search
+
+    One word is matched against each search field by its own index. Two or
+    more are read as a first name and a last name; the longer, and so
+    likely more selective, of the two drives the index range.
+    """
+    terms = fold(text).split()
+    if not terms:
+        return [(LIST_FIELD, None, [])]
+    if len(terms) == 1:
+        return [(field, terms[0], []) for field in SEARCH_FIELDS]
+    first, last = terms[0], ' '.join(terms[1:])
+    if len(first) >= len(last):
+        return [('first_name', first, [('last_name', last)])]
+    return [('last_name', last, [('first_name', first)])]
+
+
+def read_stream(fields, field, prefix, residual, after, batch_size):
+    """Yield the rows of one stream in (lower(field), id) order after a cursor key
+
+    Rows are fetched batch_size at a time, each batch a seek past the last
+    row of the one before. Alongside the requested fields every row
+    carries sort_key, sort_id and the lower-cased value of each search field.
+    """
+    key = search_key(field)
+    query = people_serializer.query(fields).add_columns(
+        key.label('sort_key'), People.id.label('sort_id'),
+        *[search_key(search_field).label(f'key_{search_field}') for search_field in SEARCH_FIELDS]
+    )
+    if prefix:
+        query = query.filter(key < prefix[:-1] + chr(ord(prefix[-1]) + 1))
+    for other_field, other_prefix in residual:
+        query = query.filter(*prefix_range(search_key(other_field), other_prefix))
+    query = query.order_by(key, People.id)
+
+    if after is not None and prefix and after[0] < prefix:
+        # A cursor from another search; start at the prefix instead
+        after = None
+    while True:
+        if after is not None:
+            # Seek straight to the cursor; the prefix range's lower bound would hide it from the index
+            after_key, after_id = after
+            batch = query.filter(key >= after_key, or_(key > after_key, People.id > after_id))
+        elif prefix:
+            batch = query.filter(key >= prefix)
+        else:
+            batch = query
+        rows = batch.limit(batch_size).all()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1].sort_key, rows[-1].sort_id)
+
+
+def first_match(row, prefix):
+    """Return the search field whose key is the smallest one starting with prefix"""
+    matches = [(getattr(row, f'key_{field}'), index) for index, field in enumerate(SEARCH_FIELDS)
+               if (getattr(row, f'key_{field}') or '').startswith(prefix)]
+    return SEARCH_FIELDS[min(matches)[1]] if matches else None
+
+
+def search_people(text='', fields=None, per_page=DEFAULT_PAGE_SIZE, token=None):
+    """Return a KeysetPage of people whose first name, last name or email starts with text
+
+    Each field is searched with its own index in key order, and the
+    streams are merged on (matched key, id), so every page costs a few
+    short range scans however many people match or however deep the page
+    is. A person matching on several fields is only listed where their
+    smallest matching key sorts, so paging never repeats anyone. Without
+    text the whole directory is listed by first name.
+    """
+    fields = tuple(fields or people_serializer.fields)
+    per_page = max(1, min(per_page, MAX_PAGE_SIZE))
+    _, after = decode_cursor(token, 2)
+
+    plan = search_plan((text or '')[:MAX_QUERY_LENGTH])
+
+    def stream(index, field, prefix, residual):
+        # Rows listed under another field still advance this stream, so it
+        # is never read further ahead than the merge has got to
+        for row in read_stream(fields, field, prefix, residual, after, per_page + 1):
+            listed = len(plan) == 1 or first_match(row, prefix) == field
+            yield (row.sort_key, row.sort_id, index), row if listed else None
+
+    merged = heapq.merge(*[stream(index, *entry) for index, entry in enumerate(plan)], key=lambda event: event[0])
+    items = []
+    next_token = None
+    for _, row in merged:
+        if row is None:
+            continue
+        if len(items) == per_page:
+            next_token = encode_cursor(DIRECTION_NEXT, [items[-1].sort_key, items[-1].sort_id])
+            break
+        items.append(row)
+    return KeysetPage([row[:len(fields)] for row in items], None, next_token)
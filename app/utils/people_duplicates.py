@@ -0,0 +1,461 @@
+import hashlib
+import json
+import time
+import unicodedata
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from flask import current_app
+from sqlalchemy import delete, func, insert, select
+
+from ..extensions import db
+from ..models.data_job import DataJob
+from ..models.people import People
+from ..models.people_duplicate import PeopleDuplicateCluster, people_duplicate_members
+from .jobs import UNFINISHED_STATUSES, JobQueueFull, job_runner
+from .logging import log_operation
+
+DUPLICATE_JOB_KIND = 'people_duplicates'
+
+DEFAULT_THRESHOLD = 0.88
+DEFAULT_MAX_BLOCK_SIZE = 200
+DEFAULT_WINDOW = 20
+LOAD_BATCH_SIZE = 5000
+INSERT_BATCH_SIZE = 1000
+
+# Score weights; phone and birth date only count when both records have them
+NAME_WEIGHT = 0.6
+PHONE_WEIGHT = 0.2
+BIRTH_WEIGHT = 0.2
+# Pairs whose names are less alike than this never match, whatever else agrees
+MIN_NAME_SIMILARITY = 0.8
+# Applied when neither phone nor birth date can be compared, so only near-identical names match on their own
+NAME_ONLY_FACTOR = 0.9
+
+PHONE_SUFFIX_LENGTH = 7
+
+SOUNDEX_CODES = {char: str(code) for code, letters in enumerate(
+    ('aeiouyhw', 'bfpv', 'cgjkqsxz', 'dt', 'l', 'mn', 'r')) for char in letters}
+
+
+def normalize_name(value):
+    """Return value lower-cased with accents, punctuation and extra spaces removed"""
+    if not value:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', value)
+    letters = ''.join(char if char.isalpha() else ' ' for char in decomposed
+                      if not unicodedata.combining(char))
+    return ' '.join(letters.lower().split())
+
+
+def normalize_phone(value):
+    """Return the last PHONE_SUFFIX_LENGTH digits of a phone number, or None"""
+    digits = ''.join(char for char in value or '' if char.isdigit())
+    return digits[-PHONE_SUFFIX_LENGTH:] if len(digits) >= PHONE_SUFFIX_LENGTH else None
+
+
+def soundex(name):
+    """Return the American Soundex code of a normalized name"""
+    letters = [char for char in name if char in SOUNDEX_CODES]
+    if not letters:
+        return ''
+    code = letters[0].upper()
+    previous = SOUNDEX_CODES[letters[0]]
+    for char in letters[1:]:
+        digit = SOUNDEX_CODES[char]
+        if digit != '0' and digit != previous:
+            code += digit
+            if len(code) == 4:
+                break
+        if char not in 'hw':
+            # H and W do not separate letters with the same code
+            previous = digit
+    return code.ljust(4, '0')
+
+
+@lru_cache(maxsize=1 << 18)
+def jaro_winkler(a, b):
+    """Return the Jaro-Winkler similarity of two strings, from 0 to 1
+
+    Names repeat a lot, so results are cached.
+    """
+    if a == b:
+        return 1.0
+    len_a, len_b = len(a), len(b)
+    if not len_a or not len_b:
+        return 0.0
+
+    window = max(0, max(len_a, len_b) // 2 - 1)
+    taken = [False] * len_b
+    matches_a = []
+    for i, char in enumerate(a):
+        end = i + window + 1
+        j = b.find(char, i - window if i > window else 0, end)
+        while j != -1 and taken[j]:
+            j = b.find(char, j + 1, end)
+        if j != -1:
+            taken[j] = True
+            matches_a.append(char)
+    matches = len(matches_a)
+    if not matches:
+        return 0.0
+    matches_b = [char for char, used in zip(b, taken) if used]
+    transpositions = sum(x != y for x, y in zip(matches_a, matches_b)) // 2
+    jaro = (matches / len_a + matches / len_b + (matches - transpositions) / matches) / 3
+
+    prefix = 0
+    for x, y in zip(a[:4], b[:4]):
+        if x != y:
+            break
+        prefix += 1
+    return jaro + prefix * 0.1 * (1 - jaro)
+
+
+class Candidate:
+    """The normalized fields of one person, and the blocks they fall into"""
+    __slots__ = ('id', 'first', 'last', 'name', 'phone', 'birth_date', 'keys')
+
+    def __init__(self, person_id, first_name, last_name, phone, birth_date):
+        first = normalize_name(first_name)
+        last = normalize_name(last_name)
+        self.id = person_id
+        self.first = first
+        self.last = last
+        self.name = f'{first} {last}'.strip()
+        self.phone = normalize_phone(phone)
+        self.birth_date = birth_date
+        # One key per blocking rule, in a fixed order; None when a rule does not apply.
+        # The name key ignores the order of the names, so swapped names share it.
+        self.keys = (
+            ('name', *sorted((soundex(first), soundex(last)))) if last else ('name', soundex(first)),
+            ('phone', self.phone) if self.phone else None,
+            ('birth', birth_date) if birth_date else None,
+        )
+
+
+def name_similarity(a, b):
+    """Return how alike two candidates' names are, allowing first and last name to be swapped
+
+    First and last names are compared separately so a shared first name
+    alone does not make two people look alike.
+    """
+    if not a.last or not b.last:
+        return jaro_winkler(a.name, b.name)
+    similarity = (jaro_winkler(a.first, b.first) + jaro_winkler(a.last, b.last)) / 2
+    if a.first[:1] == b.last[:1] and a.last[:1] == b.first[:1]:
+        similarity = max(similarity, (jaro_winkler(a.first, b.last) + jaro_winkler(a.last, b.first)) / 2)
+    return similarity
+
+
+def combine_score(name, evidence, weight):
+    """Weigh name similarity with the phone and birth date evidence of a pair"""
+    score = (NAME_WEIGHT * name + evidence) / weight
+    return score * NAME_ONLY_FACTOR if weight == NAME_WEIGHT else score
+
+
+class DuplicateClusters:
+    """Union-find over candidates, remembering the weakest link of each cluster
+
+    Two clusters are not merged when both know birth dates, or both know
+    phones, and none of them agree, so a chain of name-only matches
+    cannot join people that are known to differ.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.score = {}
+        self.reasons = {}
+        self.birth_dates = {}
+        self.phones = {}
+
+    def add(self, candidate):
+        """Return the root of candidate's cluster, starting a new one if needed"""
+        if candidate.id not in self.parent:
+            self.parent[candidate.id] = candidate.id
+            self.birth_dates[candidate.id] = {candidate.birth_date} if candidate.birth_date else set()
+            self.phones[candidate.id] = {candidate.phone} if candidate.phone else set()
+            return candidate.id
+        return self.find(candidate.id)
+
+    def find(self, item):
+        """Return the root of item's cluster, halving the path on the way"""
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def _conflict(self, values, root_a, root_b):
+        """Return True if both clusters know values for a field and share none"""
+        return bool(values[root_a] and values[root_b]) and not values[root_a] & values[root_b]
+
+    def union(self, a, b, score, reasons):
+        """Merge the clusters of a and b, unless they are known to differ"""
+        root_a, root_b = self.add(a), self.add(b)
+        if root_a == root_b:
+            return
+        if self._conflict(self.birth_dates, root_a, root_b) or self._conflict(self.phones, root_a, root_b):
+            return
+        self.parent[root_b] = root_a
+        self.score[root_a] = min(score, self.score.pop(root_a, score), self.score.pop(root_b, score))
+        self.reasons[root_a] = self.reasons.pop(root_a, set()) | self.reasons.pop(root_b, set()) | reasons
+        self.birth_dates[root_a] |= self.birth_dates.pop(root_b)
+        self.phones[root_a] |= self.phones.pop(root_b)
+
+    def groups(self):
+        """Return (sorted member ids, score, reasons) for every cluster"""
+        members = defaultdict(list)
+        for item in self.parent:
+            members[self.find(item)].append(item)
+        return [(sorted(ids), self.score[root], sorted(self.reasons[root]))
+                for root, ids in members.items() if len(ids) > 1]
+
+
+def cluster_signature(member_ids):
+    """Return a stable hash of a cluster's member ids"""
+    return hashlib.md5(','.join(map(str, member_ids)).encode('ascii')).hexdigest()
+
+
+class PeopleDuplicateFinder:
+    """Find likely duplicate people by normalized name, phone and birth date
+
+    Every person is filed under up to three blocking keys: the Soundex
+    codes of their names, the phone number's last digits, and the birth
+    date, which still catches names misspelt beyond Soundex. Only people
+    sharing a block are compared, each pair once under the first key they
+    share. Blocks larger than max_block_size are sorted by name and only
+    compared within a sliding window, so common names cannot blow up into
+    quadratic work; pairs such a block passes over can still meet in
+    another. Matching pairs are merged into clusters.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_block_size=DEFAULT_MAX_BLOCK_SIZE, window=DEFAULT_WINDOW,
+                 logger=None, progress=None):
+        self.threshold = threshold
+        self.max_block_size = max_block_size
+        self.window = window
+        self.logger = logger
+        self.progress = progress
+        self.loaded = 0
+        self.compared = 0
+
+    def count(self):
+        """Count the people a scan reads"""
+        return db.session.execute(select(func.count(People.id))).scalar()
+
+    def load(self):
+        """Read every person once, in primary key batches, into blocks"""
+        blocks = defaultdict(list)
+        query = select(People.id, People.first_name, People.last_name, People.phone, People.birth_date)
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                query.where(People.id > last_id).order_by(People.id).limit(LOAD_BATCH_SIZE)).all()
+            for row in rows:
+                candidate = Candidate(*row)
+                for position, key in enumerate(candidate.keys):
+                    if key is not None:
+                        blocks[(position, key)].append(candidate)
+            self.loaded += len(rows)
+            if self.progress:
+                self.progress(self.loaded)
+            if len(rows) < LOAD_BATCH_SIZE:
+                return blocks
+            last_id = rows[-1].id
+
+    def score(self, a, b):
+        """Return (score, reasons) for a pair of candidates"""
+        weight = NAME_WEIGHT
+        evidence = 0.0
+        reasons = set()
+        if a.phone and b.phone:
+            weight += PHONE_WEIGHT
+            if a.phone == b.phone:
+                evidence += PHONE_WEIGHT
+                reasons.add('phone')
+        if a.birth_date and b.birth_date:
+            weight += BIRTH_WEIGHT
+            if a.birth_date == b.birth_date:
+                evidence += BIRTH_WEIGHT
+                reasons.add('birth_date')
+        if combine_score(1.0, evidence, weight) < self.threshold:
+            # Even identical names could not make up for the differing fields
+            return 0.0, reasons
+
+        name = name_similarity(a, b)
+        if name < MIN_NAME_SIMILARITY:
+            return 0.0, reasons
+        if name >= self.threshold:
+            reasons.add('name')
+        return combine_score(name, evidence, weight), reasons
+
+    def pairs(self, members):
+        """Yield the pairs of one block to compare"""
+        if len(members) <= self.max_block_size:
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    yield a, b
+            return
+        members = sorted(members, key=lambda candidate: candidate.name)
+        for i, a in enumerate(members):
+            for b in members[i + 1:i + 1 + self.window]:
+                yield a, b
+
+    def run(self):
+        """Return (sorted member ids, score, reasons) for every candidate cluster"""
+        started = time.perf_counter()
+        blocks = self.load()
+        # Pairs in a windowed block may not have been compared there
+        windowed = {block for block, members in blocks.items() if len(members) > self.max_block_size}
+        clusters = DuplicateClusters()
+        for (position, _), members in blocks.items():
+            if len(members) < 2:
+                continue
+            for a, b in self.pairs(members):
+                # Compare each pair under the first fully compared blocking key the two share
+                if any(a.keys[earlier] is not None and a.keys[earlier] == b.keys[earlier]
+                       and (earlier, a.keys[earlier]) not in windowed for earlier in range(position)):
+                    continue
+                self.compared += 1
+                score, reasons = self.score(a, b)
+                if score >= self.threshold:
+                    clusters.union(a, b, score, reasons)
+        groups = clusters.groups()
+
+        if self.logger:
+            self.logger.info(
+                f"People duplicate scan: {self.loaded} people, {len(blocks)} blocks, {self.compared} pairs, "
+                f"{len(groups)} clusters in {time.perf_counter() - started:.2f}s"
+            )
+        return groups
+
+
+def store_clusters(groups, job_id=None):
+    """Replace the open clusters with groups, leaving out those already dismissed
+
+    Returns the number of clusters stored; the caller commits.
+    """
+    open_clusters = select(PeopleDuplicateCluster.id).where(
+        PeopleDuplicateCluster.status == PeopleDuplicateCluster.STATUS_OPEN)
+    db.session.execute(delete(people_duplicate_members).where(
+        people_duplicate_members.c.cluster_id.in_(open_clusters)))
+    db.session.execute(delete(PeopleDuplicateCluster).where(
+        PeopleDuplicateCluster.status == PeopleDuplicateCluster.STATUS_OPEN
+    ).execution_options(synchronize_session=False))
+
+    dismissed = set(db.session.execute(select(PeopleDuplicateCluster.signature).where(
+        PeopleDuplicateCluster.status == PeopleDuplicateCluster.STATUS_DISMISSED)).scalars())
+    now = datetime.utcnow()
+    rows = []
+    for member_ids, score, reasons in groups:
+        signature = cluster_signature(member_ids)
+        if signature not in dismissed:
+            rows.append((member_ids, {
+                'job_id': job_id, 'status': PeopleDuplicateCluster.STATUS_OPEN, 'size': len(member_ids),
+                'score': round(score, 4), 'reasons': ', '.join(reasons), 'signature': signature, 'created_at': now,
+            }))
+
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        batch = rows[start:start + INSERT_BATCH_SIZE]
+        ids = db.session.execute(
+            insert(PeopleDuplicateCluster).returning(PeopleDuplicateCluster.id, sort_by_parameter_order=True),
+            [values for _, values in batch]
+        ).scalars().all()
+        db.session.execute(insert(people_duplicate_members), [
+            {'cluster_id': cluster_id, 'people_id': people_id}
+            for cluster_id, (member_ids, _) in zip(ids, batch) for people_id in member_ids
+        ])
+    return len(rows)
+
+
+def queue_people_duplicate_scan(user_id):
+    """Queue a duplicate scan of all people as a background job
+
+    Only one scan may be in progress. Scans whose worker stopped are
+    failed first, and any unfinished scan without a recent heartbeat is
+    ignored, so an abandoned scan never blocks new ones.
+    """
+    job_runner.reap_orphaned_jobs()
+    stale_before = datetime.utcnow() - timedelta(seconds=current_app.config['JOB_STALE_SECONDS'])
+    pending = DataJob.query.filter(
+        DataJob.kind == DUPLICATE_JOB_KIND,
+        DataJob.status.in_(UNFINISHED_STATUSES),
+        DataJob.heartbeat_at >= stale_before
+    ).first()
+    if pending:
+        raise JobQueueFull(f'Duplicate scan #{pending.id} is already in progress.')
+
+    job = DataJob(kind=DUPLICATE_JOB_KIND, created_by_id=user_id)
+    db.session.add(job)
+    db.session.commit()
+
+    try:
+        job_runner.submit(job, run_people_duplicate_job, job.id)
+    except JobQueueFull:
+        db.session.delete(job)
+        db.session.commit()
+        raise
+    return job
+
+
+def run_people_duplicate_job(job_id):
+    """Run a queued duplicate scan, recording progress on its DataJob row"""
+    job = db.session.get(DataJob, job_id)
+    try:
+        finder = PeopleDuplicateFinder(
+            threshold=current_app.config['DUPLICATE_MATCH_THRESHOLD'],
+            max_block_size=current_app.config['DUPLICATE_MAX_BLOCK_SIZE'],
+            window=current_app.config['DUPLICATE_WINDOW'],
+            logger=current_app.logger
+        )
+        job.total_rows = finder.count()
+        job.status = DataJob.STATUS_RUNNING
+        job.started_at = datetime.utcnow()
+        job.note = 'Loading people'
+        db.session.commit()
+        started = time.perf_counter()
+
+        def record_progress(loaded):
+            job.processed_rows = loaded
+            elapsed = time.perf_counter() - started
+            job.rows_per_second = round(loaded / elapsed, 1) if elapsed > 0 else None
+            if loaded == job.total_rows:
+                job.note = 'Comparing candidates'
+            db.session.commit()
+
+        finder.progress = record_progress
+        groups = finder.run()
+        stored = store_clusters(groups, job.id)
+
+        job.added_rows = stored
+        job.note = f'{stored} candidate clusters from {finder.compared} compared pairs'
+        job.status = DataJob.STATUS_COMPLETED
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+
+        log_operation(
+            current_app.logger,
+            'People Duplicate Scan',
+            'success',
+            {
+                'job_id': job_id,
+                'user_id': job.created_by_id,
+                'people_count': finder.loaded,
+                'compared_pairs': finder.compared,
+                'cluster_count': stored
+            }
+        )
+
+    except Exception as e:
+        db.session.rollback()
+        job.status = DataJob.STATUS_FAILED
+        job.finished_at = datetime.utcnow()
+        job.error_count = 1
+        job.error_messages = json.dumps([str(e)])
+        db.session.commit()
+        log_operation(
+            current_app.logger,
+            'People Duplicate Scan',
+            'error',
+            {'job_id': job_id, 'error': str(e)}
+        )
@@ -0,0 +1,339 @@
+import os
+import time
+from datetime import date, datetime
+
+from openpyxl import load_workbook
+from sqlalchemy import insert, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..extensions import db
+from ..models.people import People
+from .master_data_import import (DEFAULT_BATCH_SIZE, IMPORT_MODES, MODE_UPSERT, ImportResult, is_lock_error,
+                                 iter_csv_rows, load_user_ids_by_email, retry_on_lock)
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+
+# Columns read from a file; anything else in it (id, created_at, ...) is ignored
+IMPORT_COLUMNS = ('first_name', 'last_name', 'email', 'phone', 'address', 'birth_date', 'gender', 'notes',
+                  'is_active')
+# Columns an import may change on a person matched by email
+UPDATABLE_COLUMNS = ('first_name', 'last_name', 'phone', 'address', 'birth_date', 'gender', 'notes', 'is_active')
+
+TRUE_VALUES = ('TRUE', 'T', 'YES', 'Y', '1')
+FALSE_VALUES = ('FALSE', 'F', 'NO', 'N', '0', '')
+GENDER_WORDS = {'MALE': 'M', 'FEMALE': 'F', 'OTHER': 'O'}
+# Accepted besides ISO 8601 (YYYY-MM-DD)
+BIRTH_DATE_FORMATS = ('%d/%m/%Y', '%d.%m.%Y')
+
+
+def column_length_limits():
+    """Return the length limit of every string column a file may set"""
+    columns = People.__table__.columns
+    return {name: columns[name].type.length for name in IMPORT_COLUMNS
+            if getattr(columns[name].type, 'length', None)}
+
+
+def import_format(path):
+    """Return the import format of a file from its extension"""
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported file type .{extension}; expected {' or '.join(IMPORT_FORMATS)}")
+    return extension
+
+
+def iter_xlsx_rows(path):
+    """Lazily read the first sheet of a workbook into dict rows
+
+    The workbook is opened read-only, so rows are parsed from the sheet
+    XML as they are consumed instead of loading the whole file.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(name).strip() if name is not None else '' for name in next(rows, ())]
+        for values in rows:
+            if any(value is not None for value in values):
+                yield dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def iter_people_rows(path):
+    """Yield the dict rows of a CSV or XLSX file"""
+    if import_format(path) == 'xlsx':
+        yield from iter_xlsx_rows(path)
+        return
+    with open(path, 'rb') as f:
+        yield from iter_csv_rows(f)
+
+
+def cell_text(value):
+    """Return a cell as stripped text, with whole numbers from spreadsheets kept integral"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def parse_birth_date(value):
+    """Parse a birth date cell, or return None for an empty one"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = cell_text(value)
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text)
+    except ValueError:
+        pass
+    for date_format in BIRTH_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f'birth_date {text!r} is not a date (expected YYYY-MM-DD)')
+
+
+def parse_gender(value):
+    """Normalize a gender cell to the single character the column holds"""
+    text = cell_text(value).upper()
+    if not text:
+        return None
+    text = GENDER_WORDS.get(text, text)
+    if len(text) != 1:
+        raise ValueError(f'gender {text!r} must be a single character')
+    return text
+
+
+def parse_flag(value):
+    """Parse an is_active cell, treating an empty one as active"""
+    if isinstance(value, bool):
+        return value
+    text = cell_text(value).upper()
+    if not text:
+        return True
+    if text not in TRUE_VALUES + FALSE_VALUES:
+        raise ValueError(f'is_active {text!r} is not a boolean')
+    return text in TRUE_VALUES
+
+
+def parse_people_row(row, limits):
+    """Map a raw file row to typed People values, raising ValueError if invalid"""
+    values = {name: cell_text(row.get(name)) or None for name in ('first_name', 'last_name', 'email', 'phone',
+                                                                  'address', 'notes')}
+    if not values['first_name']:
+        raise ValueError('first_name is required')
+    if values['email'] and '@' not in values['email']:
+        raise ValueError(f"email {values['email']!r} is not an email address")
+    for name, limit in limits.items():
+        if values.get(name) and len(values[name]) > limit:
+            raise ValueError(f'{name} longer than {limit} characters')
+    values['birth_date'] = parse_birth_date(row.get('birth_date'))
+    values['gender'] = parse_gender(row.get('gender'))
+    values['is_active'] = parse_flag(row.get('is_active'))
+    values['created_by'] = cell_text(row.get('created_by')) or None
+    return values
+
+
+def load_emails():
+    """Load the lower-cased email -> stored email map in a single query"""
+    return {email.lower(): email for (email,) in
+            db.session.query(People.email).filter(People.email.isnot(None))}
+
+
+def build_merge_statement(dialect_name):
+    """Build INSERT ... ON CONFLICT (email) DO UPDATE for a dialect
+
+    The conflict target is uq_people_email. A matched person is only
+    rewritten, and returned, when one of the imported columns differs;
+    created_at and created_by_id are never touched.
+    """
+    table = People.__table__
+    if dialect_name == 'postgresql':
+        stmt = postgresql.insert(table)
+        conflict_target = {'constraint': 'uq_people_email'}
+    elif dialect_name == 'sqlite':
+        stmt = sqlite.insert(table)
+        conflict_target = {'index_elements': ['email']}
+    else:
+        raise ValueError(f'Merge import is not supported on {dialect_name}')
+
+    excluded = stmt.excluded
+    values = {column: excluded[column] for column in UPDATABLE_COLUMNS}
+    values['updated_at'] = excluded.updated_at
+    changed = or_(*[table.c[column].is_distinct_from(excluded[column]) for column in UPDATABLE_COLUMNS])
+    return stmt.on_conflict_do_update(set_=values, where=changed, **conflict_target).returning(table.c.id)
+
+
+class PeopleImporter:
+    """Streaming People importer that merges on email
+
+    Stored emails and the created_by email map are loaded once up front,
+    so rows are classified in memory and written with chunked bulk
+    INSERTs, one commit per batch. In upsert mode a row whose email is
+    already stored updates that person through a native INSERT ... ON
+    CONFLICT DO UPDATE; in skip mode it is left alone. Emails are matched
+    case-insensitively and rows without one are always added.
+    """
+
+    def __init__(self, default_user_id, batch_size=DEFAULT_BATCH_SIZE, logger=None, progress=None,
+                 mode=MODE_UPSERT):
+        if mode not in IMPORT_MODES:
+            raise ValueError(f'Unknown import mode: {mode}')
+        self.default_user_id = default_user_id
+        self.batch_size = batch_size
+        self.logger = logger
+        self.progress = progress
+        self.mode = mode
+        self.limits = column_length_limits()
+        self.emails = None
+        self.user_ids = None
+        self.insert_statement = insert(People.__table__)
+        self.merge_statement = None
+
+    def preload(self):
+        """Load the lookup maps used to classify rows"""
+        self.emails = load_emails()
+        self.user_ids = load_user_ids_by_email()
+        if self.mode == MODE_UPSERT:
+            self.merge_statement = build_merge_statement(db.session.get_bind().dialect.name)
+
+    def build_values(self, row, now):
+        """Map a file row to People column values"""
+        values = parse_people_row(row, self.limits)
+        values['created_by_id'] = self.user_ids.get(values.pop('created_by'), self.default_user_id)
+        if values['email']:
+            # Match the stored spelling so the unique constraint sees the same value
+            values['email'] = self.emails.get(values['email'].lower(), values['email'])
+        values['created_at'] = values['updated_at'] = now
+        return values
+
+    def is_new(self, values):
+        """Return True if a row adds a person rather than matching a stored one"""
+        return not values['email'] or values['email'].lower() not in self.emails
+
+    def execute(self, batch):
+        """Write a batch and return the rows it changed
+
+        New people go through a plain bulk INSERT; only rows matching a
+        stored email need the slower upsert, which reports what it changed.
+        """
+        new = [values for values in batch if self.is_new(values)]
+        matched = [values for values in batch if not self.is_new(values)]
+        changed = len(new)
+        if new:
+            db.session.execute(self.insert_statement, new)
+        if matched:
+            changed += len(db.session.execute(self.merge_statement, matched).all())
+        return changed
+
+    def record_written(self, written, changed, result):
+        """Split written rows into added, updated and unchanged counts"""
+        added = sum(1 for values in written if self.is_new(values))
+        result.added += added
+        result.updated += changed - added
+        result.skipped += len(written) - changed
+
+    def write_batch(self, batch, result):
+        """Write a batch and commit it, retrying it whole while another writer holds a lock
+
+        Counters and the stored emails are only updated once the batch has
+        committed, so a retried batch is not counted twice.
+        """
+        if not batch:
+            return
+        batch_result, written = retry_on_lock(lambda: self.try_write_batch(batch))
+        result.merge(batch_result)
+        self.emails.update((values['email'].lower(), values['email']) for values in written if values['email'])
+
+    def try_write_batch(self, batch):
+        """Write a batch inside its own savepoint and commit it
+
+        If the bulk statement fails on the data, the savepoint is rolled
+        back and the batch is replayed row by row so a single bad row only
+        costs itself; lock errors are raised for the whole batch to be
+        retried. Returns the batch's counters and the rows written.
+        """
+        result = ImportResult()
+        written = []
+        try:
+            with db.session.begin_nested():
+                changed = self.execute(batch)
+            self.record_written(batch, changed, result)
+            written = batch
+        except SQLAlchemyError as e:
+            if is_lock_error(e):
+                raise
+            for values in batch:
+                try:
+                    with db.session.begin_nested():
+                        changed = self.execute([values])
+                    self.record_written([values], changed, result)
+                    written.append(values)
+                except SQLAlchemyError as e:
+                    if is_lock_error(e):
+                        raise
+                    message = (f"Error writing {values['email'] or values['first_name']}: "
+                               f"{str(getattr(e, 'orig', None) or e)}")
+                    result.add_error(message)
+                    if self.logger:
+                        self.logger.error(message)
+        db.session.commit()
+        return result, written
+
+    def report_progress(self, result, started):
+        """Update elapsed time and notify the progress callback, if any"""
+        result.elapsed = time.perf_counter() - started
+        if self.progress:
+            self.progress(result)
+
+    def run(self, rows):
+        """Import an iterable of raw file rows, committing once per batch"""
+        result = ImportResult()
+        started = time.perf_counter()
+        if self.emails is None:
+            self.preload()
+        now = datetime.utcnow()
+
+        seen_emails = set()
+        batch = []
+        for row in rows:
+            result.total += 1
+            try:
+                values = self.build_values(row, now)
+            except Exception as e:
+                message = f"Error processing row {result.total}: {str(e)}"
+                result.add_error(message)
+                if self.logger:
+                    self.logger.error(message)
+                continue
+
+            email_key = values['email'].lower() if values['email'] else None
+            if email_key and (email_key in seen_emails or (self.mode != MODE_UPSERT and email_key in self.emails)):
+                # Repeated within the file, or stored and not being changed
+                result.skipped += 1
+            else:
+                if email_key:
+                    seen_emails.add(email_key)
+                batch.append(values)
+                if len(batch) >= self.batch_size:
+                    self.write_batch(batch, result)
+                    batch = []
+
+            if result.total % self.batch_size == 0:
+                self.report_progress(result, started)
+
+        self.write_batch(batch, result)
+        self.report_progress(result, started)
+
+        if self.logger:
+            self.logger.info(
+                f"People import ({self.mode}): {result.total} rows in {result.elapsed:.2f}s "
+                f"({result.rows_per_second:.0f} rows/s), added {result.added}, updated {result.updated}, "
+                f"skipped {result.skipped}, errors {result.errors}"
+            )
+        return result
@@ -0,0 +1,122 @@
+import json
+from datetime import date
+
+from flask import current_app
+from sqlalchemy import case, func
+
+from ..extensions import db
+from ..models.master_data import MasterData
+from ..models.people import People
+from ..models.user import User
+from ..models.user_preferences import UserPreferences
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
+
+LAYOUT_OBJECTS = 'objects'
+LAYOUT_COLUMNS = 'columns'
+LAYOUTS = (LAYOUT_OBJECTS, LAYOUT_COLUMNS)
+
+
+class InvalidFields(ValueError):
+    """Raised for a sparse fieldset naming fields a serializer does not offer"""
+
+
+def _default(value):
+    """Encode the values the JSON encoders do not handle natively"""
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def dumps(payload):
+    """Encode a payload as JSON bytes, with orjson when it is installed
+
+    Dates and datetimes are written as ISO 8601, matching the models'
+    to_dict() output.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(payload, status=200):
+    """Return a JSON response encoded with dumps()"""
+    return current_app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+
+class ColumnSerializer:
+    """Serialize a model from selected columns instead of hydrated ORM objects
+
+    fields are the names the model's to_dict() produces; expressions maps
+    fields that are Python properties on the model to equivalent SQL.
+    Callers select only the columns of the fields a client asked for and
+    turn the resulting tuples into JSON in one pass.
+    """
+
+    def __init__(self, model, fields, expressions=None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.expressions = dict(expressions or {})
+
+    def parse_fields(self, value, default=None):
+        """Return the fields named in a comma-separated ?fields= value, or the defaults"""
+        requested = [name.strip() for name in (value or '').split(',') if name.strip()]
+        if not requested:
+            return tuple(default or self.fields)
+        unknown = [name for name in requested if name not in self.fields]
+        if unknown:
+            raise InvalidFields(f'Unknown fields: {", ".join(unknown)}')
+        return tuple(dict.fromkeys(requested))
+
+    def column(self, field):
+        """Return the column or SQL expression for a field"""
+        if field in self.expressions:
+            return self.expressions[field].label(field)
+        return getattr(self.model, field)
+
+    def columns(self, fields):
+        """Return the columns to select for fields, in order"""
+        return [self.column(field) for field in fields]
+
+    def query(self, fields):
+        """Return a query selecting only the columns of fields"""
+        return db.session.query(*self.columns(fields))
+
+    def serialize(self, fields, rows, layout=LAYOUT_OBJECTS):
+        """Turn row tuples in fields order into a JSON-ready structure
+
+        The objects layout is a list of dicts like to_dict(); the columns
+        layout names the fields once and sends each row as an array.
+        """
+        if layout == LAYOUT_COLUMNS:
+            return {'fields': list(fields), 'rows': [tuple(row) for row in rows]}
+        return [dict(zip(fields, row)) for row in rows]
+
+
+master_data_serializer = ColumnSerializer(MasterData, [
+    'id', 'category', 'code', 'name', 'description', 'icon', 'tags', 'sort_order', 'is_active',
+    'created_by_id', 'created_at', 'updated_at'
+])
+
+user_serializer = ColumnSerializer(User, [
+    'id', 'username', 'email', 'full_name', 'profile_picture', 'is_active', 'is_admin',
+    'last_login', 'created_at', 'updated_at'
+])
+
+people_serializer = ColumnSerializer(People, [
+    'id', 'first_name', 'last_name', 'full_name', 'email', 'phone', 'address', 'birth_date', 'gender',
+    'notes', 'is_active', 'created_by_id', 'created_at', 'updated_at'
+], expressions={
+    # Same as People.full_name: the last name is only appended when it is not empty
+    'full_name': case(
+        (func.coalesce(People.last_name, '') != '', People.first_name + ' ' + People.last_name),
+        else_=People.first_name
+    )
+})
+
+user_preferences_serializer = ColumnSerializer(UserPreferences, [
+    'id', 'user_id', 'theme', 'language', 'sidebar_pinned', 'notifications_enabled', 'created_at', 'updated_at'
+])
@@ -1,12 +1,12 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, jsonify, send_file, abort
 from flask_login import login_required, current_user
-from sqlalchemy import desc
+from sqlalchemy import desc, func
+from sqlalchemy.orm import selectinload
 from functools import wraps
 from datetime import datetime, timedelta
-import csv
-import io
 import json
 import os
+import time
 from werkzeug.utils import secure_filename
 from email.utils import parsedate_to_datetime
 import traceback
@@ -15,11 +15,29 @@ from ..models import db
 from ..models.user import User
 from ..models.user_preferences import UserPreferences
 from ..models.master_data import MasterData
+from ..models.data_job import DataJob
+from ..models.people_duplicate import PeopleDuplicateCluster
+from ..models.tag import TAG_MODE_ANY, TAG_MODES, Tag, parse_tags
 from ..utils.logging import log_operation
-from ..forms.admin import MasterDataForm, MasterDataImportForm, SystemSettingsForm, UserEditForm
+from ..utils.export import EXPORT_DATASETS, EXPORT_FORMATS, export_response
+from ..utils.jobs import JobQueueFull
+from ..utils.master_data_batch import (ACTION_ACTIVATE, ACTION_MOVE, ACTION_REORDER, BATCH_ACTIONS, BatchRequestError,
+                                       move_master_data, parse_ids, parse_move, parse_sort_orders,
+                                       reorder_master_data, set_master_data_active)
+from ..utils.master_data_cache import bump_master_data_versions, count_delta, master_data_cache
+from ..utils.master_data_delete import DELETE_JOB_KIND, queue_master_data_delete
+from ..utils.master_data_diff import MasterDataDiff
+from ..utils.master_data_import import IMPORT_JOB_KIND, iter_csv_rows, queue_master_data_import
+from ..utils.master_data_search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_master_data
+from ..utils.pagination import KeysetPage, count_cache, keyset_paginate, ttl_stamp
+from ..utils.people_duplicates import DUPLICATE_JOB_KIND, queue_people_duplicate_scan
+from ..forms.admin import MasterDataForm, MasterDataImportForm, MasterDataBulkDeleteForm, SystemSettingsForm, UserEditForm
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# Background job kinds listed on the master data page
+MASTER_DATA_JOB_KINDS = (IMPORT_JOB_KIND, DELETE_JOB_KIND)
+
 def admin_required(f):
     """Decorator to check if user is admin"""
     @wraps(f)
@@ -43,7 +61,7 @@ def admin_dashboard():
     """Admin dashboard with statistics"""
     # Get user statistics
     total_users = User.query.count()
-    active_users = User.query.filter_by(is_active=True).count()
+    active_users = User.query.filter(User.is_active).count()
     
     # Get recent logins (last 24 hours)
     yesterday = datetime.utcnow() - timedelta(days=1)
@@ -71,15 +89,21 @@ def admin_dashboard():
 @login_required
 @admin_required
 def user_list():
-    page = request.args.get('page', 1, type=int)
-    users = User.query.order_by(desc(User.created_at)).paginate(
-        page=page, per_page=10, error_out=False
+    cursor = request.args.get('cursor')
+    total = count_cache.get(
+        'users',
+        ttl_stamp(current_app.config['PAGINATION_COUNT_TTL']),
+        lambda: db.session.query(func.count(User.id)).scalar()
+    )
+    users = keyset_paginate(
+        User.query, [User.created_at, User.id], per_page=10,
+        token=cursor, descending=True, total=total
     )
     log_operation(
         current_app.logger,
         'User List View',
         'success',
-        {'page': page, 'total_users': users.total}
+        {'cursor': bool(cursor), 'total_users': users.total}
     )
     return render_template('admin/user_list.html', users=users)
 
@@ -195,22 +219,104 @@ def toggle_user_status(user_id):
 @admin_required
 def master_data():
     """Master data management page"""
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor')
     category = request.args.get('category', '')
+    search = request.args.get('q', '').strip()
+    tags = parse_tags(request.args.get('tags', ''))
+    tag_mode = request.args.get('tag_mode', TAG_MODE_ANY)
+    if tag_mode not in TAG_MODES:
+        tag_mode = TAG_MODE_ANY
     per_page = 10
     
-    query = MasterData.query
-    if category:
-        query = query.filter_by(category=category)
-    
-    data = query.order_by(MasterData.category, MasterData.sort_order).paginate(
-        page=page, per_page=per_page, error_out=False)
-    categories = db.session.query(MasterData.category).distinct().all()
+    # Category list and totals come from the maintained category summary
+    categories = master_data_cache.categories()
+    if search:
+        # Ranked full-text matches replace the paged list
+        results = search_master_data(search, category=category or None, limit=MAX_SEARCH_LIMIT)
+        data = KeysetPage(results, len(results))
+    else:
+        query = MasterData.query
+        if category:
+            query = query.filter_by(category=category)
+        if tags:
+            query = query.filter(Tag.master_data_filter(tags, tag_mode))
+            # Tag filtered totals are cached until any category changes
+            total = count_cache.get(
+                ('master_data', category, tuple(tags), tag_mode),
+                tuple(sorted(master_data_cache.current_versions().items())),
+                lambda: query.order_by(None).count()
+            )
+        else:
+            total = sum(summary.row_count for summary in categories
+                        if not category or summary.category == category)
+        data = keyset_paginate(
+            query, [MasterData.category, MasterData.sort_order, MasterData.id],
+            per_page=per_page, token=cursor, total=total
+        )
+    data_jobs = DataJob.query.filter(DataJob.kind.in_(MASTER_DATA_JOB_KINDS)).order_by(
+        desc(DataJob.created_at)).limit(5).all()
     
     return render_template('admin/master_data.html',
                          master_data=data,
                          categories=categories,
-                         current_category=category)
+                         current_category=category,
+                         search=search,
+                         tags=', '.join(tags),
+                         tag_mode=tag_mode,
+                         data_jobs=data_jobs,
+                         import_form=MasterDataImportForm(),
+                         delete_form=MasterDataBulkDeleteForm(category=category))
+
+@admin_bp.route('/master-data/search')
+@login_required
+@admin_required
+def search_master_data_json():
+    """Full-text search over master data name, description and tags as JSON"""
+    search = request.args.get('q', '').strip()
+    category = request.args.get('category', '')
+    limit = request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int)
+    
+    try:
+        started = time.perf_counter()
+        results = search_master_data(search, category=category or None, limit=max(limit, 1))
+        elapsed = time.perf_counter() - started
+        
+        return jsonify({
+            'status': 'success',
+            'query': search,
+            'count': len(results),
+            'elapsed': round(elapsed, 4),
+            'results': [
+                {
+                    'id': row.id,
+                    'category': row.category,
+                    'code': row.code,
+                    'name': row.name,
+                    'description': row.description,
+                    'icon': row.icon,
+                    'tags': row.tags,
+                    'is_active': bool(row.is_active),
+                    'rank': row.rank
+                }
+                for row in results
+            ]
+        })
+        
+    except Exception as e:
+        log_operation(
+            current_app.logger,
+            'Master Data Search',
+            'error',
+            {
+                'user_id': current_user.id,
+                'query': search,
+                'error': str(e)
+            }
+        )
+        return jsonify({
+            'status': 'error',
+            'error': 'Search failed'
+        }), 500
 
 @admin_bp.route('/master-data/add', methods=['GET', 'POST'])
 @login_required
@@ -234,6 +340,7 @@ def add_master_data():
                 created_by_id=current_user.id
             )
             db.session.add(data)
+            bump_master_data_versions(count_delta({}, data.category, 1, data.is_active))
             db.session.commit()
             
             log_operation(
@@ -276,7 +383,9 @@ def edit_master_data(data_id):
     
     if form.validate_on_submit():
         try:
+            changes = count_delta({}, data.category, -1, data.is_active)
             form.populate_obj(data)
+            bump_master_data_versions(count_delta(changes, data.category, 1, data.is_active))
             db.session.commit()
             
             log_operation(
@@ -314,81 +423,35 @@ def edit_master_data(data_id):
 @login_required
 @admin_required
 def import_master_data():
-    """Import master data from CSV"""
+    """Queue a master data import from CSV as a background job"""
     form = MasterDataImportForm()
     
     if form.validate_on_submit():
         try:
-            # Read CSV file
-            csv_file = form.file.data
-            stream = io.StringIO(csv_file.stream.read().decode("UTF8"), newline=None)
-            csv_reader = csv.DictReader(stream)
-            
-            # Process each row
-            success_count = 0
-            error_count = 0
-            
-            for row in csv_reader:
-                try:
-                    # Convert string to boolean
-                    is_active = row['is_active'].upper() == 'TRUE'
-                    
-                    # Parse created_on date using ISO format
-                    try:
-                        created_on = datetime.fromisoformat(row['created_on'])
-                    except ValueError:
-                        created_on = datetime.utcnow()
-                    
-                    # Find or create user by email
-                    user = User.query.filter_by(email=row['created_by']).first()
-                    if not user:
-                        user = current_user
-                    
-                    # Check if record already exists
-                    existing = MasterData.query.filter_by(
-                        category=row['category'],
-                        code=row['code']
-                    ).first()
-                    
-                    if existing:
-                        current_app.logger.info(f"Skipping existing record: {row['category']}:{row['code']}")
-                        continue
-                    
-                    # Create master data entry
-                    data = MasterData(
-                        category=row['category'],
-                        code=row['code'],
-                        name=row['description'],  # Using description as name
-                        description=row['description'],
-                        icon=row['icon'],
-                        tags=row['tags'],
-                        is_active=is_active,
-                        created_by_id=user.id
-                    )
-                    data.created_at = created_on
-                    db.session.add(data)
-                    success_count += 1
-                    current_app.logger.info(f"Added: {row['category']}:{row['code']}")
-                    
-                except Exception as row_error:
-                    error_count += 1
-                    current_app.logger.error(f"Error processing row: {str(row_error)}")
-                    continue
-            
-            db.session.commit()
+            job = queue_master_data_import(form.file.data, current_user.id, mode=form.mode.data)
             
             log_operation(
                 current_app.logger,
-                'Master Data Import',
+                'Master Data Import Queued',
                 'success',
                 {
                     'user_id': current_user.id,
-                    'success_count': success_count,
-                    'error_count': error_count
+                    'job_id': job.id,
+                    'filename': job.filename,
+                    'mode': job.mode
                 }
             )
             
-            flash(f'Master data imported successfully. Added: {success_count}, Errors: {error_count}', 'success')
+            flash(f'Import of {job.filename} queued as job #{job.id}. Progress is shown below.', 'info')
+            
+        except JobQueueFull as e:
+            log_operation(
+                current_app.logger,
+                'Master Data Import Queued',
+                'failure',
+                {'user_id': current_user.id, 'reason': str(e)}
+            )
+            flash(str(e), 'warning')
             
         except Exception as e:
             db.session.rollback()
@@ -405,6 +468,184 @@ def import_master_data():
     
     return redirect(url_for('admin.master_data'))
 
+@admin_bp.route('/master-data/import/preview', methods=['POST'])
+@login_required
+@admin_required
+def preview_master_data_import():
+    """Dry-run a master data CSV and classify its rows without writing"""
+    form = MasterDataImportForm()
+    
+    if not form.validate_on_submit():
+        message = '; '.join(error for errors in form.errors.values() for error in errors)
+        return jsonify({'status': 'error', 'error': message}), 400
+    
+    try:
+        diff = MasterDataDiff().run(iter_csv_rows(form.file.data.stream))
+        
+        log_operation(
+            current_app.logger,
+            'Master Data Import Preview',
+            'success',
+            {
+                'user_id': current_user.id,
+                'total': diff.total,
+                'counts': diff.counts,
+                'elapsed': round(diff.elapsed, 3)
+            }
+        )
+        
+        return jsonify(dict(diff.to_dict(), status='success'))
+        
+    except Exception as e:
+        log_operation(
+            current_app.logger,
+            'Master Data Import Preview',
+            'error',
+            {
+                'user_id': current_user.id,
+                'error': str(e)
+            }
+        )
+        return jsonify({
+            'status': 'error',
+            'error': f'Error previewing import: {str(e)}'
+        }), 500
+
+@admin_bp.route('/master-data/jobs/<int:job_id>')
+@login_required
+@admin_required
+def data_job_status(job_id):
+    """Return the progress of a background import or delete job as JSON"""
+    job = DataJob.query.filter(
+        DataJob.id == job_id, DataJob.kind.in_(MASTER_DATA_JOB_KINDS)).first_or_404()
+    return jsonify(job.to_dict())
+
+@admin_bp.route('/master-data/bulk-delete', methods=['POST'])
+@login_required
+@admin_required
+def bulk_delete_master_data():
+    """Queue deletion of all master data, or one category, as a background job"""
+    form = MasterDataBulkDeleteForm()
+    
+    if not form.validate_on_submit():
+        for errors in form.errors.values():
+            for error in errors:
+                flash(error, 'danger')
+        return redirect(url_for('admin.master_data'))
+    
+    try:
+        job = queue_master_data_delete(current_user.id, mode=form.mode.data, category=form.category.data or None)
+        
+        log_operation(
+            current_app.logger,
+            'Master Data Bulk Deletion Queued',
+            'success',
+            {
+                'user_id': current_user.id,
+                'job_id': job.id,
+                'mode': job.mode,
+                'category': job.categories
+            }
+        )
+        
+        target = f'category {job.categories}' if job.categories else 'all master data'
+        flash(f'Deletion of {target} queued as job #{job.id}. Progress is shown below.', 'info')
+        
+    except JobQueueFull as e:
+        log_operation(
+            current_app.logger,
+            'Master Data Bulk Deletion Queued',
+            'failure',
+            {'user_id': current_user.id, 'reason': str(e)}
+        )
+        flash(str(e), 'warning')
+        
+    except Exception as e:
+        db.session.rollback()
+        log_operation(
+            current_app.logger,
+            'Master Data Bulk Deletion',
+            'error',
+            {
+                'user_id': current_user.id,
+                'error': str(e)
+            }
+        )
+        flash(f'Error deleting master data: {str(e)}', 'danger')
+    
+    return redirect(url_for('admin.master_data', category=form.category.data or None))
+
+@admin_bp.route('/master-data/batch', methods=['POST'])
+@login_required
+@admin_required
+def batch_update_master_data():
+    """Reorder, activate or deactivate many master data rows in one request
+
+    Expects JSON {"action": "reorder", "items": [[id, sort_order], ...]},
+    {"action": "move", "id": id, "previous_id": id | null, "next_id": id | null}
+    or {"action": "activate" | "deactivate", "ids": [id, ...]}.
+    """
+    payload = request.get_json(silent=True)
+    action = payload.get('action') if isinstance(payload, dict) else None
+    
+    try:
+        if not isinstance(payload, dict):
+            raise BatchRequestError('Expected a JSON object')
+        if action not in BATCH_ACTIONS:
+            raise BatchRequestError(f'action must be one of {", ".join(BATCH_ACTIONS)}')
+        if action == ACTION_REORDER:
+            rows = parse_sort_orders(payload.get('items'))
+            updated = reorder_master_data(rows)
+        elif action == ACTION_MOVE:
+            data_id, previous_id, next_id = parse_move(payload)
+            rows = [data_id]
+            updated = move_master_data(data_id, previous_id, next_id)
+        else:
+            rows = parse_ids(payload.get('ids'))
+            updated = set_master_data_active(rows, action == ACTION_ACTIVATE)
+        db.session.commit()
+        
+        log_operation(
+            current_app.logger,
+            'Master Data Batch Update',
+            'success',
+            {
+                'user_id': current_user.id,
+                'action': action,
+                'requested_count': len(rows),
+                'updated_count': updated
+            }
+        )
+        
+        return jsonify({
+            'status': 'success',
+            'action': action,
+            'updated': updated,
+            'message': f'{updated} master data entries updated'
+        })
+        
+    except BatchRequestError as e:
+        log_operation(
+            current_app.logger,
+            'Master Data Batch Update',
+            'failure',
+            {'user_id': current_user.id, 'action': action, 'reason': str(e)}
+        )
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+        
+    except Exception as e:
+        db.session.rollback()
+        log_operation(
+            current_app.logger,
+            'Master Data Batch Update',
+            'error',
+            {'user_id': current_user.id, 'action': action, 'error': str(e)}
+        )
+        return jsonify({
+            'status': 'error',
+            'error': 'Failed to update master data'
+        }), 500
+
 @admin_bp.route('/master-data/<int:data_id>/delete', methods=['POST'])
 @login_required
 @admin_required
@@ -414,6 +655,7 @@ def delete_master_data(data_id):
     
     try:
         db.session.delete(data)
+        bump_master_data_versions(count_delta({}, data.category, -1, data.is_active))
         db.session.commit()
         
         log_operation(
@@ -450,6 +692,106 @@ def delete_master_data(data_id):
             'error': 'Failed to delete master data'
         }), 500
 
+@admin_bp.route('/people/duplicates')
+@login_required
+@admin_required
+def people_duplicates():
+    """Review page for candidate duplicate people found by the last scan"""
+    cursor = request.args.get('cursor')
+    query = PeopleDuplicateCluster.query.filter_by(
+        status=PeopleDuplicateCluster.STATUS_OPEN).options(selectinload(PeopleDuplicateCluster.members))
+    clusters = keyset_paginate(
+        query, [PeopleDuplicateCluster.score, PeopleDuplicateCluster.id], per_page=20,
+        token=cursor, descending=True, total=query.order_by(None).count()
+    )
+    data_jobs = DataJob.query.filter_by(kind=DUPLICATE_JOB_KIND).order_by(desc(DataJob.created_at)).limit(3).all()
+    
+    return render_template('admin/people_duplicates.html', clusters=clusters, data_jobs=data_jobs)
+
+@admin_bp.route('/people/duplicates/scan', methods=['POST'])
+@login_required
+@admin_required
+def scan_people_duplicates():
+    """Queue a duplicate scan of all people as a background job"""
+    try:
+        job = queue_people_duplicate_scan(current_user.id)
+        
+        log_operation(
+            current_app.logger,
+            'People Duplicate Scan Queued',
+            'success',
+            {'user_id': current_user.id, 'job_id': job.id}
+        )
+        flash(f'Duplicate scan queued as job #{job.id}. Progress is shown below.', 'info')
+        
+    except JobQueueFull as e:
+        log_operation(
+            current_app.logger,
+            'People Duplicate Scan Queued',
+            'failure',
+            {'user_id': current_user.id, 'reason': str(e)}
+        )
+        flash(str(e), 'warning')
+    
+    return redirect(url_for('admin.people_duplicates'))
+
+@admin_bp.route('/people/duplicates/jobs/<int:job_id>')
+@login_required
+@admin_required
+def people_duplicate_job_status(job_id):
+    """Return the progress of a background duplicate scan as JSON"""
+    job = DataJob.query.filter_by(id=job_id, kind=DUPLICATE_JOB_KIND).first_or_404()
+    return jsonify(job.to_dict())
+
+@admin_bp.route('/people/duplicates/<int:cluster_id>/dismiss', methods=['POST'])
+@login_required
+@admin_required
+def dismiss_people_duplicate(cluster_id):
+    """Mark a candidate cluster as not duplicates, so later scans skip it"""
+    cluster = PeopleDuplicateCluster.query.get_or_404(cluster_id)
+    cluster.status = PeopleDuplicateCluster.STATUS_DISMISSED
+    cluster.reviewed_by_id = current_user.id
+    cluster.reviewed_at = datetime.utcnow()
+    db.session.commit()
+    
+    log_operation(
+        current_app.logger,
+        'People Duplicate Dismissed',
+        'success',
+        {'user_id': current_user.id, 'cluster_id': cluster.id, 'size': cluster.size}
+    )
+    flash(f'Cluster #{cluster.id} dismissed.', 'success')
+    return redirect(url_for('admin.people_duplicates', cursor=request.args.get('cursor')))
+
+@admin_bp.route('/export/<dataset>')
+@login_required
+@admin_required
+def export_data(dataset):
+    """Stream master data, users or people as CSV or XLSX"""
+    export_format = request.args.get('format', 'csv')
+    category = request.args.get('category', '')
+    if dataset not in EXPORT_DATASETS or export_format not in EXPORT_FORMATS:
+        abort(404)
+    
+    log_operation(
+        current_app.logger,
+        'Data Export',
+        'success',
+        {
+            'user_id': current_user.id,
+            'dataset': dataset,
+            'format': export_format,
+            'category': category
+        }
+    )
+    
+    return export_response(
+        dataset,
+        export_format,
+        category=category if dataset == 'master-data' else None,
+        batch_size=current_app.config['EXPORT_BATCH_SIZE']
+    )
+
 @admin_bp.route('/systemsettings', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -1,5 +1,220 @@
-from flask import Blueprint
+import json
+from functools import wraps
+from operator import itemgetter
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user
+from sqlalchemy import func
+
+from ..models import db
+from ..models.master_data import MasterData
+from ..models.people import People
+from ..models.tag import TAG_MODE_ANY, TAG_MODES, Tag
+from ..utils.http_cache import conditional_json, make_etag
+from ..utils.master_data_cache import MasterDataEntry, master_data_cache
+from ..utils.master_data_sync import InvalidSyncCursor, master_data_changes
+from ..utils.people_directory import DEFAULT_PAGE_SIZE, search_people
+from ..utils.serialization import (LAYOUT_OBJECTS, LAYOUTS, InvalidFields, json_response, master_data_serializer,
+                                   people_serializer)
 
 api_bp = Blueprint('api', __name__)
 
-# Routes will be added later 
\ No newline at end of file
+# Fields of a master data item unless ?fields= asks for others
+MASTER_DATA_FIELDS = ('id', 'code', 'name', 'description', 'icon', 'tags', 'sort_order', 'is_active')
+
+# Fields of a person in directory listings unless ?fields= asks for others
+PEOPLE_LIST_FIELDS = ('id', 'first_name', 'last_name', 'full_name', 'email', 'phone', 'is_active')
+
+# Fields the master data cache can answer; its entries are all active
+CACHED_FIELDS = MasterDataEntry._fields + ('is_active',)
+
+MAX_BULK_CODES = 500
+
+def api_login_required(f):
+    """Require a logged-in user, answering with a JSON 401 instead of a redirect"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'status': 'error', 'error': 'Authentication required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+def request_list(name):
+    """Return a query parameter given repeatedly or comma-separated as a list"""
+    values = []
+    for value in request.args.getlist(name):
+        values.extend(part.strip() for part in value.split(','))
+    return [value for value in values if value]
+
+def category_stamp(category):
+    """Return what the category's data was last changed at, for its ETag
+
+    Every write bumps the category version; a category that has never been
+    versioned falls back to the newest updated_at among its rows.
+    """
+    summary = master_data_cache.summaries().get(category)
+    if summary is not None:
+        return f'v{summary.version}'
+    latest = db.session.query(func.max(MasterData.updated_at)).filter(
+        MasterData.category == category
+    ).scalar()
+    return f't{latest.isoformat() if latest else ""}'
+
+def request_fields(serializer=master_data_serializer, default=MASTER_DATA_FIELDS):
+    """Return the sparse fieldset and layout asked for; raise InvalidFields if unknown"""
+    fields = serializer.parse_fields(request.args.get('fields'), default)
+    layout = request.args.get('layout', LAYOUT_OBJECTS)
+    if layout not in LAYOUTS:
+        raise InvalidFields(f'layout must be one of {", ".join(LAYOUTS)}')
+    return fields, layout
+
+def master_data_rows(category, fields, codes=None, include_inactive=False, tags=None, tag_mode=TAG_MODE_ANY):
+    """Return tuples of the fields of a category's items in sort order
+
+    Plain reads of active items come from the master data cache; anything
+    else is a single query selecting only the requested columns.
+    """
+    if not include_inactive and not tags and set(fields) <= set(CACHED_FIELDS):
+        snapshot = master_data_cache.snapshot(category)
+        entries = snapshot.entries if codes is None else (
+            snapshot.by_code[code] for code in codes if code in snapshot.by_code)
+        getter = itemgetter(*[CACHED_FIELDS.index(field) for field in fields])
+        if len(fields) == 1:
+            return [(getter(entry + (True,)),) for entry in entries]
+        return [getter(entry + (True,)) for entry in entries]
+
+    query = master_data_serializer.query(fields).filter(MasterData.category == category)
+    if not include_inactive:
+        query = query.filter(MasterData.is_active)
+    if codes is not None:
+        query = query.filter(MasterData.code.in_(codes))
+    if tags:
+        query = query.filter(Tag.master_data_filter(tags, tag_mode))
+    return query.order_by(MasterData.sort_order, MasterData.code).all()
+
+@api_bp.route('/master-data/<category>')
+@api_login_required
+def master_data_list(category):
+    """List a category's items, or fetch many of them at once with codes=A,B,C
+
+    fields=code,name limits the fields returned, and layout=columns sends
+    the field names once with each item as an array.
+    """
+    try:
+        fields, layout = request_fields()
+    except InvalidFields as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    include_inactive = request.args.get('include_inactive', '') in ('1', 'true')
+    tags = request_list('tags')
+    tag_mode = request.args.get('tag_mode', TAG_MODE_ANY)
+    if tag_mode not in TAG_MODES:
+        return jsonify({'status': 'error', 'error': f'tag_mode must be one of {", ".join(TAG_MODES)}'}), 400
+
+    codes = None
+    if 'codes' in request.args:
+        codes = list(dict.fromkeys(request_list('codes')))
+        if len(codes) > MAX_BULK_CODES:
+            return jsonify({'status': 'error', 'error': f'At most {MAX_BULK_CODES} codes per request'}), 400
+
+    variant = json.dumps([fields, layout, include_inactive, tags, tag_mode, codes])
+    etag = make_etag('master-data', category, category_stamp(category), variant)
+
+    def build():
+        if codes is not None and 'code' not in fields:
+            # The code is needed to report missing ones
+            rows = master_data_rows(category, fields + ('code',), codes, include_inactive, tags, tag_mode)
+            found = {row[-1] for row in rows}
+            rows = [row[:-1] for row in rows]
+        else:
+            rows = master_data_rows(category, fields, codes, include_inactive, tags, tag_mode)
+            found = {row[fields.index('code')] for row in rows} if codes is not None else None
+        payload = {'status': 'success', 'category': category, 'count': len(rows),
+                   'items': master_data_serializer.serialize(fields, rows, layout)}
+        if codes is not None:
+            payload['missing'] = [code for code in codes if code not in found]
+        return payload
+
+    return conditional_json(etag, build)
+
+@api_bp.route('/master-data/<category>/<code>')
+@api_login_required
+def master_data_item(category, code):
+    """Get one item of a category by code"""
+    try:
+        fields = master_data_serializer.parse_fields(request.args.get('fields'), MASTER_DATA_FIELDS)
+    except InvalidFields as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    include_inactive = request.args.get('include_inactive', '') in ('1', 'true')
+    # Read the stamp first so the ETag is never newer than the row it tags
+    etag = make_etag('master-data', category, category_stamp(category), code, fields, include_inactive)
+
+    def build():
+        rows = master_data_rows(category, fields, [code], include_inactive)
+        if not rows:
+            response = jsonify({'status': 'error', 'error': 'Master data not found'})
+            response.status_code = 404
+            return response
+        return {'status': 'success', 'category': category,
+                'item': master_data_serializer.serialize(fields, rows)[0]}
+
+    return conditional_json(etag, build)
+
+@api_bp.route('/sync/master-data')
+@api_login_required
+def master_data_sync():
+    """Return master data changed or deleted since a sync cursor, with the next cursor
+
+    Call without a cursor for a full sync, then repeat with the returned
+    cursor while has_more is true; later calls pick up only new changes.
+    """
+    try:
+        page = master_data_changes(request.args.get('cursor'), request.args.get('limit', type=int))
+    except InvalidSyncCursor as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    return json_response({
+        'status': 'success',
+        'changes': page.changes,
+        'cursor': page.cursor,
+        'has_more': page.has_more
+    })
+
+@api_bp.route('/people')
+@api_login_required
+def people_list():
+    """List the people directory, or search it by name or email prefix with q=
+
+    Pages are walked with the returned next_cursor; fields= and layout=
+    work as for master data.
+    """
+    try:
+        fields, layout = request_fields(people_serializer, PEOPLE_LIST_FIELDS)
+    except InvalidFields as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    
+    page = search_people(
+        request.args.get('q', ''),
+        fields=fields,
+        per_page=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+        token=request.args.get('cursor')
+    )
+    return json_response({
+        'status': 'success',
+        'count': len(page.items),
+        'items': people_serializer.serialize(fields, page.items, layout),
+        'next_cursor': page.next_token,
+        'has_more': page.has_next
+    })
+
+@api_bp.route('/people/<int:person_id>')
+@api_login_required
+def people_item(person_id):
+    """Get one person by id"""
+    try:
+        fields = people_serializer.parse_fields(request.args.get('fields'))
+    except InvalidFields as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 400
+    
+    row = people_serializer.query(fields).filter(People.id == person_id).first()
+    if row is None:
+        return jsonify({'status': 'error', 'error': 'Person not found'}), 404
+    return json_response({'status': 'success', 'item': people_serializer.serialize(fields, [row])[0]})
@@ -9,6 +9,7 @@ from ..models.user_preferences import UserPreferences
 from ..forms.auth import LoginForm, RegistrationForm, RequestPasswordResetForm, ResetPasswordForm, ChangePasswordForm
 from ..utils.email import send_password_reset_email
 from ..utils.logging import log_operation
+from ..utils.password_hashing import PasswordHasherBusy, hash_method
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -21,7 +22,21 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(username=form.username.data).first()
-        if user is None or not user.check_password(form.password.data):
+        try:
+            password_ok = user is not None and user.check_password(form.password.data)
+        except PasswordHasherBusy as e:
+            # Shed the login rather than queue behind a storm of others
+            log_operation(
+                current_app.logger,
+                'Login',
+                'failure',
+                {'username': form.username.data, 'reason': 'password hashing queue full'}
+            )
+            flash(str(e), 'warning')
+            return render_template('auth/login.html', title='Sign In', form=form), 503, {
+                'Retry-After': str(e.retry_after)
+            }
+        if not password_ok:
             flash('Invalid username or password', 'error')
             current_app.logger.warning(f'Failed login attempt for username: {form.username.data}')
             return redirect(url_for('auth.login'))
@@ -31,6 +46,20 @@ def login():
             current_app.logger.warning(f'Deactivated account login attempt: {user.username}')
             return redirect(url_for('auth.login'))
 
+        if user.password_needs_rehash():
+            old_method = hash_method(user.password_hash)
+            try:
+                user.rehash_password(form.password.data)
+                log_operation(
+                    current_app.logger,
+                    'Password Rehash',
+                    'success',
+                    {'user_id': user.id, 'from': old_method, 'to': hash_method(user.password_hash)}
+                )
+            except PasswordHasherBusy:
+                # Keep the old hash; the next login upgrades it
+                pass
+
         login_user(user, remember=form.remember_me.data)
         user.last_login = datetime.utcnow()
         db.session.commit()
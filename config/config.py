@@ -13,6 +13,7 @@ class Config:
     APP_NAME = config_data['app_name']
     CLIENT_NAME = config_data['client_name']
     VERBOSE = True
+    LOG_TO_FILE = True  # Write the application log to logs/app.log
     
     # Security settings
     SECRET_KEY = config_data['security'].get('secret_key', os.urandom(32))
@@ -39,6 +40,47 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = 'static/uploads'
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    
+    # Import settings
+    IMPORT_BATCH_SIZE = 1000  # Rows per INSERT batch and commit
+    IMPORT_VALIDATION_CHUNK_SIZE = 50000  # Rows per pandas validation chunk
+    
+    # Bulk delete settings
+    DELETE_BATCH_SIZE = 5000  # Rows per chunked DELETE transaction
+    DELETE_BATCH_PAUSE = 0.05  # Seconds to pause between delete batches
+    
+    # Export settings
+    EXPORT_BATCH_SIZE = 1000  # Rows fetched per server-side cursor batch
+    
+    # Pagination settings
+    PAGINATION_COUNT_TTL = 60  # Seconds a cached list total is reused where no version stamp exists
+    
+    # User identity cache settings
+    IDENTITY_CACHE_SIZE = 1000  # Users kept per process, least recently used evicted first
+    
+    # Master data sync settings
+    SYNC_PAGE_SIZE = 1000  # Default changes returned per sync call
+    SYNC_SETTLE_SECONDS = 5  # Changes younger than this are held back until concurrent writers commit
+    SYNC_TOMBSTONE_RETENTION_DAYS = 30  # Deletions kept for sync; older cursors must resync from scratch
+    
+    # People duplicate detection settings
+    DUPLICATE_MATCH_THRESHOLD = 0.88  # Minimum pair score, from 0 to 1, to report two people as duplicates
+    DUPLICATE_MAX_BLOCK_SIZE = 200  # Larger blocks are only compared within a sliding window
+    DUPLICATE_WINDOW = 20  # Neighbours, in name order, each person is compared with in a large block
+    
+    # Password hashing settings
+    PASSWORD_HASH_METHOD = config_data['security'].get('password_hash_method', 'scrypt:32768:8:1')  # Scheme and cost of new hashes; pick with scripts/calibrate_password_hash.py
+    PASSWORD_HASH_TARGET_MS = config_data['security'].get('password_hash_target_ms', 100)  # Time per hash the calibration aims for
+    PASSWORD_HASH_WORKERS = 2  # Worker processes hashing passwords; 0 hashes on the request thread
+    PASSWORD_HASH_QUEUE_LIMIT = 8  # Hashes queued or running before logins are refused with 503
+    PASSWORD_HASH_RETRY_AFTER = 5  # Seconds clients are asked to wait when the hashing queue is full
+    
+    # Background job settings
+    JOB_WORKERS = 2  # Concurrent background jobs
+    JOB_QUEUE_LIMIT = 10  # Jobs queued or running per process before new ones are refused
+    JOB_HEARTBEAT_SECONDS = 15  # How often a worker marks its queued and running jobs alive
+    JOB_STALE_SECONDS = 120  # Unfinished jobs not marked alive for this long are failed as abandoned
+    JOB_LOCK_POLL_SECONDS = 2  # How often a job waiting for a category lock tries again
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -55,9 +97,21 @@ class ProductionConfig(Config):
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     WTF_CSRF_SSL_STRICT = True  # Enforce HTTPS for CSRF tokens in production
 
+class TestingConfig(Config):
+    """Testing configuration"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    WTF_CSRF_ENABLED = False
+    PASSWORD_HASH_WORKERS = 0  # Hash on the test thread
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Cheap hashes keep the suite fast
+    SYNC_SETTLE_SECONDS = 0  # Nothing commits late in a single-threaded test
+    LOG_TO_FILE = False  # Test runs must not write to the repository's logs/
+
 # Configuration dictionary
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 } 
\ No newline at end of file
@@ -45,6 +45,31 @@ target_db = current_app.extensions['migrate'].db
 # ... etc.
 
 
+# Search objects app/models creates with raw DDL; they are not in the
+# metadata, so autogenerate would otherwise emit drops for them
+RAW_DDL_TABLE_PREFIX = 'master_data_fts'
+RAW_DDL_COLUMNS = {('master_data', 'search_vector')}
+RAW_DDL_INDEXES = {
+    'ix_master_data_search_vector',
+    'ix_people_first_name_lower',
+    'ix_people_last_name_lower',
+    'ix_people_email_lower',
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave the objects created with raw DDL out of autogenerate"""
+    if not reflected or compare_to is not None:
+        return True
+    if type_ == 'table':
+        return not name.startswith(RAW_DDL_TABLE_PREFIX)
+    if type_ == 'column':
+        return (object.table.name, name) not in RAW_DDL_COLUMNS
+    if type_ == 'index':
+        return name not in RAW_DDL_INDEXES
+    return True
+
+
 def get_metadata():
     if hasattr(target_db, 'metadatas'):
         return target_db.metadatas[None]
@@ -65,7 +90,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_object=include_object
     )
 
     with context.begin_transaction():
@@ -93,6 +119,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
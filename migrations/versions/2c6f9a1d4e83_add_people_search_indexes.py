@@ -0,0 +1,44 @@
+"""Add lower-case prefix search indexes on people names and email
+
+Revision ID: 2c6f9a1d4e83
+Revises: 1b8e4f2a7c60
+Create Date: 2026-10-18 15:37:02.518346
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c6f9a1d4e83'
+down_revision = '1b8e4f2a7c60'
+branch_labels = None
+depends_on = None
+
+SEARCH_FIELDS = ('first_name', 'last_name', 'email')
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for field in SEARCH_FIELDS:
+                op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_people_{field}_lower '
+                           f'ON people ((lower({field}) COLLATE "C"), id)')
+        return
+
+    for field in SEARCH_FIELDS:
+        op.create_index(f'ix_people_{field}_lower', 'people', [sa.text(f'lower({field})'), 'id'], unique=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for field in reversed(SEARCH_FIELDS):
+                op.drop_index(f'ix_people_{field}_lower', table_name='people', postgresql_concurrently=True,
+                              if_exists=True)
+        return
+
+    for field in reversed(SEARCH_FIELDS):
+        op.drop_index(f'ix_people_{field}_lower', table_name='people')
@@ -0,0 +1,59 @@
+"""Add indexes for the admin lists, dashboard counts and master data cache
+
+Revision ID: e2d94b7c6a15
+Revises: c5a8e3f17b42
+Create Date: 2026-10-18 12:06:44.870231
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2d94b7c6a15'
+down_revision = 'c5a8e3f17b42'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_master_data_category_sort_order', 'master_data', ['category', 'sort_order', 'id'], None),
+    ('ix_master_data_active_category_sort_order', 'master_data', ['category', 'sort_order', 'code'], 'is_active'),
+    ('ix_users_created_at', 'users', ['created_at', 'id'], None),
+    ('ix_users_last_login', 'users', ['last_login'], None),
+    ('ix_users_active', 'users', ['id'], 'is_active'),
+]
+
+
+def partial_where(predicate):
+    """Return the dialect keyword arguments for a partial index predicate"""
+    if predicate is None:
+        return {}
+    return {
+        'sqlite_where': sa.text(f'{predicate} = 1'),
+        'postgresql_where': sa.text(predicate)
+    }
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns, predicate in INDEXES:
+                op.create_index(name, table, columns, unique=False, postgresql_concurrently=True,
+                                if_not_exists=True, **partial_where(predicate))
+        return
+
+    for name, table, columns, predicate in INDEXES:
+        op.create_index(name, table, columns, unique=False, **partial_where(predicate))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns, predicate in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for name, table, columns, predicate in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
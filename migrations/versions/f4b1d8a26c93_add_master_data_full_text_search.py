@@ -0,0 +1,72 @@
+"""Add full-text search over master data name, description and tags
+
+Revision ID: f4b1d8a26c93
+Revises: e2d94b7c6a15
+Create Date: 2026-10-18 12:48:19.042587
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b1d8a26c93'
+down_revision = 'e2d94b7c6a15'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE master_data_fts USING fts5("
+    "name, description, tags, content='master_data', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER master_data_fts_insert AFTER INSERT ON master_data BEGIN "
+    "INSERT INTO master_data_fts (rowid, name, description, tags) "
+    "VALUES (new.id, new.name, new.description, new.tags); END",
+    "CREATE TRIGGER master_data_fts_delete AFTER DELETE ON master_data BEGIN "
+    "INSERT INTO master_data_fts (master_data_fts, rowid, name, description, tags) "
+    "VALUES ('delete', old.id, old.name, old.description, old.tags); END",
+    "CREATE TRIGGER master_data_fts_update AFTER UPDATE OF name, description, tags ON master_data BEGIN "
+    "INSERT INTO master_data_fts (master_data_fts, rowid, name, description, tags) "
+    "VALUES ('delete', old.id, old.name, old.description, old.tags); "
+    "INSERT INTO master_data_fts (rowid, name, description, tags) "
+    "VALUES (new.id, new.name, new.description, new.tags); END",
+    # Index the rows that already exist
+    "INSERT INTO master_data_fts (master_data_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS master_data_fts_update",
+    "DROP TRIGGER IF EXISTS master_data_fts_delete",
+    "DROP TRIGGER IF EXISTS master_data_fts_insert",
+    "DROP TABLE IF EXISTS master_data_fts",
+]
+
+
+def upgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect_name == 'postgresql':
+        # The generated column is computed for existing rows as it is added
+        op.execute(
+            "ALTER TABLE master_data ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(tags, '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'C')) STORED"
+        )
+        with op.get_context().autocommit_block():
+            op.create_index('ix_master_data_search_vector', 'master_data', ['search_vector'],
+                            unique=False, postgresql_using='gin', postgresql_concurrently=True,
+                            if_not_exists=True)
+
+
+def downgrade():
+    dialect_name = op.get_bind().dialect.name
+    if dialect_name == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect_name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_master_data_search_vector', table_name='master_data',
+                          postgresql_concurrently=True, if_exists=True)
+        op.execute("ALTER TABLE master_data DROP COLUMN IF EXISTS search_vector")
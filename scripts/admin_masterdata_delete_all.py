@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 
@@ -5,38 +6,55 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app, db
-from app.models import MasterData
+from app.utils.master_data_delete import DELETE_MODES, MODE_CHUNKED, MasterDataDeleter
 
-def delete_all_master_data():
-    """Delete all master data records from the database"""
+def delete_all_master_data(mode=MODE_CHUNKED, category=None, assume_yes=False):
+    """Delete all master data records, or those of one category, from the database"""
     app = create_app()
-    
+
     with app.app_context():
         try:
+            deleter = MasterDataDeleter(
+                batch_size=app.config['DELETE_BATCH_SIZE'],
+                pause=app.config['DELETE_BATCH_PAUSE'],
+                logger=app.logger,
+                progress=lambda deleted: print(f"Deleted {deleted} records...")
+            )
+
             # Get count of records before deletion
-            count = MasterData.query.count()
-            
+            count = deleter.count(category)
+            target = f"category {category}" if category else "all"
+
             if count == 0:
-                print("No master data records found to delete.")
+                print(f"No master data records found to delete ({target}).")
                 return
-            
+
             # Ask for confirmation
-            confirm = input(f"Are you sure you want to delete all {count} master data records? (yes/no): ")
-            
-            if confirm.lower() != 'yes':
-                print("Operation cancelled.")
-                return
-            
-            # Delete all records
-            MasterData.query.delete()
-            db.session.commit()
-            
-            print(f"Successfully deleted {count} master data records.")
-            
+            if not assume_yes:
+                confirm = input(f"Are you sure you want to delete {count} master data records ({target})? (yes/no): ")
+
+                if confirm.lower() != 'yes':
+                    print("Operation cancelled.")
+                    return
+
+            deleted = deleter.run(mode, category)
+
+            print(f"Successfully deleted {deleted} master data records.")
+
         except Exception as e:
             db.session.rollback()
             print(f"Error deleting master data: {str(e)}")
             raise
 
+def main():
+    parser = argparse.ArgumentParser(description='Delete master data in bulk')
+    parser.add_argument('--category', help='Only delete records of this category')
+    parser.add_argument('--mode', choices=DELETE_MODES, default=MODE_CHUNKED,
+                        help='chunked: delete in primary-key batches; truncate: empty the whole table at once')
+    parser.add_argument('--yes', action='store_true', help='Do not ask for confirmation')
+    args = parser.parse_args()
+
+    delete_all_master_data(args.mode, args.category, args.yes)
+
 if __name__ == '__main__':
-    delete_all_master_data() 
\ No newline at end of file
+    main()
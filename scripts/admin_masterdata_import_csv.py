@@ -1,30 +1,27 @@
 import os
 import sys
-import csv
-from datetime import datetime
+import argparse
 import logging
+from datetime import datetime
 
 # Add the project root directory to Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from app import create_app, db
-from app.models import User, MasterData
+from app.models import User, DataJob
+from app.utils.jobs import job_runner
+from app.utils.master_data_import import (
+    IMPORT_JOB_KIND, IMPORT_MODES, MODE_SKIP, MasterDataImporter,
+    file_fingerprint, finish_import_job, scan_csv_file, start_import_job
+)
+from app.utils.master_data_validation import MasterDataCsvValidator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def parse_datetime(datetime_str):
-    """Parse datetime string in ISO 8601 format"""
-    try:
-        logger.info(f"Parsing datetime string: {datetime_str}")
-        return datetime.fromisoformat(datetime_str)
-    except ValueError as e:
-        logger.error(f"Error parsing datetime: {str(e)}")
-        return datetime.utcnow()
-
-def import_master_data(csv_file):
-    """Import master data from CSV file"""
+def import_master_data(csv_file, reject_file=None, mode=MODE_SKIP):
+    """Validate and import master data from CSV file"""
     logger.info(f"Starting master data import from file: {csv_file}")
     app = create_app()
     
@@ -37,71 +34,79 @@ def import_master_data(csv_file):
             return
         logger.info(f"Found admin user with ID: {admin_user.id}")
         
+        job = None
         try:
             if not os.path.exists(csv_file):
                 logger.error(f"CSV file not found: {csv_file}")
                 return
                 
-            logger.info("Reading CSV file...")
-            with open(csv_file, 'r') as file:
-                reader = csv.DictReader(file)
-                row_count = 0
-                success_count = 0
-                skip_count = 0
-                error_count = 0
+            # Record the run so identical re-imports can be short-circuited
+            job = DataJob(
+                kind=IMPORT_JOB_KIND,
+                created_by_id=admin_user.id,
+                filename=os.path.basename(csv_file),
+                mode=mode
+            )
+            categories, job.total_rows = scan_csv_file(csv_file)
+            job.categories = ','.join(sorted(categories))[:500]
+            db.session.add(job)
+            db.session.commit()
+            
+            # Take the same category locks as web imports and deletes, waiting for any holding them
+            logger.info(f"Waiting for locks on {len(categories)} categories...")
+            with job_runner.running_here(job), job_runner.category_locks(job.id, categories):
+                if not start_import_job(job, file_fingerprint(csv_file)):
+                    logger.info(f"{job.note}. Import skipped.")
+                    return
                 
-                for row in reader:
-                    row_count += 1
-                    try:
-                        logger.info(f"Processing row {row_count}: {row['category']}:{row['code']}")
-                        
-                        # Check if record already exists
-                        existing = MasterData.query.filter_by(
-                            category=row['category'],
-                            code=row['code']
-                        ).first()
-                        
-                        if existing:
-                            logger.info(f"Skipping existing record: {row['category']}:{row['code']}")
-                            skip_count += 1
-                            continue
-                        
-                        # Create new master data record
-                        master_data = MasterData(
-                            category=row['category'],
-                            code=row['code'],
-                            name=row['description'],  # Using description as name
-                            description=row['description'],
-                            icon=row['icon'],
-                            tags=row['tags'],
-                            is_active=row['is_active'].upper() == 'TRUE',
-                            created_by_id=admin_user.id
-                        )
-                        
-                        db.session.add(master_data)
-                        logger.info(f"Added: {row['category']}:{row['code']}")
-                        success_count += 1
-                        
-                    except Exception as e:
-                        error_count += 1
-                        logger.error(f"Error processing row {row_count}: {str(e)}")
-                        continue
-                
-                # Commit all changes
-                db.session.commit()
-                logger.info(f"""
-                Import completed:
-                - Total rows processed: {row_count}
-                - Successfully added: {success_count}
-                - Skipped (existing): {skip_count}
-                - Errors: {error_count}
-                """)
+                logger.info("Validating and importing CSV file...")
+                validator = MasterDataCsvValidator(
+                    csv_file,
+                    reject_path=reject_file,
+                    chunk_size=app.config['IMPORT_VALIDATION_CHUNK_SIZE']
+                )
+                importer = MasterDataImporter(
+                    admin_user.id,
+                    batch_size=app.config['IMPORT_BATCH_SIZE'],
+                    logger=logger,
+                    mode=mode
+                )
+                result = importer.run(validator.iter_records(), validated=True)
+                job.total_rows = validator.total
+                finish_import_job(job, result)
+            logger.info(f"""
+            Import completed:
+            - Total rows processed: {validator.total}
+            - Rejected (validation): {validator.rejected}
+            - Successfully added: {result.added}
+            - Updated (changed): {result.updated}
+            - Skipped (existing/unchanged): {result.skipped}
+            - Errors: {result.errors}
+            - Throughput: {result.rows_per_second:.0f} rows/s
+            """)
+            if validator.rejected:
+                logger.warning(f"Rejected rows written to: {validator.reject_path}")
                 
         except Exception as e:
             db.session.rollback()
+            if job is not None and job.id is not None:
+                job.status = DataJob.STATUS_FAILED
+                job.finished_at = datetime.utcnow()
+                job.note = str(e)[:200]
+                db.session.commit()
             logger.error(f"Fatal error during import: {str(e)}")
             raise
 
+def main():
+    """Parse command line arguments and run the import"""
+    parser = argparse.ArgumentParser(description='Import master data from a CSV file')
+    parser.add_argument('csv_file', nargs='?', default='mydoc/sampledata/masterdata.csv')
+    parser.add_argument('reject_file', nargs='?', default=None,
+                        help='Where to write rejected rows (default: <csv_file>.rejects.csv)')
+    parser.add_argument('--mode', choices=IMPORT_MODES, default=MODE_SKIP,
+                        help='skip existing records, or upsert to update changed ones')
+    args = parser.parse_args()
+    import_master_data(args.csv_file, args.reject_file, args.mode)
+
 if __name__ == '__main__':
-    csv_file = 'mydoc/sampledata/masterdata.csv'
-    import_master_data(csv_file) 
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.utils import serialization
+from app.utils.serialization import (LAYOUT_COLUMNS, dumps, master_data_serializer, people_serializer,
+                                     user_serializer)
+
+SERIALIZERS = {
+    'master-data': master_data_serializer,
+    'users': user_serializer,
+    'people': people_serializer,
+}
+
+def to_dict_path(serializer, rows):
+    """Load ORM objects and encode their to_dict() output, as list endpoints used to"""
+    objects = serializer.model.query.order_by(serializer.model.id).limit(rows).all()
+    return json.dumps([obj.to_dict() for obj in objects]).encode('utf-8')
+
+def column_path(serializer, rows, fields, layout):
+    """Select only the needed columns and encode the tuples in one pass"""
+    result = serializer.query(fields).order_by(serializer.model.id).limit(rows).all()
+    return dumps(serializer.serialize(fields, result, layout))
+
+def measure(run, repeat):
+    """Return (median seconds, payload bytes) over repeat runs with a cold identity map"""
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        payload = run()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(payload)
+
+def benchmark(dataset, rows, repeat, sparse):
+    """Compare to_dict() serialization with the column serializer on one dataset"""
+    app = create_app()
+
+    with app.app_context():
+        serializer = SERIALIZERS[dataset]
+        fields = serializer.fields
+        sparse_fields = serializer.parse_fields(sparse) if sparse else fields[:3]
+        available = serializer.model.query.count()
+        if not available:
+            print(f"No {dataset} records to serialize.")
+            return
+
+        print(f"{dataset}: {min(rows, available)} rows, median of {repeat} runs, "
+              f"encoder: {'orjson' if serialization.orjson else 'json'}")
+        cases = [
+            ('to_dict()', lambda: to_dict_path(serializer, rows)),
+            ('columns, all fields', lambda: column_path(serializer, rows, fields, None)),
+            ('columns, array layout', lambda: column_path(serializer, rows, fields, LAYOUT_COLUMNS)),
+            (f"columns, fields={','.join(sparse_fields)}", lambda: column_path(serializer, rows, sparse_fields, None)),
+        ]
+        baseline = None
+        for name, run in cases:
+            seconds, size = measure(run, repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<40} {seconds * 1000:9.1f} ms {size / 1024:9.1f} KiB {baseline / seconds:6.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON serialization of list endpoints')
+    parser.add_argument('--dataset', choices=sorted(SERIALIZERS), default='master-data')
+    parser.add_argument('--rows', type=int, default=10000, help='Rows serialized per run')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case')
+    parser.add_argument('--fields', help='Sparse fieldset to compare, e.g. code,name (default: first three fields)')
+    args = parser.parse_args()
+
+    benchmark(args.dataset, args.rows, args.repeat, args.fields)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import argparse
+import json
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app
+from app.utils.password_hashing import HASH_SCHEMES, calibrate, resolve_method, time_hash
+
+CONFIG_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'config', 'config.json'))
+
+def write_method(method, target_ms):
+    """Save the chosen method and budget to the security section of config.json"""
+    with open(CONFIG_FILE) as f:
+        config_data = json.load(f)
+    config_data.setdefault('security', {})
+    config_data['security']['password_hash_method'] = method
+    config_data['security']['password_hash_target_ms'] = target_ms
+    with open(CONFIG_FILE, 'w') as f:
+        json.dump(config_data, f, indent=2)
+
+def report_capacity(label, method, elapsed_ms, workers):
+    """Print a method's hash time and the logins per second the pool can verify with it"""
+    per_second = 1000 / elapsed_ms * max(workers, 1)
+    print(f"{label:<9} {method:<28} {elapsed_ms:8.1f} ms/hash  ~{per_second:6.1f} logins/s "
+          f"with {max(workers, 1)} worker(s)")
+
+def calibrate_password_hash(scheme, target_ms=None, samples=3, write=False):
+    """Measure hashing on this host and pick the cost that fits the latency budget"""
+    app = create_app()
+
+    with app.app_context():
+        target_ms = target_ms or app.config['PASSWORD_HASH_TARGET_MS']
+        workers = app.config['PASSWORD_HASH_WORKERS']
+        current = resolve_method(app.config['PASSWORD_HASH_METHOD'])
+
+        print(f"Calibrating {scheme} for {target_ms} ms per hash ({samples} samples per cost)...")
+        report_capacity('current', current, time_hash(current, samples), workers)
+        method, elapsed_ms = calibrate(scheme, target_ms, samples)
+        report_capacity('chosen', method, elapsed_ms, workers)
+
+        if elapsed_ms > target_ms:
+            print(f"Warning: the minimum {scheme} cost takes {elapsed_ms:.0f} ms here, over the "
+                  f"{target_ms} ms budget; raise the budget or add hashing workers.")
+
+        if method == current:
+            print("The configured method is already the calibrated one.")
+        elif write:
+            write_method(method, target_ms)
+            print(f"Saved password_hash_method = {method!r} to {CONFIG_FILE}. Restart the app to apply it; "
+                  f"existing hashes are upgraded as users log in.")
+        else:
+            print(f"Set security.password_hash_method to {method!r} in config.json, or rerun with --write.")
+
+def main():
+    parser = argparse.ArgumentParser(description='Choose a password hash cost that fits a latency budget on this host')
+    parser.add_argument('--scheme', choices=HASH_SCHEMES, default='bcrypt', help='Hash scheme (default: bcrypt)')
+    parser.add_argument('--target-ms', type=float, help='Milliseconds per hash to aim for (default: from config)')
+    parser.add_argument('--samples', type=int, default=3, help='Timed hashes per cost; the fastest is used')
+    parser.add_argument('--write', action='store_true', help='Save the chosen method to config/config.json')
+    args = parser.parse_args()
+
+    calibrate_password_hash(args.scheme, args.target_ms, args.samples, args.write)
+
+if __name__ == '__main__':
+    main()
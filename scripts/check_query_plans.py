@@ -0,0 +1,107 @@
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import desc, func, select, text, tuple_
+
+from app import create_app, db
+from app.models import MasterData, MasterDataTombstone, People, Tag, User
+from app.models.tag import TAG_MODE_ALL
+from app.utils.people_directory import prefix_range, search_key
+
+# A SQLite full table scan is reported as "SCAN <table>" with no index
+SQLITE_TABLE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+def hot_queries():
+    """Return (name, statement) for the queries behind the busiest pages"""
+    yesterday = datetime.utcnow() - timedelta(days=1)
+    master_data_order = [MasterData.category, MasterData.sort_order, MasterData.id]
+    return [
+        ('master data list, first page',
+         MasterData.query.order_by(*master_data_order).limit(11).statement),
+        ('master data list, category page after cursor',
+         MasterData.query.filter(
+             MasterData.category == 'CATEGORY',
+             tuple_(*master_data_order) > tuple_('CATEGORY', 0, 0)
+         ).order_by(*master_data_order).limit(11).statement),
+        ('master data cache, active entries of a category',
+         db.session.query(MasterData.id, MasterData.code, MasterData.name).filter(
+             MasterData.category == 'CATEGORY',
+             MasterData.is_active
+         ).order_by(MasterData.sort_order, MasterData.code).statement),
+        ('master data lookup by category and code',
+         MasterData.query.filter_by(category='CATEGORY', code='CODE').statement),
+        ('master data list, filtered by all of two tags',
+         MasterData.query.filter(
+             Tag.master_data_filter(['personal', 'family'], TAG_MODE_ALL)
+         ).order_by(*master_data_order).limit(11).statement),
+        ('master data sync, rows changed after cursor',
+         MasterData.query.filter(
+             MasterData.updated_at <= datetime.utcnow(),
+             tuple_(MasterData.updated_at, MasterData.id) > tuple_(yesterday, 0)
+         ).order_by(MasterData.updated_at, MasterData.id).limit(1001).statement),
+        ('master data sync, deletions after cursor',
+         MasterDataTombstone.query.filter(
+             MasterDataTombstone.deleted_at <= datetime.utcnow(),
+             tuple_(MasterDataTombstone.deleted_at, MasterDataTombstone.id) > tuple_(yesterday, 0)
+         ).order_by(MasterDataTombstone.deleted_at, MasterDataTombstone.id).limit(1001).statement),
+        ('people directory, email prefix search',
+         People.query.filter(*prefix_range(search_key('email'), 'ann')).order_by(
+             search_key('email'), People.id).limit(21).statement),
+        ('user list, page after cursor',
+         User.query.filter(
+             tuple_(User.created_at, User.id) < tuple_(datetime.utcnow(), 0)
+         ).order_by(desc(User.created_at), desc(User.id)).limit(11).statement),
+        ('dashboard, active users',
+         select(func.count()).select_from(User.query.filter(User.is_active).subquery())),
+        ('dashboard, recent logins',
+         select(func.count()).select_from(User.query.filter(User.last_login >= yesterday).subquery())),
+    ]
+
+def explain(statement):
+    """Return the query plan lines for a statement on the current database"""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        return [row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+    return [row[0] for row in db.session.execute(text(f'EXPLAIN {sql}'))]
+
+def uses_table_scan(plan, dialect_name):
+    """Return True if a plan reads any table sequentially"""
+    if dialect_name == 'sqlite':
+        return any(SQLITE_TABLE_SCAN.match(line.strip()) for line in plan)
+    return any('Seq Scan' in line for line in plan)
+
+def check_query_plans():
+    """EXPLAIN every hot query and fail if any of them scans a whole table"""
+    app = create_app()
+
+    with app.app_context():
+        dialect_name = db.engine.dialect.name
+        if dialect_name == 'postgresql':
+            # Small tables are cheaper to scan; ask whether an index could be used at all
+            db.session.execute(text('SET LOCAL enable_seqscan = off'))
+
+        failures = 0
+        for name, statement in hot_queries():
+            plan = explain(statement)
+            if uses_table_scan(plan, dialect_name):
+                failures += 1
+                print(f"FAIL  {name}")
+                for line in plan:
+                    print(f"        {line}")
+            else:
+                print(f"ok    {name}")
+
+        db.session.rollback()
+        if failures:
+            print(f"{failures} hot queries fall back to a sequential scan.")
+            sys.exit(1)
+        print("All hot queries use an index.")
+
+if __name__ == '__main__':
+    check_query_plans()
@@ -0,0 +1,50 @@
+import argparse
+import os
+import sys
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.utils.people_duplicates import PeopleDuplicateFinder, store_clusters
+
+def find_people_duplicates(threshold=None, dry_run=False):
+    """Scan all people for likely duplicates and store the clusters for review"""
+    app = create_app()
+
+    with app.app_context():
+        try:
+            finder = PeopleDuplicateFinder(
+                threshold=threshold or app.config['DUPLICATE_MATCH_THRESHOLD'],
+                max_block_size=app.config['DUPLICATE_MAX_BLOCK_SIZE'],
+                window=app.config['DUPLICATE_WINDOW'],
+                logger=app.logger
+            )
+            groups = finder.run()
+            print(f"Compared {finder.compared} candidate pairs among {finder.loaded} people, "
+                  f"found {len(groups)} clusters.")
+
+            if dry_run:
+                for member_ids, score, reasons in sorted(groups, key=lambda group: -group[1])[:20]:
+                    print(f"  {score:.3f} {', '.join(reasons):<24} {member_ids}")
+                return
+
+            stored = store_clusters(groups)
+            db.session.commit()
+            print(f"Stored {stored} clusters for review.")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error finding duplicate people: {str(e)}")
+            raise
+
+def main():
+    parser = argparse.ArgumentParser(description='Find likely duplicate people records')
+    parser.add_argument('--threshold', type=float, help='Minimum pair score from 0 to 1 (default: from config)')
+    parser.add_argument('--dry-run', action='store_true', help='Print the best clusters instead of storing them')
+    args = parser.parse_args()
+
+    find_people_duplicates(args.threshold, args.dry_run)
+
+if __name__ == '__main__':
+    main()
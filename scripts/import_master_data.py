@@ -1 +1,10 @@
- 
\ No newline at end of file
+import os
+import sys
+
+# Make the sibling admin_masterdata_import_csv module importable from any working directory
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from admin_masterdata_import_csv import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+import os
+import sys
+import argparse
+import logging
+
+# Add the project root directory to Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import create_app, db
+from app.models import User
+from app.utils.master_data_import import IMPORT_MODES, MODE_UPSERT
+from app.utils.people_import import PeopleImporter, iter_people_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def import_people(path, mode=MODE_UPSERT):
+    """Import people from a CSV or XLSX file, merging on email"""
+    logger.info(f"Starting people import from file: {path}")
+    app = create_app()
+    
+    with app.app_context():
+        admin_user = User.query.filter_by(username='admin').first()
+        if not admin_user:
+            logger.error("Admin user not found")
+            return
+        
+        if not os.path.exists(path):
+            logger.error(f"File not found: {path}")
+            return
+        
+        try:
+            importer = PeopleImporter(
+                admin_user.id,
+                batch_size=app.config['IMPORT_BATCH_SIZE'],
+                logger=logger,
+                progress=lambda result: print(f"Processed {result.total} rows "
+                                              f"({result.rows_per_second:.0f} rows/s)...", end='\r'),
+                mode=mode
+            )
+            result = importer.run(iter_people_rows(path))
+            print()
+            logger.info(f"""
+            Import completed:
+            - Total rows processed: {result.total}
+            - Successfully added: {result.added}
+            - Updated (matched by email): {result.updated}
+            - Skipped (existing/unchanged/repeated): {result.skipped}
+            - Errors: {result.errors}
+            - Elapsed: {result.elapsed:.1f}s
+            - Throughput: {result.rows_per_second:.0f} rows/s
+            """)
+            for message in result.error_messages:
+                logger.warning(message)
+                
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Fatal error during import: {str(e)}")
+            raise
+
+def main():
+    """Parse command line arguments and run the import"""
+    parser = argparse.ArgumentParser(description='Import people from a CSV or XLSX file')
+    parser.add_argument('path', help='CSV or XLSX file with a header row (first_name, last_name, email, ...)')
+    parser.add_argument('--mode', choices=IMPORT_MODES, default=MODE_UPSERT,
+                        help='upsert to update people matched by email, or skip them')
+    args = parser.parse_args()
+    import_people(args.path, args.mode)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User
+from app.utils.identity_cache import identity_cache
+from app.utils.master_data_cache import master_data_cache
+
+
+@pytest.fixture
+def app():
+    """Application bound to a fresh in-memory database"""
+    app = create_app('testing')
+
+    @app.before_request
+    def forget_loaded_user():
+        # Requests share the app context below, where Flask-Login keeps the user it last loaded
+        g.pop('_login_user', None)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+    # Process-local caches would otherwise carry rows over from the previous database
+    identity_cache.clear()
+    master_data_cache.clear()
+
+
+@pytest.fixture
+def admin(app):
+    """An active administrator"""
+    user = User('admin', 'admin@example.com', 'admin123', 'Admin', is_admin=True)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, username, password):
+    """Post the login form and return the response"""
+    return client.post('/login', data={'username': username, 'password': password})
+
+
+@pytest.fixture
+def admin_client(client, admin):
+    """A test client logged in as the administrator"""
+    response = login(client, 'admin', 'admin123')
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def statements(app):
+    """SQL statements run while the test executes"""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield seen
+    event.remove(db.engine, 'before_cursor_execute', record)
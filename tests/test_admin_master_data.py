@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from sqlalchemy import select
+
+from app import db
+from app.models import MasterData
+
+
+def test_import_preview_reports_form_errors_as_one_message(admin_client):
+    response = admin_client.post('/admin/master-data/import/preview', data={
+        'file': (io.BytesIO(b'category,code\n'), 'data.txt'), 'mode': 'skip'
+    }, content_type='multipart/form-data')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'status': 'error', 'error': 'CSV files only!'}
+
+
+@pytest.fixture
+def colors(admin):
+    """25 colors, all at sort order 0 and so listed by id, spanning three admin pages"""
+    rows = [MasterData('colors', f'c{index:02d}', f'Color {index}', created_by_id=admin.id) for index in range(25)]
+    db.session.add_all(rows + [MasterData('sizes', 's', 'Small', sort_order=7, created_by_id=admin.id)])
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def category_order(category):
+    return db.session.execute(
+        select(MasterData.id).where(MasterData.category == category)
+        .order_by(MasterData.sort_order, MasterData.id)
+    ).scalars().all()
+
+
+def test_move_renumbers_a_category_spanning_several_pages(admin_client, colors):
+    # Drag the first row of the last page up between the first two rows
+    moved = colors[20]
+    response = admin_client.post('/admin/master-data/batch', json={
+        'action': 'move', 'id': moved, 'previous_id': colors[0], 'next_id': colors[1]
+    })
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'success'
+    expected = [colors[0], moved] + [data_id for data_id in colors[1:] if data_id != moved]
+    assert category_order('colors') == expected
+    sort_orders = db.session.execute(
+        select(MasterData.sort_order).where(MasterData.category == 'colors').order_by(MasterData.sort_order)
+    ).scalars().all()
+    assert sort_orders == list(range(25))
+    assert db.session.execute(select(MasterData.sort_order).where(MasterData.category == 'sizes')).scalar() == 7
+
+    # Then move the last row to the very top
+    response = admin_client.post('/admin/master-data/batch', json={
+        'action': 'move', 'id': expected[-1], 'previous_id': None, 'next_id': expected[0]
+    })
+
+    assert response.status_code == 200
+    assert category_order('colors') == [expected[-1]] + expected[:-1]
+
+
+def test_move_rejects_a_neighbour_from_another_category(admin_client, colors):
+    other = db.session.execute(select(MasterData.id).where(MasterData.category == 'sizes')).scalar()
+
+    response = admin_client.post('/admin/master-data/batch', json={
+        'action': 'move', 'id': colors[3], 'previous_id': other, 'next_id': None
+    })
+
+    assert response.status_code == 400
+    assert category_order('colors') == colors
+
+
+def test_batch_update_rejects_a_non_object_body(admin_client):
+    response = admin_client.post('/admin/master-data/batch', json=[{'action': 'reorder'}])
+
+    assert response.status_code == 400
+    assert response.get_json() == {'status': 'error', 'error': 'Expected a JSON object'}
@@ -0,0 +1,31 @@
+import re
+
+from app import db
+from app.models import MasterData
+from app.utils.master_data_cache import bump_master_data_versions
+
+
+def reads_master_data_rows(statements):
+    return any(re.search(r'\bFROM master_data\b(?!_)', statement) for statement in statements)
+
+
+def test_item_not_modified_is_answered_without_reading_the_row(admin_client, admin, statements):
+    db.session.add(MasterData('colors', 'red', 'Red', created_by_id=admin.id))
+    bump_master_data_versions({'colors': (1, 1)})
+    db.session.commit()
+    url = '/api/master-data/colors/red?include_inactive=1'
+    etag = admin_client.get(url).headers['ETag']
+    statements.clear()
+
+    response = admin_client.get(url, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert not reads_master_data_rows(statements)
+
+
+def test_missing_item_is_a_json_404(admin_client):
+    response = admin_client.get('/api/master-data/colors/none')
+
+    assert response.status_code == 404
+    assert response.get_json() == {'status': 'error', 'error': 'Master data not found'}
+    assert 'ETag' not in response.headers
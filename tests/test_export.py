@@ -0,0 +1,27 @@
+import tempfile
+
+import pytest
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    """Directory the XLSX export writes its temporary workbook to"""
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmp_path))
+    return tmp_path
+
+
+def test_xlsx_export_removes_its_workbook_once_sent(admin_client, export_dir):
+    with admin_client.get('/admin/export/users?format=xlsx') as response:
+        assert response.status_code == 200
+        assert response.data[:2] == b'PK'
+
+    assert list(export_dir.iterdir()) == []
+
+
+def test_xlsx_export_removes_its_workbook_when_never_read(admin_client, export_dir):
+    # The server closes the response without iterating it: a HEAD request, or a client gone early
+    with admin_client.head('/admin/export/users?format=xlsx') as head:
+        assert head.status_code == 200
+    admin_client.get('/admin/export/users?format=xlsx').close()
+
+    assert list(export_dir.iterdir()) == []
@@ -0,0 +1,85 @@
+import re
+
+import pytest
+from flask import g
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models import User, UserPreferences
+from app.utils.identity_cache import identity_cache
+from tests.conftest import login
+
+
+def fresh(client):
+    """Return client after forgetting the last loaded user, as a new app context would
+
+    Test requests share the test's app context, where Flask-Login keeps
+    the user it loaded for the previous request.
+    """
+    g.pop('_login_user', None)
+    return client
+
+
+def get_profile(client):
+    return fresh(client).get('/profile')
+
+
+@pytest.fixture
+def member(app):
+    user = User('member', 'member@example.com', 'member123', 'Member')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserPreferences(user.id, theme='dark'))
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def member_client(app, member):
+    client = app.test_client()
+    assert login(fresh(client), 'member', 'member123').status_code == 302
+    assert get_profile(client).status_code == 200
+    return client
+
+
+def test_deactivation_logs_the_user_out(admin_client, member, member_client):
+    response = fresh(admin_client).post(f'/admin/users/{member.id}/toggle')
+
+    assert response.status_code == 200
+    assert get_profile(member_client).status_code == 302
+
+
+def test_deactivation_by_another_process_logs_the_user_out(member, member_client):
+    # This process's cache still holds the active user; another worker changes the row
+    assert identity_cache.get(member.id).is_active
+    with Session(db.engine) as session:
+        session.get(User, member.id).is_active = False
+        session.commit()
+
+    assert get_profile(member_client).status_code == 302
+
+
+def test_unchanged_users_are_served_from_the_cache(member, member_client):
+    cached = identity_cache.get(member.id)
+
+    assert get_profile(member_client).status_code == 200
+    assert identity_cache.get(member.id) is cached
+
+
+def test_a_cached_user_costs_one_version_lookup_per_request(member, member_client):
+    identity_statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if re.search(r'\bFROM (users|user_preferences)\b', statement):
+            identity_statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        assert get_profile(member_client).status_code == 200
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+    # The row and preferences come from the cache; only the shared version is read
+    assert len(identity_statements) == 1
+    assert 'identity_version' in identity_statements[0]
@@ -0,0 +1,126 @@
+import socket
+import subprocess
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import DataJob, DataJobLock
+from app.utils.jobs import job_runner
+
+
+@pytest.fixture
+def make_job(admin):
+    def make(worker_id=None, heartbeat_at=None, status=DataJob.STATUS_QUEUED):
+        job = DataJob(kind='test', created_by_id=admin.id)
+        job.status = status
+        job.worker_id = worker_id
+        job.heartbeat_at = heartbeat_at or datetime.utcnow()
+        db.session.add(job)
+        db.session.commit()
+        return job
+    return make
+
+
+def held_locks():
+    return sorted((lock.job_id, lock.name) for lock in DataJobLock.query)
+
+
+def dead_worker_id():
+    """A worker id on this host whose process has already exited"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return f'{socket.gethostname()}:{process.pid}:deadbeef'
+
+
+def test_exclusive_claims_are_all_or_nothing(make_job):
+    first, second = make_job(), make_job()
+
+    assert job_runner.try_claim(first.id, exclusive=['category:a'])
+    assert not job_runner.try_claim(second.id, exclusive=['category:a', 'category:b'])
+    assert held_locks() == [(first.id, 'category:a')]
+
+    job_runner.release(first.id)
+    assert job_runner.try_claim(second.id, exclusive=['category:a', 'category:b'])
+    assert held_locks() == [(second.id, 'category:a'), (second.id, 'category:b')]
+
+
+def test_shared_claims_only_conflict_with_exclusive_ones(make_job):
+    first, second, third = make_job(), make_job(), make_job()
+
+    assert job_runner.try_claim(first.id, shared=['master_data'])
+    assert job_runner.try_claim(second.id, shared=['master_data'])
+    assert not job_runner.try_claim(third.id, exclusive=['master_data'])
+
+    job_runner.release(first.id)
+    job_runner.release(second.id)
+    assert job_runner.try_claim(third.id, exclusive=['master_data'])
+    assert not job_runner.try_claim(first.id, shared=['master_data'])
+
+
+def test_locks_are_released_when_the_job_fails(make_job):
+    job = make_job()
+
+    with pytest.raises(RuntimeError):
+        with job_runner.category_locks(job.id, ['colors']):
+            assert held_locks() == [(job.id, 'category:colors'), (job.id, 'master_data')]
+            raise RuntimeError('import failed')
+
+    assert held_locks() == []
+
+
+def test_reaper_fails_jobs_whose_worker_stopped(app, make_job):
+    stale = datetime.utcnow() - timedelta(seconds=app.config['JOB_STALE_SECONDS'] + 1)
+    dead = make_job(worker_id=dead_worker_id(), status=DataJob.STATUS_RUNNING)
+    silent = make_job(worker_id='elsewhere:123:cafebabe', heartbeat_at=stale)
+    alive = make_job(worker_id='elsewhere:123:cafebabe')
+    own = make_job(worker_id=job_runner.worker_id, status=DataJob.STATUS_RUNNING)
+    recycled = make_job(worker_id=job_runner.worker_id.rsplit(':', 1)[0] + ':0ldt0ken')
+    job_runner.try_claim(dead.id, exclusive=['category:colors'])
+
+    assert job_runner.reap_orphaned_jobs() == 3
+
+    statuses = {job.id: job.status for job in DataJob.query}
+    assert statuses == {
+        dead.id: DataJob.STATUS_FAILED,
+        silent.id: DataJob.STATUS_FAILED,
+        alive.id: DataJob.STATUS_QUEUED,
+        own.id: DataJob.STATUS_RUNNING,
+        recycled.id: DataJob.STATUS_FAILED,
+    }
+    assert db.session.get(DataJob, dead.id).note.startswith('Abandoned')
+    assert held_locks() == []
+
+
+def test_whole_table_job_excludes_jobs_in_any_category(make_job):
+    importer, deleter = make_job(), make_job()
+
+    # An import into a category the delete never saw still holds it off
+    assert job_runner.try_claim(importer.id, exclusive=['category:new'], shared=['master_data'])
+    assert not job_runner.try_claim(deleter.id, exclusive=['master_data'])
+
+    job_runner.release(importer.id)
+    assert job_runner.try_claim(deleter.id, exclusive=['master_data'])
+    assert not job_runner.try_claim(importer.id, exclusive=['category:new'], shared=['master_data'])
+
+
+def test_category_and_table_lock_names(make_job):
+    job = make_job()
+
+    with job_runner.category_locks(job.id, ['colors', 'sizes']):
+        assert held_locks() == [(job.id, 'category:colors'), (job.id, 'category:sizes'), (job.id, 'master_data')]
+    with job_runner.table_lock(job.id):
+        assert held_locks() == [(job.id, 'master_data')]
+
+
+def test_a_job_run_here_is_owned_until_it_ends(make_job):
+    job = make_job()
+
+    with job_runner.running_here(job):
+        assert job.worker_id == job_runner.worker_id
+        assert job.id in job_runner._owned
+        # A live worker's job is not reaped, so its locks stay held
+        assert job_runner.reap_orphaned_jobs() == 0
+
+    assert job.id not in job_runner._owned
@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import MasterData
+from app.models.master_data_version import MasterDataVersion
+from app.utils.master_data_cache import bump_master_data_versions, master_data_cache
+
+
+def reads_master_data_rows(statements):
+    return any(re.search(r'\bFROM master_data\b(?!_)', statement) for statement in statements)
+
+
+@pytest.fixture
+def colors(admin):
+    """Two active colors out of code order and one inactive color"""
+    db.session.add_all([
+        MasterData('colors', 'red', 'Red', sort_order=2, created_by_id=admin.id),
+        MasterData('colors', 'blue', 'Blue', sort_order=1, created_by_id=admin.id),
+        MasterData('colors', 'gray', 'Gray', is_active=False, created_by_id=admin.id),
+    ])
+    bump_master_data_versions({'colors': (3, 2)})
+    db.session.commit()
+
+
+def rename_red(name):
+    """Change a row behind the cache's back, without moving the version"""
+    db.session.execute(update(MasterData).where(MasterData.code == 'red').values(name=name))
+    db.session.commit()
+
+
+def test_snapshot_holds_active_entries_in_sort_order(colors):
+    assert [entry.code for entry in master_data_cache.entries('colors')] == ['blue', 'red']
+    assert master_data_cache.get('colors', 'gray') is None
+    assert master_data_cache.choices('colors', blank='Any') == [('', 'Any'), ('blue', 'Blue'), ('red', 'Red')]
+
+
+def test_snapshot_is_reused_until_the_version_moves(colors, statements):
+    snapshot = master_data_cache.snapshot('colors')
+    rename_red('Crimson')
+    statements.clear()
+
+    assert master_data_cache.snapshot('colors') is snapshot
+    assert not reads_master_data_rows(statements)
+
+    bump_master_data_versions(['colors'])
+    db.session.commit()
+
+    assert master_data_cache.get('colors', 'red').name == 'Crimson'
+    assert reads_master_data_rows(statements)
+
+
+def test_a_bump_from_another_worker_is_seen_in_the_next_app_context(app, colors):
+    assert master_data_cache.get('colors', 'red').name == 'Red'
+    rename_red('Crimson')
+    # Another process bumps the shared version; this context already read it
+    MasterDataVersion.bump(['colors'])
+    db.session.commit()
+
+    assert master_data_cache.get('colors', 'red').name == 'Red'
+    with app.app_context():
+        assert master_data_cache.get('colors', 'red').name == 'Crimson'
+
+
+def test_unknown_category_is_empty(app):
+    assert master_data_cache.entries('shapes') == ()
+    assert master_data_cache.choices('shapes', blank='None') == [('', 'None')]
@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import db
+from app.models import MasterData
+from app.models.master_data_version import MasterDataVersion
+from app.utils.master_data_delete import MODE_TRUNCATE, MasterDataDeleter
+from app.utils.master_data_import import MODE_UPSERT, MasterDataImporter
+
+
+def csv_row(code, description, category='colors', is_active='TRUE'):
+    return {'category': category, 'code': code, 'description': description, 'icon': '', 'tags': '',
+            'is_active': is_active, 'created_on': '', 'created_by': ''}
+
+
+def stored_counts():
+    """category -> (row_count, active_count) as kept on master_data_versions"""
+    return {row.category: (row.row_count, row.active_count)
+            for row in MasterDataVersion.query if row.row_count or row.active_count}
+
+
+def actual_counts():
+    """category -> (rows, active rows) counted from master_data itself"""
+    query = select(
+        MasterData.category,
+        func.count(MasterData.id),
+        func.count(MasterData.id).filter(MasterData.is_active.is_(True))
+    ).group_by(MasterData.category)
+    return {category: (rows, active) for category, rows, active in db.session.execute(query)}
+
+
+def import_rows(admin, rows, mode=MODE_UPSERT):
+    MasterDataImporter(admin.id, batch_size=2, mode=mode).run(rows)
+
+
+@pytest.fixture
+def imported(admin):
+    import_rows(admin, [
+        csv_row('red', 'Red'), csv_row('blue', 'Blue'), csv_row('gray', 'Gray', is_active='FALSE'),
+        csv_row('s', 'Small', category='sizes'), csv_row('m', 'Medium', category='sizes'),
+    ])
+
+
+def master_data_id(code):
+    return db.session.execute(select(MasterData.id).where(MasterData.code == code)).scalar()
+
+
+def form(category, code, name, is_active=True):
+    data = {'category': category, 'code': code, 'name': name, 'sort_order': 0}
+    if is_active:
+        data['is_active'] = 'y'
+    return data
+
+
+def test_import_keeps_counts_per_category(imported):
+    assert stored_counts() == actual_counts() == {'colors': (3, 2), 'sizes': (2, 2)}
+
+
+def test_upsert_import_that_flips_is_active_is_recounted(admin, imported):
+    import_rows(admin, [csv_row('red', 'Red', is_active='FALSE'), csv_row('gray', 'Gray'), csv_row('green', 'Green')])
+
+    assert stored_counts() == actual_counts() == {'colors': (4, 3), 'sizes': (2, 2)}
+
+
+def test_add_edit_and_delete_move_the_counts(admin_client, imported):
+    response = admin_client.post('/admin/master-data/add', data=form('sizes', 'l', 'Large', is_active=False))
+    assert response.status_code == 302
+    assert stored_counts() == actual_counts() == {'colors': (3, 2), 'sizes': (3, 2)}
+
+    # Moving an inactive row to another category and activating it
+    response = admin_client.post(f"/admin/master-data/{master_data_id('l')}", data=form('colors', 'l', 'Lilac'))
+    assert response.status_code == 302
+    assert stored_counts() == actual_counts() == {'colors': (4, 3), 'sizes': (2, 2)}
+
+    response = admin_client.post(f"/admin/master-data/{master_data_id('red')}/delete")
+    assert response.get_json()['status'] == 'success'
+    assert stored_counts() == actual_counts() == {'colors': (3, 2), 'sizes': (2, 2)}
+
+
+def test_batch_deactivation_moves_only_the_active_count(admin_client, imported):
+    response = admin_client.post('/admin/master-data/batch', json={
+        'action': 'deactivate', 'ids': [master_data_id('red'), master_data_id('gray'), master_data_id('s')]
+    })
+
+    assert response.status_code == 200
+    assert stored_counts() == actual_counts() == {'colors': (3, 1), 'sizes': (2, 1)}
+
+
+def test_chunked_delete_of_a_category_counts_down_batch_by_batch(imported):
+    MasterDataDeleter(batch_size=2, pause=0).run(category='colors')
+
+    assert stored_counts() == actual_counts() == {'sizes': (2, 2)}
+
+
+def test_truncate_recounts_every_category_to_zero(imported):
+    MasterDataDeleter(batch_size=2, pause=0).run(mode=MODE_TRUNCATE)
+
+    assert stored_counts() == actual_counts() == {}
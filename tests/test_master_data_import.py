@@ -0,0 +1,209 @@
+import csv
+from datetime import datetime
+
+import pytest
+
+from app import create_app, db
+from app.models import DataJob, MasterData, User
+from app.utils.jobs import job_runner
+from app.utils.master_data_import import (IMPORT_JOB_KIND, MODE_SKIP, MODE_UPSERT, MasterDataImporter,
+                                          iter_csv_rows, master_data_stamp, run_master_data_import_job,
+                                          scan_csv_file, start_import_job)
+from config.config import TestingConfig
+
+
+def csv_row(code, description, category='colors', is_active='TRUE'):
+    """A raw CSV row as csv.DictReader yields it"""
+    return {'category': category, 'code': code, 'description': description, 'icon': '', 'tags': '',
+            'is_active': is_active, 'created_on': '', 'created_by': ''}
+
+
+def run_import(admin, rows, mode=MODE_SKIP, batch_size=1000, validated=False):
+    return MasterDataImporter(admin.id, batch_size=batch_size, mode=mode).run(rows, validated=validated)
+
+
+def stored_names():
+    return {row.code: row.name for row in MasterData.query}
+
+
+def test_import_adds_new_rows(admin):
+    result = run_import(admin, [csv_row('red', 'Red'), csv_row('blue', 'Blue')])
+
+    assert (result.total, result.added, result.updated, result.skipped, result.errors) == (2, 2, 0, 0, 0)
+    assert stored_names() == {'red': 'Red', 'blue': 'Blue'}
+
+
+def test_skip_mode_leaves_existing_rows_alone(admin):
+    run_import(admin, [csv_row('red', 'Red')])
+
+    result = run_import(admin, [csv_row('red', 'Crimson'), csv_row('green', 'Green')])
+
+    assert (result.added, result.updated, result.skipped) == (1, 0, 1)
+    assert stored_names() == {'red': 'Red', 'green': 'Green'}
+
+
+def test_rows_repeated_in_a_file_are_skipped(admin):
+    result = run_import(admin, [csv_row('red', 'Red'), csv_row('red', 'Crimson')])
+
+    assert (result.added, result.skipped) == (1, 1)
+    assert stored_names() == {'red': 'Red'}
+
+
+def test_upsert_updates_only_changed_rows(admin):
+    run_import(admin, [csv_row('red', 'Red'), csv_row('blue', 'Blue'), csv_row('green', 'Green')])
+
+    result = run_import(admin, [csv_row('red', 'Red'), csv_row('blue', 'Navy'), csv_row('white', 'White')],
+                        mode=MODE_UPSERT)
+
+    assert (result.added, result.updated, result.skipped, result.errors) == (1, 1, 1, 0)
+    assert stored_names() == {'red': 'Red', 'blue': 'Navy', 'green': 'Green', 'white': 'White'}
+
+
+def test_upsert_skips_rows_the_database_already_matches(admin):
+    run_import(admin, [csv_row('red', 'Red')])
+    importer = MasterDataImporter(admin.id, mode=MODE_UPSERT)
+    importer.preload()
+    row = MasterData.query.filter_by(code='red').one()
+    row.name = row.description = 'Scarlet'
+    db.session.commit()
+
+    # The preloaded hash is stale, so the row is sent; ON CONFLICT finds nothing to change
+    result = importer.run([csv_row('red', 'Scarlet')])
+
+    assert (result.updated, result.skipped) == (0, 1)
+    assert stored_names() == {'red': 'Scarlet'}
+
+
+def test_unparseable_rows_are_counted_as_errors(admin):
+    bad = csv_row('blue', 'Blue')
+    del bad['is_active']
+
+    result = run_import(admin, [csv_row('red', 'Red'), bad])
+
+    assert (result.added, result.errors) == (1, 1)
+    assert 'row 2' in result.error_messages[0]
+
+
+def test_keys_are_stored_and_locked_without_surrounding_whitespace(admin, tmp_path):
+    path = tmp_path / 'padded.csv'
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(csv_row('', '')))
+        writer.writeheader()
+        writer.writerow(csv_row(' red ', 'Red', category=' colors'))
+
+    with open(path, 'rb') as f:
+        run_import(admin, iter_csv_rows(f))
+
+    assert scan_csv_file(path) == ({'colors'}, 1)
+    assert [(row.category, row.code) for row in MasterData.query] == [('colors', 'red')]
+
+
+def test_failed_batch_is_replayed_row_by_row(admin):
+    records = [
+        {'category': 'colors', 'code': code, 'name': name, 'description': name, 'icon': None, 'tags': None,
+         'is_active': True}
+        for code, name in (('red', 'Red'), ('blue', None), ('green', 'Green'))
+    ]
+
+    # name is NOT NULL, so the bulk INSERT fails and only the bad row is lost
+    result = run_import(admin, records, batch_size=10, validated=True)
+
+    assert (result.added, result.errors) == (2, 1)
+    assert 'colors:blue' in result.error_messages[0]
+    assert stored_names() == {'red': 'Red', 'green': 'Green'}
+
+
+@pytest.fixture
+def finished_import(admin):
+    """Record a completed import of a file, stamped with the current master data"""
+    def finish(fingerprint, processed=3, added=3, errors=0, mode=MODE_SKIP):
+        job = DataJob(kind=IMPORT_JOB_KIND, created_by_id=admin.id, mode=mode)
+        job.status = DataJob.STATUS_COMPLETED
+        job.file_fingerprint = fingerprint
+        job.total_rows = job.processed_rows = processed
+        job.added_rows = added
+        job.error_count = errors
+        job.master_data_stamp = master_data_stamp()
+        job.finished_at = datetime.utcnow()
+        db.session.add(job)
+        db.session.commit()
+        return job
+    return finish
+
+
+def new_import(admin, mode=MODE_SKIP):
+    job = DataJob(kind=IMPORT_JOB_KIND, created_by_id=admin.id, mode=mode)
+    db.session.add(job)
+    return job
+
+
+def test_reimporting_an_unchanged_file_does_nothing(admin, finished_import):
+    previous = finished_import('abc')
+    finished_import('other', processed=2, added=0)
+
+    job = new_import(admin)
+    assert not start_import_job(job, 'abc')
+
+    assert job.status == DataJob.STATUS_COMPLETED
+    assert f'#{previous.id}' in job.note
+    assert (job.processed_rows, job.added_rows, job.skipped_rows, job.error_count) == (3, 0, 3, 0)
+
+
+def test_a_file_that_lost_rows_is_imported_again(admin, finished_import):
+    finished_import('abc', processed=3, added=2, errors=1)
+
+    job = new_import(admin)
+
+    assert start_import_job(job, 'abc')
+    assert job.status == DataJob.STATUS_RUNNING
+
+
+def test_a_skip_import_does_not_cover_an_upsert(admin, finished_import):
+    finished_import('abc')
+
+    assert start_import_job(new_import(admin, MODE_UPSERT), 'abc')
+
+
+@pytest.fixture
+def file_app(tmp_path, monkeypatch):
+    """Application on a file SQLite database, where concurrent writers contend for its lock"""
+    monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'app.db'}")
+    app = create_app('testing')
+    app.config['IMPORT_BATCH_SIZE'] = 200
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def write_csv(path, category, count):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(csv_row('', '')))
+        writer.writeheader()
+        writer.writerows(csv_row(f'c{index}', f'Item {index}', category=category) for index in range(count))
+
+
+def test_concurrent_import_jobs_on_sqlite_lose_no_rows(file_app, tmp_path):
+    admin = User('admin', 'admin@example.com', 'admin123', is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    jobs, futures = [], []
+    for category in ('colors', 'sizes'):
+        path = tmp_path / f'{category}.csv'
+        write_csv(path, category, 2000)
+        job = DataJob(kind=IMPORT_JOB_KIND, created_by_id=admin.id, mode=MODE_SKIP)
+        db.session.add(job)
+        db.session.commit()
+        jobs.append(job.id)
+        futures.append(job_runner.submit(job, run_master_data_import_job, job.id, str(path)))
+
+    for future in futures:
+        future.result(timeout=60)
+
+    db.session.expire_all()
+    for job_id in jobs:
+        job = db.session.get(DataJob, job_id)
+        assert (job.status, job.added_rows, job.error_count) == (DataJob.STATUS_COMPLETED, 2000, 0)
+    assert MasterData.query.count() == 4000
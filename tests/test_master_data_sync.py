@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from app import db
+from app.models import MasterData, MasterDataTombstone
+from app.utils.master_data_sync import (OP_DELETE, OP_RESET, OP_UPSERT, encode_sync_cursor,
+                                        master_data_changes)
+
+
+def add_rows(admin, *codes):
+    rows = [MasterData('colors', code, code.title(), created_by_id=admin.id) for code in codes]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def sync_all(token=None, limit=None):
+    """Follow a sync to its end, returning every change and the final cursor"""
+    changes = []
+    while True:
+        page = master_data_changes(token, limit)
+        changes.extend(page.changes)
+        token = page.cursor
+        if not page.has_more:
+            return changes, token
+
+
+def test_full_sync_pages_through_every_row(admin):
+    add_rows(admin, 'red', 'blue', 'green', 'white', 'black')
+
+    first = master_data_changes(limit=2)
+    changes, _ = sync_all(first.cursor, limit=2)
+
+    assert first.has_more
+    codes = [change['item']['code'] for change in first.changes + changes]
+    assert codes == ['red', 'blue', 'green', 'white', 'black']
+
+
+def test_cursor_picks_up_updates_and_deletes(admin):
+    red, blue, green = add_rows(admin, 'red', 'blue', 'green')
+    _, token = sync_all()
+
+    blue.name = 'Navy'
+    db.session.delete(green)
+    db.session.commit()
+    changes, token = sync_all(token)
+
+    assert [(change['op'], change.get('item', change).get('code')) for change in changes] == [
+        (OP_UPSERT, 'blue'), (OP_DELETE, 'green')]
+    assert changes[0]['item']['name'] == 'Navy'
+    assert changes[1]['id'] == green.id
+
+    # Nothing is repeated once the cursor has moved past both
+    assert sync_all(token)[0] == []
+
+
+def test_delete_before_first_page_is_not_reported(admin):
+    red, blue = add_rows(admin, 'red', 'blue')
+    db.session.delete(blue)
+    db.session.commit()
+
+    # A full sync starts from the current table, so the earlier deletion is irrelevant
+    changes, _ = sync_all()
+
+    assert [(change['op'], change['item']['code']) for change in changes] == [(OP_UPSERT, 'red')]
+
+
+def test_emptied_table_is_reported_as_a_reset(admin):
+    add_rows(admin, 'red')
+    _, token = sync_all()
+
+    MasterData.query.delete()
+    MasterDataTombstone.record_wipe(db.session.connection())
+    db.session.commit()
+    add_rows(admin, 'blue')
+
+    changes, _ = sync_all(token)
+    assert [change['op'] for change in changes] == [OP_RESET, OP_UPSERT]
+    assert changes[1]['item']['code'] == 'blue'
+
+
+def test_cursor_older_than_tombstone_retention_restarts_the_sync(app, admin):
+    add_rows(admin, 'red', 'blue')
+    old = datetime.utcnow() - timedelta(days=app.config['SYNC_TOMBSTONE_RETENTION_DAYS'] + 1)
+
+    changes, _ = sync_all(encode_sync_cursor((old, 0), (old, 0)))
+
+    assert changes[0] == {'op': OP_RESET}
+    assert [change['item']['code'] for change in changes[1:]] == ['red', 'blue']
+
+
+def test_changes_inside_the_settle_window_are_held_back(app, admin):
+    app.config['SYNC_SETTLE_SECONDS'] = 60
+    add_rows(admin, 'red')
+
+    assert sync_all()[0] == []
+
+
+def test_sync_endpoint_requires_login_and_a_valid_cursor(app, admin_client, admin):
+    add_rows(admin, 'red')
+
+    assert app.test_client().get('/api/sync/master-data').status_code == 401
+
+    response = admin_client.get('/api/sync/master-data')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [change['item']['code'] for change in body['changes']] == ['red']
+    assert body['has_more'] is False
+
+    response = admin_client.get('/api/sync/master-data', query_string={'cursor': body['cursor'] + 'x'})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid sync cursor'
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import MasterData, User
+from app.utils.pagination import keyset_paginate
+
+COLOR_COLUMNS = (MasterData.category, MasterData.sort_order, MasterData.id)
+
+
+@pytest.fixture
+def colors(admin):
+    """25 colors in sort order, with ties on sort_order broken by id"""
+    rows = [MasterData('colors', f'c{index:02d}', f'Color {index}', sort_order=index // 2, created_by_id=admin.id)
+            for index in range(25)]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [row.id for row in rows]
+
+
+def color_page(token=None):
+    return keyset_paginate(MasterData.query, COLOR_COLUMNS, 10, token)
+
+
+def ids(page):
+    return [row.id for row in page.items]
+
+
+def test_pages_forward_and_back_without_gaps_or_repeats(colors):
+    first = color_page()
+    second = color_page(first.next_token)
+    last = color_page(second.next_token)
+
+    assert ids(first) + ids(second) + ids(last) == colors
+    assert not first.has_prev and first.has_next
+    assert last.has_prev and not last.has_next
+
+    back = color_page(last.prev_token)
+    assert ids(back) == ids(second)
+    assert back.has_next and back.has_prev
+    assert ids(color_page(back.prev_token)) == ids(first)
+    assert not color_page(back.prev_token).has_prev
+
+
+def test_a_page_does_not_shift_when_earlier_rows_are_added(admin, colors):
+    first = color_page()
+    db.session.add(MasterData('colors', 'new', 'New', sort_order=0, created_by_id=admin.id))
+    db.session.commit()
+
+    assert ids(color_page(first.next_token)) == colors[10:20]
+
+
+def test_descending_datetime_keys_round_trip_through_the_token(app):
+    created = datetime(2024, 1, 1, 12, 0, 0, 123456)
+    users = []
+    for index in range(15):
+        user = User(f'user{index}', f'user{index}@example.com', 'secret', f'User {index}')
+        # Pairs of users share a timestamp, so the id decides their order
+        user.created_at = created + timedelta(seconds=index // 2)
+        users.append(user)
+    db.session.add_all(users)
+    db.session.commit()
+    columns = [User.created_at, User.id]
+    expected = sorted(users, key=lambda user: (user.created_at, user.id), reverse=True)
+
+    first = keyset_paginate(User.query, columns, 10, descending=True)
+    second = keyset_paginate(User.query, columns, 10, first.next_token, descending=True)
+
+    assert first.items + second.items == expected
+    assert keyset_paginate(User.query, columns, 10, second.prev_token, descending=True).items == first.items
+
+
+@pytest.mark.parametrize('token', ['garbage', 'not.a.token', ''])
+def test_tampered_token_falls_back_to_the_first_page(colors, token):
+    page = color_page(token)
+
+    assert ids(page) == colors[:10]
+    assert not page.has_prev
+
+
+def test_token_signed_with_another_key_falls_back_to_the_first_page(app, colors):
+    token = color_page().next_token
+    app.config['SECRET_KEY'] = 'another-key'
+
+    assert ids(color_page(token)) == colors[:10]
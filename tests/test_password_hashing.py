@@ -0,0 +1,90 @@
+import bcrypt
+import pytest
+
+from app import db
+from app.models import User
+from app.utils.password_hashing import (PasswordHasher, PasswordHasherBusy, hash_method, hash_password, password_hasher,
+                                       verify_password)
+from tests.conftest import login
+
+LONG_PASSWORD = 'correct horse battery staple ' * 3
+
+
+@pytest.fixture
+def bcrypt_hasher():
+    """A hasher making cheap bcrypt hashes"""
+    hasher = PasswordHasher()
+    hasher.method = hasher.compare_method = 'bcrypt:4'
+    return hasher
+
+
+@pytest.fixture
+def busy_pool(app, monkeypatch):
+    """A hashing pool whose queue is full, so every hash is refused"""
+    monkeypatch.setattr(password_hasher, 'workers', 1)
+    limit = app.config['PASSWORD_HASH_QUEUE_LIMIT']
+    for _ in range(limit):
+        password_hasher._slots.acquire()
+    yield
+    for _ in range(limit):
+        password_hasher._slots.release()
+
+
+def plain_bcrypt_hash(password):
+    """A bcrypt hash as stored before passwords were pre-hashed"""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(4)).decode('ascii')
+
+
+def test_bcrypt_hashes_every_byte_of_long_passwords():
+    password_hash = hash_password(LONG_PASSWORD, 'bcrypt:4')
+
+    assert len(LONG_PASSWORD.encode('utf-8')) > 72
+    assert verify_password(password_hash, LONG_PASSWORD)
+    assert not verify_password(password_hash, LONG_PASSWORD[:72])
+    assert not verify_password(password_hash, LONG_PASSWORD + 'x')
+    assert hash_method(password_hash) == 'bcrypt:4'
+
+
+def test_plain_bcrypt_hashes_still_verify_and_need_rehash(bcrypt_hasher):
+    legacy = plain_bcrypt_hash('admin123')
+
+    assert bcrypt_hasher.check(legacy, 'admin123')
+    assert not bcrypt_hasher.check(legacy, 'admin124')
+    assert bcrypt_hasher.needs_rehash(legacy)
+    assert not bcrypt_hasher.needs_rehash(bcrypt_hasher.generate('admin123'))
+
+
+def test_login_rehashes_an_outdated_hash(client, admin):
+    admin.password_hash = plain_bcrypt_hash('admin123')
+    db.session.commit()
+
+    assert login(client, 'admin', 'admin123').status_code == 302
+
+    stored = db.session.get(User, admin.id).password_hash
+    assert hash_method(stored) == 'pbkdf2:sha256:1000'
+    assert verify_password(stored, 'admin123')
+
+
+def test_full_queue_refuses_a_hash_without_starting_the_pool(app, busy_pool):
+    with pytest.raises(PasswordHasherBusy) as refused:
+        password_hasher.generate('admin123')
+
+    assert refused.value.retry_after == app.config['PASSWORD_HASH_RETRY_AFTER']
+    assert password_hasher._executor is None
+
+
+def test_login_is_shed_with_503_while_the_pool_is_busy(app, client, admin, busy_pool):
+    response = login(client, 'admin', 'admin123')
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['PASSWORD_HASH_RETRY_AFTER'])
+    assert db.session.get(User, admin.id).last_login is None
+
+
+def test_other_hashing_views_answer_503_while_the_pool_is_busy(app, admin_client, busy_pool):
+    response = admin_client.post('/change_password', data={
+        'current_password': 'admin123', 'new_password': 'Admin12345!', 'confirm_password': 'Admin12345!'
+    })
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(app.config['PASSWORD_HASH_RETRY_AFTER'])
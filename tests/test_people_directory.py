@@ -0,0 +1,81 @@
+import pytest
+
+from app import db
+from app.models import People
+from app.models.people import SEARCH_FIELDS
+from app.utils.people_directory import search_people
+
+
+@pytest.fixture
+def people(admin):
+    """People matching "an" on one, two or all three search fields, and some who do not"""
+    rows = [
+        People('Ann', 'Lee', email='ann@example.com', created_by_id=admin.id),
+        People('Bob', 'Andrews', email='bob@example.com', created_by_id=admin.id),
+        People('Cat', 'Smith', email='anna.cat@example.com', created_by_id=admin.id),
+        People('Andy', 'Anderson', email='andy@example.com', created_by_id=admin.id),
+        People('Zed', 'Zane', email='zed@example.com', created_by_id=admin.id),
+        People('Dana', None, email=None, created_by_id=admin.id),
+        People('ANTON', 'Berg', email='berg@example.com', created_by_id=admin.id),
+        People('Ann', 'Anders', email='ann.anders@example.com', created_by_id=admin.id),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+
+def expected_order(people, prefix):
+    """Matches ordered by their smallest matching key, then id, as the merge lists them"""
+    matches = []
+    for person in people:
+        keys = [value.lower() for value in (getattr(person, field) for field in SEARCH_FIELDS)
+                if value and value.lower().startswith(prefix)]
+        if keys:
+            matches.append((min(keys), person.id))
+    return [person_id for _, person_id in sorted(matches)]
+
+
+def walk(text, per_page):
+    """Collect the ids of every page of a search"""
+    ids = []
+    token = None
+    while True:
+        page = search_people(text, fields=('id',), per_page=per_page, token=token)
+        ids.extend(row[0] for row in page.items)
+        if not page.has_next:
+            return ids
+        token = page.next_token
+
+
+@pytest.mark.parametrize('per_page', [1, 2, 3, 20])
+def test_prefix_search_pages_through_every_match_once(people, per_page):
+    ids = walk('an', per_page)
+
+    assert ids == expected_order(people, 'an')
+    assert len(ids) == len(set(ids)) == 6
+
+
+def test_prefix_search_ignores_case(people):
+    assert walk('AN', 2) == walk('an', 2)
+
+
+def test_two_words_match_first_and_last_name(people):
+    assert walk('ann and', 1) == [people[7].id]
+    assert walk('an anderson', 1) == [people[3].id]
+
+
+def test_no_text_lists_everyone_by_first_name(people):
+    ids = walk('', 3)
+
+    assert ids == [person.id for person in sorted(people, key=lambda person: (person.first_name.lower(), person.id))]
+
+
+def test_people_api_walks_pages_with_the_cursor(admin_client, people):
+    ids = []
+    url = '/api/people?q=an&limit=4&fields=id'
+    while url:
+        payload = admin_client.get(url).get_json()
+        ids.extend(item['id'] for item in payload['items'])
+        url = f"/api/people?q=an&limit=4&fields=id&cursor={payload['next_cursor']}" if payload['has_more'] else None
+
+    assert ids == expected_order(people, 'an')
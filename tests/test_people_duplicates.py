@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.models import DataJob
+from app.utils.jobs import JobQueueFull, job_runner
+from app.utils.people_duplicates import DUPLICATE_JOB_KIND, queue_people_duplicate_scan
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    """Ids of the jobs handed to the runner, which is kept from running them"""
+    jobs = []
+    monkeypatch.setattr(job_runner, 'submit', lambda job, fn, *args: jobs.append(job.id))
+    return jobs
+
+
+def make_scan(admin, worker_id, heartbeat_at):
+    job = DataJob(kind=DUPLICATE_JOB_KIND, created_by_id=admin.id)
+    job.status = DataJob.STATUS_RUNNING
+    job.worker_id = worker_id
+    job.heartbeat_at = heartbeat_at
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_a_live_scan_blocks_another(admin, submitted):
+    running = make_scan(admin, 'elsewhere:123:cafebabe', datetime.utcnow())
+
+    with pytest.raises(JobQueueFull, match=f'#{running.id}'):
+        queue_people_duplicate_scan(admin.id)
+    assert submitted == []
+
+
+def test_an_abandoned_scan_does_not_block_new_ones(app, admin, submitted):
+    stale = datetime.utcnow() - timedelta(seconds=app.config['JOB_STALE_SECONDS'] + 1)
+    abandoned = make_scan(admin, 'elsewhere:123:cafebabe', stale)
+
+    job = queue_people_duplicate_scan(admin.id)
+
+    assert submitted == [job.id]
+    assert db.session.get(DataJob, abandoned.id).status == DataJob.STATUS_FAILED
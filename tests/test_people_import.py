@@ -0,0 +1,111 @@
+from datetime import date
+
+import pytest
+
+from app import db
+from app.models import People, User
+from app.utils.master_data_import import MODE_SKIP, MODE_UPSERT
+from app.utils.people_import import PeopleImporter
+
+
+def person_row(first_name, email, **values):
+    """A raw file row as the CSV or XLSX reader yields it"""
+    return {'first_name': first_name, 'email': email, **values}
+
+
+def run_import(admin, rows, mode=MODE_UPSERT, batch_size=1000):
+    return PeopleImporter(admin.id, batch_size=batch_size, mode=mode).run(rows)
+
+
+def counts(result):
+    return result.total, result.added, result.updated, result.skipped, result.errors
+
+
+def stored():
+    return {person.email: person.first_name for person in People.query}
+
+
+@pytest.fixture
+def ann(admin):
+    person = People('Ann', 'Lee', email='Ann@Example.com', phone='123', created_by_id=admin.id)
+    db.session.add(person)
+    db.session.commit()
+    return person
+
+
+def test_upsert_merges_on_email_ignoring_case(admin, ann):
+    created_at = ann.created_at
+
+    result = run_import(admin, [
+        person_row('Anne', 'ann@example.COM', last_name='Lee', phone='123'),
+        person_row('Bob', 'bob@example.com'),
+    ])
+
+    assert counts(result) == (2, 1, 1, 0, 0)
+    assert stored() == {'Ann@Example.com': 'Anne', 'bob@example.com': 'Bob'}
+    db.session.refresh(ann)
+    assert ann.created_at == created_at
+
+
+def test_upsert_leaves_unchanged_people_alone(admin, ann):
+    result = run_import(admin, [person_row('Ann', 'ann@example.com', last_name='Lee', phone='123')])
+
+    assert counts(result) == (1, 0, 0, 1, 0)
+
+
+def test_skip_mode_does_not_touch_matched_people(admin, ann):
+    result = run_import(admin, [person_row('Anne', 'ANN@example.com'), person_row('Bob', 'bob@example.com')],
+                        mode=MODE_SKIP)
+
+    assert counts(result) == (2, 1, 0, 1, 0)
+    assert stored()['Ann@Example.com'] == 'Ann'
+
+
+def test_repeated_emails_are_skipped_and_rows_without_one_are_added(admin):
+    result = run_import(admin, [
+        person_row('Ann', 'ann@example.com'), person_row('Annie', 'ANN@example.com'),
+        person_row('Cy', ''), person_row('Cy', None),
+    ])
+
+    assert counts(result) == (4, 3, 0, 1, 0)
+    assert People.query.filter_by(first_name='Cy').count() == 2
+
+
+def test_values_are_parsed_and_invalid_rows_reported(admin):
+    result = run_import(admin, [
+        person_row('Ann', 'ann@example.com', birth_date='03/02/1990', gender='female', is_active='no'),
+        person_row('', 'nobody@example.com'),
+        person_row('Bob', 'not-an-email'),
+        person_row('Cy', 'cy@example.com', birth_date='someday'),
+    ])
+
+    assert counts(result) == (4, 1, 0, 0, 3)
+    person = People.query.filter_by(email='ann@example.com').one()
+    assert (person.birth_date, person.gender, person.is_active) == (date(1990, 2, 3), 'F', False)
+
+
+def test_created_by_is_matched_to_a_user_by_email(admin):
+    author = User('author', 'author@example.com', 'secret', 'Author')
+    db.session.add(author)
+    db.session.commit()
+
+    run_import(admin, [person_row('Ann', 'ann@example.com', created_by='author@example.com'),
+                       person_row('Bob', 'bob@example.com', created_by='unknown@example.com')])
+
+    assert People.query.filter_by(first_name='Ann').one().created_by_id == author.id
+    assert People.query.filter_by(first_name='Bob').one().created_by_id == admin.id
+
+
+def test_a_row_the_database_rejects_only_costs_itself(admin):
+    importer = PeopleImporter(admin.id, batch_size=1000)
+    importer.preload()
+    # Stored by another writer after the importer loaded the emails it knows
+    db.session.add(People('Ann', email='ann@example.com', created_by_id=admin.id))
+    db.session.commit()
+
+    result = importer.run([person_row('Bob', 'bob@example.com'), person_row('Anne', 'ann@example.com'),
+                           person_row('Cy', 'cy@example.com')])
+
+    assert counts(result) == (3, 2, 0, 0, 1)
+    assert 'ann@example.com' in result.error_messages[0]
+    assert stored() == {'ann@example.com': 'Ann', 'bob@example.com': 'Bob', 'cy@example.com': 'Cy'}
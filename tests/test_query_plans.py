@@ -0,0 +1,22 @@
+from sqlalchemy import text
+
+from app import db
+from scripts.check_query_plans import explain, hot_queries, uses_table_scan
+
+
+def plans():
+    return {name: explain(statement) for name, statement in hot_queries()}
+
+
+def test_every_hot_query_uses_an_index(app):
+    scans = {name: plan for name, plan in plans().items() if uses_table_scan(plan, db.engine.dialect.name)}
+
+    assert scans == {}
+
+
+def test_a_missing_index_is_reported_as_a_table_scan(app):
+    db.session.execute(text('DROP INDEX ix_users_last_login'))
+
+    plan = plans()['dashboard, recent logins']
+
+    assert uses_table_scan(plan, db.engine.dialect.name), plan
@@ -0,0 +1,76 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from app import db
+from app.models import MasterData, People, User, UserPreferences
+from app.utils import serialization
+from app.utils.master_data_cache import bump_master_data_versions
+from app.utils.serialization import (LAYOUT_COLUMNS, InvalidFields, dumps, master_data_serializer, people_serializer,
+                                     user_preferences_serializer, user_serializer)
+
+
+def as_json(value):
+    return json.loads(json.dumps(value))
+
+
+def serialized(serializer, model_id):
+    rows = serializer.query(serializer.fields).filter(serializer.model.id == model_id).all()
+    return json.loads(dumps(serializer.serialize(serializer.fields, rows)))[0]
+
+
+@pytest.fixture
+def records(admin):
+    """One row of every serialized model, with dates and empty optional fields"""
+    admin.last_login = datetime(2024, 5, 1, 8, 30, 15, 250000)
+    rows = [
+        MasterData('colors', 'red', 'Red', description='Warm', tags='warm', sort_order=3, created_by_id=admin.id),
+        People('Ann', 'Lee', email='ann@example.com', birth_date=date(1990, 2, 3), created_by_id=admin.id),
+        People('Bo', '', created_by_id=admin.id),
+        People('Cy', created_by_id=admin.id),
+        UserPreferences(admin.id, theme='dark'),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return [admin] + rows
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_column_serializers_match_to_dict(monkeypatch, records, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    serializers = {User: user_serializer, MasterData: master_data_serializer, People: people_serializer,
+                   UserPreferences: user_preferences_serializer}
+
+    for record in records:
+        serializer = serializers[type(record)]
+        assert serializer.fields == tuple(record.to_dict())
+        assert serialized(serializer, record.id) == as_json(record.to_dict())
+
+
+def test_master_data_api_matches_to_dict_from_the_cache_and_the_database(admin_client, records):
+    bump_master_data_versions(['colors'])
+    db.session.commit()
+    fields = 'id,code,name,description,icon,tags,sort_order,is_active'
+    expected = {field: value for field, value in as_json(records[1].to_dict()).items() if field in fields.split(',')}
+
+    cached = admin_client.get(f'/api/master-data/colors?fields={fields}').get_json()['items']
+    queried = admin_client.get(f'/api/master-data/colors?fields={fields}&include_inactive=1').get_json()['items']
+
+    assert cached == queried == [expected]
+
+
+def test_columns_layout_carries_the_same_values(admin_client, records):
+    objects = admin_client.get('/api/master-data/colors?include_inactive=1').get_json()['items']
+    columns = admin_client.get(f'/api/master-data/colors?include_inactive=1&layout={LAYOUT_COLUMNS}').get_json()['items']
+
+    assert [dict(zip(columns['fields'], row)) for row in columns['rows']] == objects
+
+
+def test_unknown_fields_are_rejected(admin_client):
+    with pytest.raises(InvalidFields):
+        master_data_serializer.parse_fields('code,secret')
+    response = admin_client.get('/api/master-data/colors?fields=code,secret')
+
+    assert response.status_code == 400
@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import func, select
+
+from app import db
+from app.models import MasterData, Tag
+from app.models.tag import TAG_MODE_ALL, master_data_tags, parse_tags
+from app.utils.master_data_delete import MasterDataDeleter
+from app.utils.master_data_import import MODE_UPSERT, MasterDataImporter
+
+
+def csv_row(code, tags, category='colors'):
+    return {'category': category, 'code': code, 'description': code.title(), 'icon': '', 'tags': tags,
+            'is_active': 'TRUE', 'created_on': '', 'created_by': ''}
+
+
+@pytest.fixture
+def tagged(admin):
+    """Colors imported with overlapping tags, one of them in another category"""
+    MasterDataImporter(admin.id, mode=MODE_UPSERT).run([
+        csv_row('red', 'Personal, Family'),
+        csv_row('blue', 'personal'),
+        csv_row('green', ' work ,'),
+        csv_row('s', 'personal, family', category='sizes'),
+    ])
+
+
+def tagged_codes(*names, mode='any'):
+    query = select(MasterData.code).where(Tag.master_data_filter(names, mode)).order_by(MasterData.code)
+    return db.session.execute(query).scalars().all()
+
+
+def link_count():
+    return db.session.execute(select(func.count()).select_from(master_data_tags)).scalar()
+
+
+def test_tags_are_split_and_normalized():
+    assert parse_tags(' Work,  Home  Office ,work,,') == ['home office', 'work']
+    assert parse_tags(None) == []
+
+
+def test_any_and_all_tag_filters(tagged):
+    assert tagged_codes('personal', 'family') == ['blue', 'red', 's']
+    assert tagged_codes('personal', 'family', mode=TAG_MODE_ALL) == ['red', 's']
+    assert tagged_codes('FAMILY, Personal', mode=TAG_MODE_ALL) == ['red', 's']
+    assert tagged_codes('unknown') == []
+
+
+def test_api_filters_a_category_by_tags(admin_client, tagged):
+    url = '/api/master-data/colors?fields=code&tags=personal,family'
+
+    assert [item['code'] for item in admin_client.get(url).get_json()['items']] == ['blue', 'red']
+    assert [item['code'] for item in admin_client.get(url + '&tag_mode=all').get_json()['items']] == ['red']
+    assert admin_client.get(url + '&tag_mode=some').status_code == 400
+
+
+def test_upsert_import_resyncs_changed_tags(admin, tagged):
+    MasterDataImporter(admin.id, mode=MODE_UPSERT).run([csv_row('red', 'work'), csv_row('blue', '')])
+
+    assert tagged_codes('work') == ['green', 'red']
+    assert tagged_codes('personal') == ['s']
+
+
+def test_orm_edits_and_deletes_keep_the_index_in_sync(tagged):
+    red = MasterData.query.filter_by(code='red').one()
+    red.tags = 'work'
+    db.session.commit()
+    assert tagged_codes('family') == ['s']
+    assert tagged_codes('work') == ['green', 'red']
+
+    db.session.delete(red)
+    db.session.commit()
+    assert tagged_codes('work') == ['green']
+
+
+def test_bulk_delete_removes_the_tag_links(tagged):
+    MasterDataDeleter(batch_size=2, pause=0).run(category='colors')
+
+    assert link_count() == 2
+    assert tagged_codes('personal', 'family') == ['s']